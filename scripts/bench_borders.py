@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark PyTable rendering with each border style.
+
+Border rules are drawn once per render and copied between rows; styles
+without row separators (minimal, markdown, borderless) also write about half
+as many lines.
+
+Usage:
+    uv run python scripts/bench_borders.py
+    uv run python scripts/bench_borders.py 1000000
+"""
+
+import sys
+import time
+
+from turboterm import PyTable
+
+DEFAULT_ROWS = 200_000
+STYLES = ["square", "rounded", "heavy", "ascii", "minimal", "markdown", "borderless"]
+ITERATIONS = 5
+
+
+def build(rows: int) -> PyTable:
+    table = PyTable()
+    table.threads = 1
+    for i in range(rows):
+        table.add_row([str(i), f"user-{i % 997}", "ok", f"{i * 1.5:.2f}"])
+    return table
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    table = build(rows)
+
+    print("=" * 72)
+    print(f"BORDER STYLES ({rows:,} rows, single thread)")
+    print("=" * 72)
+    print(f"  {'style':<12}{'render':>12}{'output':>14}{'vs square':>12}")
+
+    baseline = None
+    for style in STYLES:
+        best = float("inf")
+        for _ in range(ITERATIONS):
+            # Changing the style drops the cached render.
+            table.border = "square" if style != "square" else "ascii"
+            table.border = style
+            start = time.perf_counter()
+            text = table.to_string()
+            best = min(best, time.perf_counter() - start)
+        size = len(text.encode())
+        baseline = baseline or (best, size)
+        print(
+            f"  {style:<12}{best * 1000:10.2f} ms{size / 1e6:11.1f} MB"
+            f"{baseline[0] / best:11.2f}x"
+        )
+    print()
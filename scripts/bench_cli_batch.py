@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark running many command lines: one process each vs. `--batch`.
+
+Generates a small CLI whose command sleeps briefly, standing in for a
+provisioning step waiting on I/O. The first row starts a process per
+command line, the way a shell loop calls a CLI; process runs are fewer
+and scaled to the same count. The other rows feed every line to a single
+`--batch` run on standard input, on one thread and on a pool of four.
+
+Usage:
+    uv run python scripts/bench_cli_batch.py
+    uv run python scripts/bench_cli_batch.py 20000
+"""
+
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DEFAULT_LINES = 5_000
+PROCESSES = 100
+
+MAIN = """\
+import time
+
+from turboterm.cli import App, Argument, Option
+
+app = App()
+
+
+@app.command()
+def provision(
+    host: str = Argument(help="Host to provision"),
+    role: str = Option(["--role", "-r"], help="Role", default="web"),
+):
+    \"\"\"Provision a host.\"\"\"
+    time.sleep(0.0002)
+    print(host, role)
+
+
+app.run()
+"""
+
+
+def timed(args: list[str], stdin: str = "") -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, *args],
+        input=stdin,
+        text=True,
+        check=True,
+        capture_output=True,
+    )
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LINES
+    commands = [f"provision host-{i} --role db" for i in range(lines)]
+
+    print("=" * 72)
+    print(f"CLI BATCH ({lines:,} command lines)")
+    print("=" * 72)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        main = str(Path(tmp) / "main.py")
+        Path(main).write_text(MAIN)
+
+        runs = min(PROCESSES, lines)
+        per_process = sum(timed([main, *c.split()]) for c in commands[:runs]) / runs
+        rows = [("process per line", per_process * lines)]
+        stdin = "\n".join(commands) + "\n"
+        for jobs in (1, 4):
+            args = [main, "--batch", "--jobs", str(jobs)]
+            rows.append((f"--batch --jobs {jobs}", timed(args, stdin)))
+
+        for label, total in rows:
+            print(
+                f"  {label:<22} {total * 1000:10.1f} ms"
+                f"  {total / lines * 1e6:9.1f} us/line"
+            )
+    print()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold vs. warm invocations of a CLI run with `run(daemon=...)`.
+
+Generates a throwaway command module that does some import-time work,
+standing in for heavy imports such as pandas. The cold CLI imports it on
+every run; the warm one passes `daemon=` to `run()`, so that after the
+first run a background process with the module imported runs each
+command line. Each row is the mean of many back-to-back invocations, as a
+shell script calling the CLI in a loop would see them. Unix only.
+
+Usage:
+    uv run python scripts/bench_cli_daemon.py
+    uv run python scripts/bench_cli_daemon.py 200
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DEFAULT_INVOCATIONS = 50
+
+MODULE = """\
+from turboterm.cli import Argument, Option, command
+
+# Import-time work, like a module that pulls in a heavy dependency.
+_TABLE = [i * i for i in range(2_000_000)]
+
+
+@command()
+def deploy(
+    target: str = Argument(help="Deploy [bold]target[/bold]"),
+    port: int = Option(["--port", "-p"], help="Port", default=443),
+):
+    \"\"\"Deploy the project.\"\"\"
+    print(target, port)
+"""
+
+MAIN = """\
+from turboterm.cli import run
+
+run(modules=["cmds"], cache=False, daemon={daemon})
+"""
+
+
+def mean_time(root: Path, args: list[str], invocations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(invocations):
+        subprocess.run(
+            [sys.executable, *args],
+            cwd=root,
+            env={**os.environ, "XDG_RUNTIME_DIR": str(root / "run")},
+            check=True,
+            capture_output=True,
+        )
+    return (time.perf_counter() - start) / invocations
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        sys.exit("the daemon needs os.fork() and Unix sockets")
+    invocations = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_INVOCATIONS
+
+    print("=" * 72)
+    print(f"CLI DAEMON (mean of {invocations:,} invocations)")
+    print("=" * 72)
+
+    with tempfile.TemporaryDirectory(dir="/tmp") as tmp:
+        root = Path(tmp)
+        (root / "run").mkdir(mode=0o700)
+        (root / "cmds.py").write_text(MODULE)
+        (root / "cold.py").write_text(MAIN.format(daemon=False))
+        (root / "warm.py").write_text(MAIN.format(daemon=60))
+
+        baseline = mean_time(root, ["-c", "import turboterm.cli"], invocations)
+        print(f"  {'import turboterm.cli':<26} {baseline * 1000:7.1f} ms")
+        print(f"  {'':<26} {'cold':>10} {'warm':>10}")
+        # The first warm run starts the background process.
+        mean_time(root, ["warm.py", "--help"], 1)
+        for args in (["deploy", "prod", "-p", "80"], ["deploy", "--help"]):
+            times = [
+                mean_time(root, [script, *args], invocations) * 1000
+                for script in ("cold.py", "warm.py")
+            ]
+            label = " ".join(args)
+            print(f"  {label:<26}" + "".join(f" {t:7.1f} ms" for t in times))
+    print()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-dispatch latency of App with 10, 100 and 1,000 commands.
+
+Commands are registered in steps. The first dispatch of a command builds
+that command's parser ("first"); later dispatches reuse it.
+
+Usage:
+    uv run python scripts/bench_cli_dispatch.py
+    uv run python scripts/bench_cli_dispatch.py 20000
+"""
+
+import sys
+import time
+
+from turboterm.cli import App, Argument, Option
+
+DEFAULT_DISPATCHES = 10_000
+SIZES = [10, 100, 1_000]
+
+
+def handler(
+    target: str = Argument(help="Deploy [bold]target[/bold]"),
+    port: int = Option(["--port", "-p"], help="Port", default=443),
+    verbose: bool = Option(["--verbose", "-v"], help="Verbose"),
+):
+    """A [green]generated[/green] command."""
+    return port
+
+
+def register(app: App, start: int, stop: int) -> None:
+    for i in range(start, stop):
+        app.command(f"cmd-{i}")(handler)
+
+
+if __name__ == "__main__":
+    dispatches = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DISPATCHES
+    app = App()
+
+    print("=" * 72)
+    print(f"CLI DISPATCH LATENCY ({dispatches:,} dispatches per size)")
+    print("=" * 72)
+    print(f"  {'commands':>8}  {'first':>12}  {'dispatch':>12}  {'parse_args':>12}")
+
+    registered = 0
+    for size in SIZES:
+        register(app, registered, size)
+        registered = size
+        argv = [f"cmd-{size // 2}", "prod", "-p", "8080", "-v"]
+
+        start = time.perf_counter()
+        app.dispatch(argv)
+        first_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(dispatches):
+            app.dispatch(argv)
+        dispatch_time = (time.perf_counter() - start) / dispatches
+
+        start = time.perf_counter()
+        for _ in range(dispatches):
+            app.parse_args(argv)
+        parse_time = (time.perf_counter() - start) / dispatches
+
+        print(
+            f"  {size:>8,}  {first_time * 1000:9.2f} ms"
+            f"  {dispatch_time * 1e6:9.2f} us  {parse_time * 1e6:9.2f} us"
+        )
+    print()
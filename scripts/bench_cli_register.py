@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark registering 1,000 commands with `@command` and `register_lazy()`.
+
+Each command has a positional argument, a valued option and a flag. The
+`inspect.signature()` row times only reading the signatures the way
+`@command` used to, for comparison with a full registration.
+
+Usage:
+    uv run python scripts/bench_cli_register.py
+    uv run python scripts/bench_cli_register.py 5000
+"""
+
+import inspect
+import sys
+import time
+
+from turboterm.cli import Argument, Option, command, register_lazy
+
+DEFAULT_COMMANDS = 1_000
+REPEAT = 5
+
+SOURCE = """\
+def cmd_{i}(
+    target: str = Argument(help="Deploy [bold]target[/bold]"),
+    port: int = Option(["--port", "-p"], help="Port", default=443),
+    verbose: bool = Option(["--verbose", "-v"], help="Verbose"),
+):
+    \"\"\"Command number {i}.\"\"\"
+    return port
+"""
+
+PARAMS = [
+    ("target", str, Argument(help="Deploy [bold]target[/bold]")),
+    ("port", int, Option(["--port", "-p"], help="Port", default=443)),
+    ("verbose", bool, Option(["--verbose", "-v"], help="Verbose")),
+]
+
+
+def make_functions(count: int) -> list:
+    namespace = {"Argument": Argument, "Option": Option}
+    exec("\n".join(SOURCE.format(i=i) for i in range(count)), namespace)
+    return [namespace[f"cmd_{i}"] for i in range(count)]
+
+
+def best_time(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COMMANDS
+    functions = make_functions(count)
+
+    def signatures():
+        for func in functions:
+            inspect.signature(func)
+
+    def decorate():
+        for func in functions:
+            command()(func)
+
+    def lazy():
+        for i in range(count):
+            register_lazy(f"cmd_{i}", f"cmds:cmd_{i}", doc="Command.", params=PARAMS)
+
+    print("=" * 72)
+    print(f"CLI REGISTRATION ({count:,} commands, best of {REPEAT})")
+    print("=" * 72)
+    for label, fn in (
+        ("inspect.signature()", signatures),
+        ("@command", decorate),
+        ("register_lazy()", lazy),
+    ):
+        total = best_time(fn)
+        print(
+            f"  {label:<22} {total * 1000:8.2f} ms"
+            f"  {total / count * 1e6:8.2f} us/command"
+        )
+    print()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark startup of a 500-command CLI: eager, lazy and cached registration.
+
+Generates a throwaway package with one module per command. Each module
+does some import-time work, standing in for heavy imports such as pandas.
+The eager CLI imports every module so their `@command` decorators run; the
+lazy one calls `register_lazy()` for each and imports only the module of
+the command being run; the cached one passes the modules to
+`run(modules=...)`, which reads their metadata from its manifest cache.
+The last row times answering a shell completion request.
+
+Usage:
+    uv run python scripts/bench_cli_startup.py
+    uv run python scripts/bench_cli_startup.py 1000
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DEFAULT_COMMANDS = 500
+REPEAT = 5
+
+MODULE = """\
+from turboterm.cli import Argument, Option, command
+
+# Import-time work, like a module that pulls in a heavy dependency.
+_TABLE = [i * i for i in range(20_000)]
+
+
+@command("cmd-{i}")
+def main(
+    target: str = Argument(help="Deploy [bold]target[/bold]"),
+    port: int = Option(["--port", "-p"], help="Port", default=443),
+):
+    \"\"\"Command number {i}.\"\"\"
+    print(target, port)
+"""
+
+EAGER = """\
+from turboterm.cli import run
+
+{imports}
+
+run()
+"""
+
+LAZY = """\
+from turboterm.cli import Argument, Option, register_lazy, run
+
+for i in range({commands}):
+    register_lazy(
+        f"cmd-{{i}}",
+        f"cmds.cmd_{{i}}:main",
+        doc=f"Command number {{i}}.",
+        params=[
+            ("target", str, Argument(help="Deploy [bold]target[/bold]")),
+            ("port", int, Option(["--port", "-p"], help="Port", default=443)),
+        ],
+    )
+
+run()
+"""
+
+CACHED = """\
+from turboterm.cli import run
+
+run(modules=[f"cmds.cmd_{{i}}" for i in range({commands})], cache="manifest.json")
+"""
+
+
+def generate(root: Path, commands: int) -> None:
+    package = root / "cmds"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    for i in range(commands):
+        (package / f"cmd_{i}.py").write_text(MODULE.format(i=i))
+    imports = "\n".join(f"import cmds.cmd_{i}" for i in range(commands))
+    (root / "eager.py").write_text(EAGER.format(imports=imports))
+    (root / "lazy.py").write_text(LAZY.format(commands=commands))
+    (root / "cached.py").write_text(CACHED.format(commands=commands))
+
+
+def best_time(
+    root: Path, script: str, args: list[str], env: dict | None = None
+) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, script, *args],
+            cwd=root,
+            env=env and {**os.environ, **env},
+            check=True,
+            capture_output=True,
+        )
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COMMANDS
+
+    print("=" * 72)
+    print(f"CLI STARTUP ({commands:,} commands, best of {REPEAT})")
+    print("=" * 72)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        generate(root, commands)
+        baseline = best_time(root, "-c", ["import turboterm.cli"])
+        print(f"  {'import turboterm.cli':<22} {baseline * 1000:7.1f} ms")
+        print(f"  {'':<22} {'eager':>10} {'lazy':>10} {'cached':>10}")
+        for args in (["cmd-7", "prod", "-p", "80"], ["cmd-7", "--help"], ["--help"]):
+            times = [
+                best_time(root, script, args) * 1000
+                for script in ("eager.py", "lazy.py", "cached.py")
+            ]
+            label = " ".join(args)
+            print(f"  {label:<22}" + "".join(f" {t:7.1f} ms" for t in times))
+        # A Tab press completing the options of one command.
+        complete = {
+            "_TURBOTERM_COMPLETE": "bash",
+            "COMP_WORDS": "app\ncmd-7\n--",
+            "COMP_CWORD": "2",
+        }
+        times = [
+            best_time(root, script, [], complete) * 1000
+            for script in ("eager.py", "lazy.py", "cached.py")
+        ]
+        print(f"  {'<Tab> cmd-7 --':<22}" + "".join(f" {t:7.1f} ms" for t in times))
+    print()
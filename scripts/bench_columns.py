@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark building a PyTable from columnar arrays versus row lists.
+
+Compares PyTable.from_columns() over array.array buffers against the usual
+path of formatting every value in Python and calling add_row().
+
+Usage:
+    uv run python scripts/bench_columns.py
+"""
+
+import array
+import time
+
+from turboterm import PyTable
+
+ROWS = 200_000
+
+
+def bench_rows(ids: array.array, prices: array.array, flags: array.array) -> float:
+    start = time.perf_counter()
+    t = PyTable()
+    for i, p, f in zip(ids, prices, flags, strict=True):
+        t.add_row([f"{i:,}", f"{p:.2f}", str(bool(f))])
+    t.to_string()
+    return time.perf_counter() - start
+
+
+def bench_columns(ids: array.array, prices: array.array, flags: array.array) -> float:
+    start = time.perf_counter()
+    t = PyTable.from_columns(
+        [ids, prices, memoryview(flags).cast("?")], formats=[",", ".2f", None]
+    )
+    t.to_string()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    ids = array.array("q", range(ROWS))
+    prices = array.array("d", (i * 1.37 for i in range(ROWS)))
+    flags = array.array("B", (i % 2 for i in range(ROWS)))
+
+    print("=" * 60)
+    print(f"COLUMNAR INGESTION ({ROWS:,} rows x 3 columns)")
+    print("=" * 60)
+    rows_time = bench_rows(ids, prices, flags)
+    cols_time = bench_columns(ids, prices, flags)
+    print(f"  add_row       {rows_time:.4f}s")
+    print(f"  from_columns  {cols_time:.4f}s")
+    print(f"\n  from_columns is {rows_time / cols_time:.1f}x faster")
+    print()
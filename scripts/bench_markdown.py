@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark render_markdown() against Rich's Markdown renderer.
+
+Usage:
+    uv run python scripts/bench_markdown.py
+    uv run python scripts/bench_markdown.py 5000
+"""
+
+import io
+import sys
+import time
+
+from turboterm import render_markdown
+
+DEFAULT_ITERATIONS = 2_000
+
+DOC = """\
+# Release notes
+
+## Added
+
+- A `--json` flag on **every** command, see [the docs](https://example.com).
+- *Faster* startup when `turboterm` is imported lazily.
+  * Nested items keep their indent.
+
+> Upgrading from 0.1 needs no changes.
+
+```python
+from turboterm import console
+console.print("[bold]hello[/bold]")
+```
+
+---
+
+Fixed a crash with ~~empty~~ zero-width tables and `snake_case` names.
+"""
+
+
+def timed(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS
+
+    print("=" * 72)
+    print(f"MARKDOWN RENDERING ({iterations:,} x {len(DOC):,} byte document)")
+    print("=" * 72)
+
+    turbo = timed(lambda: render_markdown(DOC, width=80), iterations)
+    per_doc = turbo / iterations * 1e6
+    print(f"  render_markdown()        {turbo * 1000:10.1f} ms  {per_doc:8.1f} us/doc")
+
+    try:
+        from rich.console import Console
+        from rich.markdown import Markdown
+    except ImportError:
+        print("  rich Markdown            SKIPPED (rich not installed)")
+        print()
+        sys.exit(0)
+
+    def rich_render():
+        console = Console(file=io.StringIO(), width=80, force_terminal=True)
+        console.print(Markdown(DOC))
+
+    rich = timed(rich_render, iterations)
+    per_doc = rich / iterations * 1e6
+    print(f"  rich Markdown            {rich * 1000:10.1f} ms  {per_doc:8.1f} us/doc")
+    print(f"  speedup                  {rich / turbo:10.1f}x")
+    print()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark filling a PyTable with markup parsing on and off.
+
+Raw tables (markup=False) store cells as given and measure plain ASCII cells
+without decoding them; markup tables run every cell through the lexer.
+
+Usage:
+    uv run python scripts/bench_markup.py
+    uv run python scripts/bench_markup.py 1000000
+"""
+
+import sys
+import time
+
+from turboterm import PyTable
+
+DEFAULT_ROWS = 200_000
+
+
+def numeric_rows(rows: int) -> list[list[str]]:
+    return [
+        [str(i), f"{i * 1.5:.2f}", f"{i % 997:,}", f"id-{i:08x}"] for i in range(rows)
+    ]
+
+
+def log_rows(rows: int) -> list[list[str]]:
+    return [
+        [f"12:00:{i % 60:02d}", "[INFO]", f"arr[{i % 10}] = {i}", "worker-3"]
+        for i in range(rows)
+    ]
+
+
+def fill(rows: list[list[str]], markup: bool) -> tuple[float, float]:
+    table = PyTable(markup=markup)
+    start = time.perf_counter()
+    for row in rows:
+        table.add_row(row)
+    added = time.perf_counter() - start
+    start = time.perf_counter()
+    table.to_string()
+    return added, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+
+    print("=" * 72)
+    print(f"RAW vs MARKUP CELLS ({rows:,} rows x 4 columns)")
+    print("=" * 72)
+    for name, data in [("numeric", numeric_rows(rows)), ("log", log_rows(rows))]:
+        markup_add, markup_render = fill(data, markup=True)
+        raw_add, raw_render = fill(data, markup=False)
+        print(f"  {name} data")
+        print(f"    add_row, markup=True      {markup_add * 1000:10.1f} ms")
+        print(f"    add_row, markup=False     {raw_add * 1000:10.1f} ms")
+        print(f"    to_string, markup=True    {markup_render * 1000:10.1f} ms")
+        print(f"    to_string, markup=False   {raw_render * 1000:10.1f} ms")
+        print(f"    add_row speedup           {markup_add / raw_add:10.2f}x")
+    print()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark PyTable memory use at 10k, 100k and 1M cells.
+
+PyTable keeps all cell text in one arena with a 12-byte offset/width record
+per cell. The previous layout stored every cell as its own `String` plus a
+separate width vector per row; its footprint is estimated from the same cell
+text (24-byte String header, a glibc heap chunk per cell and per row vector,
+and an 8-byte width per cell). Peak RSS of a fresh process building the table
+is reported alongside.
+
+Usage:
+    uv run python scripts/bench_memory.py
+    uv run python scripts/bench_memory.py 1000 5000000
+"""
+
+import subprocess
+import sys
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+COLUMNS = 4
+
+_BUILD_SCRIPT = """
+import resource, sys
+from turboterm import PyTable
+
+cells = int(sys.argv[1])
+table = PyTable()
+for i in range(cells // 4):
+    table.add_row([str(i), f"user-{i % 997}", "[green]ok[/green]", f"{i * 1.5:.2f}"])
+usage = table.memory_usage()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss //= 1024
+print(usage["text"] + usage["cells"] + usage["rows"], rss)
+"""
+
+
+def _row(i: int) -> list[str]:
+    # Same cells as _BUILD_SCRIPT after markup: the lexer turns
+    # "[green]ok[/green]" into "\x1b[32mok\x1b[0m".
+    return [str(i), f"user-{i % 997}", "\x1b[32mok\x1b[0m", f"{i * 1.5:.2f}"]
+
+
+def _chunk(size: int) -> int:
+    """Bytes glibc malloc reserves for a `size`-byte allocation."""
+    return max(32, (size + 8 + 15) // 16 * 16)
+
+
+def legacy_bytes(cells: int) -> int:
+    """Estimated heap use of the old Vec<Vec<String>> + Vec<Vec<usize>>."""
+    total = 0
+    for i in range(cells // COLUMNS):
+        row = _row(i)
+        total += sum(_chunk(len(c.encode())) for c in row)
+        total += _chunk(24 * len(row)) + _chunk(8 * len(row))
+        total += 2 * 24  # outer Vec entries for the row and its widths
+    return total
+
+
+def _run(cells: int) -> tuple[int, int]:
+    r = subprocess.run(
+        [sys.executable, "-c", _BUILD_SCRIPT, str(cells)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    arena, rss = r.stdout.split()
+    return int(arena), int(rss)
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+
+    print("=" * 72)
+    print(f"PYTABLE CELL STORAGE ({COLUMNS} columns)")
+    print("=" * 72)
+    for cells in sizes:
+        arena, rss = _run(cells)
+        legacy = legacy_bytes(cells)
+        print(
+            f"  {cells:>10,} cells  arena {arena / 2**20:8.2f} MB"
+            f"  legacy ~{legacy / 2**20:8.2f} MB  ({legacy / arena:4.1f}x)"
+            f"  peak RSS {rss / 1024:8.1f} MB"
+        )
+    print()
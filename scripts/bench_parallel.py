@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark PyTable.to_string() across row counts and worker thread counts.
+
+Each measurement forces a full re-render by widening the first column, so
+no rows are copied from the previous render. A background Python thread
+counts loop iterations during the render to show that the GIL is released.
+
+Usage:
+    uv run python scripts/bench_parallel.py
+    uv run python scripts/bench_parallel.py 50000 500000
+"""
+
+import os
+import sys
+import threading
+import time
+
+from turboterm import PyTable
+
+DEFAULT_SIZES = [10_000, 100_000, 200_000, 1_000_000]
+THREADS = [1, 2, 4, 8]
+REPEAT = 3
+
+
+def build(rows: int) -> PyTable:
+    table = PyTable()
+    for i in range(rows):
+        table.add_row(
+            [str(i), f"user-{i % 997}", "[green]ok[/green]", f"{i * 1.5:.2f}"]
+        )
+    return table
+
+
+def bench(table: PyTable, threads: int) -> tuple[float, int]:
+    """Best render time over REPEAT runs, and background ticks during it."""
+    table.threads = threads
+    best = float("inf")
+    ticks = 0
+    for n in range(REPEAT):
+        # A new widest cell changes the layout, so every row is formatted.
+        table.set_cell(0, 0, "#" * (40 + n % 2))
+
+        counter = [0]
+        stop = threading.Event()
+
+        def spin(counter=counter, stop=stop) -> None:
+            while not stop.is_set():
+                counter[0] += 1
+
+        spinner = threading.Thread(target=spin)
+        spinner.start()
+        start = time.perf_counter()
+        table.to_string()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        spinner.join()
+
+        if elapsed < best:
+            best, ticks = elapsed, counter[0]
+    return best, ticks
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+
+    print("=" * 72)
+    print(f"PARALLEL TABLE RENDERING ({os.cpu_count()} CPUs, 4 columns)")
+    print("=" * 72)
+    for rows in sizes:
+        table = build(rows)
+        baseline = None
+        for threads in THREADS:
+            elapsed, ticks = bench(table, threads)
+            baseline = baseline or elapsed
+            print(
+                f"  {rows:>10,} rows  {threads} thread(s)  {elapsed * 1000:9.2f} ms"
+                f"  {baseline / elapsed:5.2f}x  background ticks {ticks:>10,}"
+            )
+        print()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark "top 50 by latency" over a large table.
+
+Compares sorting in Python before building a small PyTable against loading
+every row into PyTable and selecting natively with sort_by() + head() or
+top_k(), and against from_columns() over array buffers followed by top_k().
+
+Usage:
+    uv run python scripts/bench_query.py
+    uv run python scripts/bench_query.py 100000
+"""
+
+import array
+import random
+import sys
+import time
+
+from turboterm import PyTable
+
+DEFAULT_ROWS = 1_000_000
+TOP = 50
+
+
+def python_sort(rows: list[tuple[int, str, float]]) -> str:
+    table = PyTable()
+    table.add_row(["id", "user", "latency"])
+    # Sort by the displayed value so ties break the same way as in Rust.
+    top = sorted(rows, key=lambda r: float(f"{r[2]:.2f}"), reverse=True)[:TOP]
+    for i, user, latency in top:
+        table.add_row([str(i), user, f"{latency:.2f}"])
+    return table.to_string()
+
+
+def _load(rows: list[tuple[int, str, float]]) -> PyTable:
+    table = PyTable()
+    table.header_rows = 1
+    table.add_row(["id", "user", "latency"])
+    for i, user, latency in rows:
+        table.add_row([str(i), user, f"{latency:.2f}"])
+    return table
+
+
+def native_sort(rows: list[tuple[int, str, float]]) -> str:
+    table = _load(rows)
+    table.sort_by(2, key="number", reverse=True)
+    table.head(TOP)
+    return table.to_string()
+
+
+def native_top_k(rows: list[tuple[int, str, float]]) -> str:
+    table = _load(rows)
+    table.top_k(2, TOP)
+    return table.to_string()
+
+
+def columns_top_k(rows: list[tuple[int, str, float]]) -> str:
+    ids = array.array("q", (r[0] for r in rows))
+    users = [r[1] for r in rows]
+    latencies = array.array("d", (r[2] for r in rows))
+    table = PyTable.from_columns(
+        [ids, users, latencies],
+        formats=[None, None, ".2f"],
+        header=["id", "user", "latency"],
+    )
+    table.top_k(2, TOP)
+    return table.to_string()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    rng = random.Random(42)
+    rows = [(i, f"user-{i % 997}", rng.expovariate(0.01)) for i in range(n)]
+
+    print("=" * 72)
+    print(f"TOP {TOP} BY LATENCY ({n:,} rows)")
+    print("=" * 72)
+    results = []
+    for name, fn in [
+        ("sorted() in Python", python_sort),
+        ("sort_by() + head()", native_sort),
+        ("top_k()", native_top_k),
+        ("from_columns() + top_k()", columns_top_k),
+    ]:
+        start = time.perf_counter()
+        results.append(fn(rows))
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<26s} {elapsed * 1000:10.1f} ms")
+    assert len(set(results)) == 1, "strategies disagree"
+    print()
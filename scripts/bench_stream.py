@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark StreamTable throughput and peak memory on very large tables.
+
+Each run happens in a fresh subprocess that streams N generated rows to
+/dev/null, so the reported peak RSS belongs to that run alone. A PyTable run
+at the smallest size is included for comparison.
+
+Usage:
+    uv run python scripts/bench_stream.py
+    uv run python scripts/bench_stream.py 100000 1000000
+"""
+
+import subprocess
+import sys
+
+DEFAULT_SIZES = [1_000_000, 10_000_000]
+
+_STREAM_SCRIPT = """
+import os, resource, sys, time
+from turboterm import StreamTable
+
+n = int(sys.argv[1])
+start = time.perf_counter()
+with open(os.devnull, "w", encoding="utf-8") as out:
+    with StreamTable(out, sample=1000) as table:
+        for i in range(n):
+            table.write_row([str(i), f"user-{i % 997}", "[green]ok[/green]", str(i)])
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss //= 1024
+print(elapsed, rss)
+"""
+
+_PYTABLE_SCRIPT = """
+import resource, sys, time
+from turboterm import PyTable
+
+n = int(sys.argv[1])
+start = time.perf_counter()
+table = PyTable()
+for i in range(n):
+    table.add_row([str(i), f"user-{i % 997}", "[green]ok[/green]", str(i)])
+table.to_string()
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss //= 1024
+print(elapsed, rss)
+"""
+
+
+def _run(script: str, rows: int) -> tuple[float, int]:
+    """Run a benchmark script in a fresh subprocess; return (seconds, peak KB)."""
+    r = subprocess.run(
+        [sys.executable, "-c", script, str(rows)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, rss = r.stdout.split()
+    return float(elapsed), int(rss)
+
+
+def _report(name: str, rows: int, elapsed: float, rss: int) -> None:
+    print(
+        f"  {name:<12s} {rows:>12,} rows  {elapsed:8.2f}s"
+        f"  {rows / elapsed:>12,.0f} rows/s  peak RSS {rss / 1024:8.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+
+    print("=" * 72)
+    print("STREAMING TABLE (4 columns, written to /dev/null)")
+    print("=" * 72)
+    for rows in sizes:
+        _report("StreamTable", rows, *_run(_STREAM_SCRIPT, rows))
+    _report("PyTable", sizes[0], *_run(_PYTABLE_SCRIPT, sizes[0]))
+    print()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark Tree against a straightforward recursive Python tree printer.
+
+Usage:
+    uv run python scripts/bench_tree.py
+    uv run python scripts/bench_tree.py 500000
+"""
+
+import sys
+import time
+from collections import deque
+
+from turboterm import Tree
+
+DEFAULT_NODES = 100_000
+FANOUT = 8
+
+
+def build_data(nodes: int) -> dict:
+    """A nested dict with about `nodes` entries, FANOUT children per node."""
+    root: dict = {}
+    frontier = deque([root])
+    count = 0
+    while count < nodes:
+        parent = frontier.popleft()
+        for _ in range(FANOUT):
+            child: dict = {}
+            parent[f"package-{count}"] = child
+            frontier.append(child)
+            count += 1
+    return root
+
+
+def python_render(label: str, data: dict) -> str:
+    lines = [label]
+
+    def walk(node: dict, prefix: str) -> None:
+        items = list(node.items())
+        for i, (name, children) in enumerate(items):
+            last = i == len(items) - 1
+            lines.append(prefix + ("└── " if last else "├── ") + name)
+            walk(children, prefix + ("    " if last else "│   "))
+
+    walk(data, "")
+    return "\n".join(lines)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NODES
+    data = build_data(nodes)
+
+    print("=" * 72)
+    print(f"TREE RENDERING ({nodes:,} nodes, fan-out {FANOUT})")
+    print("=" * 72)
+
+    expected, python_time = timed(lambda: python_render("root", data))
+    print(f"  Python recursive printer      {python_time * 1000:10.1f} ms")
+
+    tree = Tree("root", markup=False)
+    _, build_time = timed(lambda: tree.extend(data))
+    text, render_time = timed(tree.to_string)
+    assert text == expected
+    print(f"  Tree.extend()                 {build_time * 1000:10.1f} ms")
+    print(f"  Tree.to_string()              {render_time * 1000:10.1f} ms")
+    speedup = python_time / (build_time + render_time)
+    print(f"  speedup (build + render)      {speedup:10.1f}x")
+
+    _, collapsed = timed(lambda: tree.to_string(max_depth=3, max_children=5))
+    print(f"  to_string(max_depth=3, max_children=5) {collapsed * 1000:7.3f} ms")
+    print()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark PyTable.render_range() against a full to_string() render.
+
+A pager showing 60 rows of a large table only needs those rows formatted;
+render_range() keeps the cost proportional to the viewport.
+
+Usage:
+    uv run python scripts/bench_viewport.py
+    uv run python scripts/bench_viewport.py 1000000
+"""
+
+import sys
+import time
+
+from turboterm import PyTable
+
+DEFAULT_ROWS = 200_000
+VIEWPORT = 60
+ITERATIONS = 200
+
+
+def build(rows: int) -> PyTable:
+    table = PyTable()
+    for i in range(rows):
+        table.add_row(
+            [str(i), f"user-{i % 997}", "[green]ok[/green]", f"{i * 1.5:.2f}"]
+        )
+    return table
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    table = build(rows)
+
+    print("=" * 72)
+    print(f"VIEWPORT RENDERING ({rows:,} rows, {VIEWPORT}-row window)")
+    print("=" * 72)
+
+    start = time.perf_counter()
+    table.to_string()
+    full = time.perf_counter() - start
+    print(f"  to_string() (first render)    {full * 1000:10.2f} ms")
+
+    middle = rows // 2
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        first = (middle + i * VIEWPORT) % max(rows - VIEWPORT, 1)
+        table.render_range(first, first + VIEWPORT)
+    window = (time.perf_counter() - start) / ITERATIONS
+    print(f"  render_range()                {window * 1000:10.3f} ms")
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        table.render_range(middle, middle + VIEWPORT, col_start=1, col_stop=3)
+    columns = (time.perf_counter() - start) / ITERATIONS
+    print(f"  render_range(), 2 columns     {columns * 1000:10.3f} ms")
+    print(f"  speedup vs full render        {full / window:10.0f}x")
+    print()
@@ -0,0 +1,231 @@
+//! Border styles for tables.
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+
+/// The pieces of one horizontal rule.
+#[derive(Clone, Copy)]
+pub struct Rule {
+    left: &'static str,
+    fill: char,
+    mid: &'static str,
+    right: &'static str,
+}
+
+const fn rule(
+    left: &'static str,
+    fill: char,
+    mid: &'static str,
+    right: &'static str,
+) -> Option<Rule> {
+    Some(Rule {
+        left,
+        fill,
+        mid,
+        right,
+    })
+}
+
+/// A border preset. Row lines are `left`, then each cell padded by `pad`
+/// spaces on both sides and joined by `mid`, then `right`; every rule has
+/// the same visible width as a row line.
+pub struct BoxStyle {
+    pub name: &'static str,
+    top: Option<Rule>,
+    /// Below the header rows.
+    header: Option<Rule>,
+    /// Between body rows.
+    row: Option<Rule>,
+    /// Above the footer.
+    footer: Option<Rule>,
+    bottom: Option<Rule>,
+    pub left: &'static str,
+    pub mid: &'static str,
+    pub right: &'static str,
+    pub pad: usize,
+    /// The first row is always a header (Markdown needs the rule under it).
+    pub header_required: bool,
+}
+
+pub const SQUARE: BoxStyle = BoxStyle {
+    name: "square",
+    top: rule("┌", '─', "┬", "┐"),
+    header: rule("├", '╌', "┼", "┤"),
+    row: rule("├", '╌', "┼", "┤"),
+    footer: rule("├", '─', "┼", "┤"),
+    bottom: rule("└", '─', "┴", "┘"),
+    left: "│",
+    mid: "┆",
+    right: "│",
+    pad: 1,
+    header_required: false,
+};
+
+const STYLES: [BoxStyle; 7] = [
+    SQUARE,
+    BoxStyle {
+        name: "rounded",
+        top: rule("╭", '─', "┬", "╮"),
+        bottom: rule("╰", '─', "┴", "╯"),
+        ..SQUARE
+    },
+    BoxStyle {
+        name: "heavy",
+        top: rule("┏", '━', "┳", "┓"),
+        header: rule("┣", '╍', "╋", "┫"),
+        row: rule("┣", '╍', "╋", "┫"),
+        footer: rule("┣", '━', "╋", "┫"),
+        bottom: rule("┗", '━', "┻", "┛"),
+        left: "┃",
+        mid: "┇",
+        right: "┃",
+        ..SQUARE
+    },
+    BoxStyle {
+        name: "ascii",
+        top: rule("+", '-', "+", "+"),
+        header: rule("+", '=', "+", "+"),
+        row: rule("+", '-', "+", "+"),
+        footer: rule("+", '=', "+", "+"),
+        bottom: rule("+", '-', "+", "+"),
+        left: "|",
+        mid: "|",
+        right: "|",
+        ..SQUARE
+    },
+    BoxStyle {
+        name: "minimal",
+        top: None,
+        header: rule("", '─', "┼", ""),
+        row: None,
+        footer: rule("", '─', "┼", ""),
+        bottom: None,
+        left: "",
+        mid: "│",
+        right: "",
+        ..SQUARE
+    },
+    BoxStyle {
+        name: "markdown",
+        top: None,
+        header: rule("|", '-', "|", "|"),
+        row: None,
+        footer: None,
+        bottom: None,
+        left: "|",
+        mid: "|",
+        right: "|",
+        pad: 1,
+        header_required: true,
+    },
+    BoxStyle {
+        name: "borderless",
+        top: None,
+        header: None,
+        row: None,
+        footer: None,
+        bottom: None,
+        left: "",
+        mid: "  ",
+        right: "",
+        pad: 0,
+        ..SQUARE
+    },
+];
+
+impl BoxStyle {
+    pub fn find(name: &str) -> PyResult<&'static BoxStyle> {
+        STYLES.iter().find(|s| s.name == name).ok_or_else(|| {
+            let names: Vec<&str> = STYLES.iter().map(|s| s.name).collect();
+            PyValueError::new_err(format!(
+                "unknown border '{}', expected one of: {}",
+                name,
+                names.join(", ")
+            ))
+        })
+    }
+
+    /// Columns taken by borders and padding on every line of a table with
+    /// `cols` columns.
+    pub fn frame_width(&self, cols: usize) -> usize {
+        let width = |s: &str| s.chars().count();
+        width(self.left)
+            + width(self.right)
+            + cols * 2 * self.pad
+            + cols.saturating_sub(1) * width(self.mid)
+    }
+
+    /// Rows of a table with `header_rows` header rows that the header rule
+    /// goes below, or 0 for none.
+    pub fn header_after(&self, header_rows: usize) -> usize {
+        if self.header_required {
+            header_rows.max(1)
+        } else {
+            header_rows
+        }
+    }
+
+    /// Draw every rule of this style for the given column widths.
+    pub fn borders(&self, widths: &[usize]) -> Borders {
+        let longest = widths.iter().max().map_or(0, |w| w + 2 * self.pad);
+        let draw = |rule: Option<Rule>, newline: bool| {
+            let rule = rule?;
+            let run = rule.fill.to_string().repeat(longest);
+            let fill_len = rule.fill.len_utf8();
+            let mut line = String::with_capacity(run.len() * widths.len() + 16);
+            line.push_str(rule.left);
+            for (i, &w) in widths.iter().enumerate() {
+                if i > 0 {
+                    line.push_str(rule.mid);
+                }
+                line.push_str(&run[..(w + 2 * self.pad) * fill_len]);
+            }
+            line.push_str(rule.right);
+            if newline {
+                line.push('\n');
+            }
+            Some(line)
+        };
+        Borders {
+            top: draw(self.top, true),
+            header: draw(self.header, true),
+            row: draw(self.row, true),
+            footer: draw(self.footer, true),
+            bottom: draw(self.bottom, false),
+        }
+    }
+
+    /// What a table with no columns renders as.
+    pub fn empty(&self) -> String {
+        match (self.top, self.bottom) {
+            (Some(top), Some(bottom)) => {
+                format!("{}{}\n{}{}", top.left, top.right, bottom.left, bottom.right)
+            }
+            _ => String::new(),
+        }
+    }
+}
+
+/// The rules of one style drawn for one set of column widths, built once
+/// per render. All but `bottom` end with a newline.
+pub struct Borders {
+    pub top: Option<String>,
+    pub header: Option<String>,
+    pub row: Option<String>,
+    pub footer: Option<String>,
+    pub bottom: Option<String>,
+}
+
+impl Borders {
+    /// The rule to draw after row `r` of a table with `row_count` rows,
+    /// whose header ends after `header_after` rows.
+    pub fn after_row(&self, r: usize, row_count: usize, header_after: usize) -> Option<&str> {
+        if r + 1 >= row_count {
+            None
+        } else if r + 1 == header_after {
+            self.header.as_deref()
+        } else {
+            self.row.as_deref()
+        }
+    }
+}
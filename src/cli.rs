@@ -1,8 +1,11 @@
-use clap::{Arg, ArgAction, Command};
-use pyo3::exceptions::PyValueError;
+use clap::builder::{BoolishValueParser, PossibleValuesParser, ValueParser};
+use clap::{value_parser, Arg, ArgAction, ArgMatches, Command};
+use pyo3::exceptions::{PyKeyError, PyValueError};
 use pyo3::prelude::*;
-use pyo3::types::PyDict;
+use pyo3::types::{PyBool, PyDict, PyFloat, PyInt, PyList, PyString};
+use pyo3::IntoPyObjectExt;
 use std::collections::HashMap;
+use std::sync::{Arc, Mutex, OnceLock};
 
 // --- Internal CLI parameter representation ---
 
@@ -16,158 +19,463 @@ struct CliParam {
     name: String,
     kind: ParamKind,
     help: String,
-    type_annotation: Option<Py<PyAny>>,
+    conv: Conv,
+    /// Takes any number of values, for a `list[T]` annotation.
+    multiple: bool,
+    /// Counts how often the flag is given, as in `-vvv`.
+    count: bool,
     default_value: Option<Py<PyAny>>,
     is_bool_flag: bool,
     required: bool,
+    /// Called with the word being completed to suggest values.
+    completer: Option<Handler>,
+}
+
+impl CliParam {
+    /// Whether this is an option that takes a value.
+    fn takes_value(&self) -> bool {
+        matches!(self.kind, ParamKind::Option { .. }) && !self.is_bool_flag && !self.count
+    }
+
+    fn flags(&self) -> &[String] {
+        match &self.kind {
+            ParamKind::Option { flag_names } => flag_names,
+            ParamKind::Positional => &[],
+        }
+    }
+}
+
+/// How a parameter's text becomes a Python value, resolved from its
+/// annotation when the command is registered. clap parses and validates
+/// the native kinds, so a bad value is a usage error before Python runs.
+enum Conv {
+    Str,
+    Int {
+        min: Option<i64>,
+        max: Option<i64>,
+    },
+    Float {
+        min: Option<f64>,
+        max: Option<f64>,
+    },
+    /// `true`/`false`, `yes`/`no`, `on`/`off` or `1`/`0`.
+    Bool,
+    /// Enum members, given by name, or `Literal` values, given by their
+    /// string form.
+    Choice(Vec<(String, Py<PyAny>)>),
+    /// Any other annotation, such as `Path`, called with the text.
+    Call(Py<PyAny>),
+}
+
+impl Conv {
+    /// The conversion for parameter `name`'s annotation `ann`, and whether it
+    /// takes a list of values, as `list[T]` does.
+    fn resolve(
+        py: Python<'_>,
+        name: &str,
+        ann: Option<&Bound<'_, PyAny>>,
+    ) -> PyResult<(Conv, bool)> {
+        let Some(ann) = ann else {
+            return Ok((Conv::Str, false));
+        };
+        let is = |ty: &Bound<'_, PyAny>| ann.as_ptr() == ty.as_ptr();
+        let list_type = py.get_type::<PyList>().into_any();
+        if is(py.get_type::<PyString>().as_any()) {
+            return Ok((Conv::Str, false));
+        } else if is(py.get_type::<PyInt>().as_any()) {
+            return Ok((
+                Conv::Int {
+                    min: None,
+                    max: None,
+                },
+                false,
+            ));
+        } else if is(py.get_type::<PyFloat>().as_any()) {
+            return Ok((
+                Conv::Float {
+                    min: None,
+                    max: None,
+                },
+                false,
+            ));
+        } else if is(py.get_type::<PyBool>().as_any()) {
+            return Ok((Conv::Bool, false));
+        } else if is(&list_type) {
+            return Ok((Conv::Str, true));
+        }
+
+        let typing = py.import("typing")?;
+        let origin = typing.getattr("get_origin")?.call1((ann,))?;
+        let args: Vec<Bound<'_, PyAny>> = typing.getattr("get_args")?.call1((ann,))?.extract()?;
+        let origin_is = |ty: &Bound<'_, PyAny>| origin.as_ptr() == ty.as_ptr();
+        if origin_is(&list_type) {
+            return match Conv::resolve(py, name, args.first())? {
+                (_, true) => Err(PyValueError::new_err(format!(
+                    "parameter '{}': nested lists are not supported",
+                    name
+                ))),
+                (conv, false) => Ok((conv, true)),
+            };
+        }
+        if origin_is(&typing.getattr("Literal")?) {
+            let choices = args.into_iter().map(|value| Ok((value.clone(), value)));
+            return Ok((Conv::choices(choices)?, false));
+        }
+        if origin_is(&typing.getattr("Union")?)
+            || origin_is(&py.import("types")?.getattr("UnionType")?)
+        {
+            // `T | None` converts like `T`.
+            let none_type = py.None().into_bound(py).get_type().into_any();
+            let mut types = args.iter().filter(|arg| arg.as_ptr() != none_type.as_ptr());
+            if let (Some(ty), None) = (types.next(), types.next()) {
+                return Conv::resolve(py, name, Some(ty));
+            }
+        }
+        if ann.is_instance(&py.import("enum")?.getattr("EnumMeta")?)? {
+            let members = ann.try_iter()?.map(|member| {
+                let member = member?;
+                Ok((member.getattr("name")?, member))
+            });
+            return Ok((Conv::choices(members)?, false));
+        }
+        Ok((Conv::Call(ann.clone().unbind()), false))
+    }
+
+    /// Choices keyed by the string form of each `(key, value)` pair's key.
+    fn choices<'py>(
+        pairs: impl Iterator<Item = PyResult<(Bound<'py, PyAny>, Bound<'py, PyAny>)>>,
+    ) -> PyResult<Conv> {
+        let mut choices = Vec::new();
+        for pair in pairs {
+            let (key, value) = pair?;
+            choices.push((key.str()?.to_str()?.to_string(), value.unbind()));
+        }
+        Ok(Conv::Choice(choices))
+    }
+
+    /// Limit a numeric conversion to `min..=max`.
+    fn bounded(
+        self,
+        name: &str,
+        min: Option<Bound<'_, PyAny>>,
+        max: Option<Bound<'_, PyAny>>,
+    ) -> PyResult<Conv> {
+        if min.is_none() && max.is_none() {
+            return Ok(self);
+        }
+        match self {
+            Conv::Int { .. } => Ok(Conv::Int {
+                min: min.map(|v| v.extract()).transpose()?,
+                max: max.map(|v| v.extract()).transpose()?,
+            }),
+            Conv::Float { .. } => Ok(Conv::Float {
+                min: min.map(|v| v.extract()).transpose()?,
+                max: max.map(|v| v.extract()).transpose()?,
+            }),
+            _ => Err(PyValueError::new_err(format!(
+                "parameter '{}': min and max need an int or float type",
+                name
+            ))),
+        }
+    }
+
+    fn value_parser(&self) -> ValueParser {
+        match self {
+            Conv::Str | Conv::Call(_) => ValueParser::string(),
+            Conv::Int {
+                min: None,
+                max: None,
+            } => ValueParser::new(parse_int),
+            Conv::Int { min, max } => value_parser!(i64).range((limit(*min), limit(*max))).into(),
+            Conv::Float { min, max } => {
+                let (min, max) = (*min, *max);
+                ValueParser::new(move |text: &str| parse_float(text, min, max))
+            }
+            Conv::Bool => ValueParser::new(BoolishValueParser::new()),
+            Conv::Choice(choices) => ValueParser::new(PossibleValuesParser::new(
+                choices.iter().map(|(name, _)| name.clone()),
+            )),
+        }
+    }
+
+    /// The value or values clap parsed for `id`, or `None` if none were given.
+    fn values<'py>(
+        &self,
+        py: Python<'py>,
+        matches: &ArgMatches,
+        id: &str,
+        multiple: bool,
+    ) -> PyResult<Option<Bound<'py, PyAny>>> {
+        match self {
+            Conv::Int {
+                min: None,
+                max: None,
+            } => {
+                let int = py.get_type::<PyInt>();
+                collect(py, matches, id, multiple, |v: &String| {
+                    int.call1((v.as_str(),))
+                })
+            }
+            Conv::Int { .. } => {
+                collect(py, matches, id, multiple, |v: &i64| v.into_bound_py_any(py))
+            }
+            Conv::Float { .. } => {
+                collect(py, matches, id, multiple, |v: &f64| v.into_bound_py_any(py))
+            }
+            Conv::Bool => collect(py, matches, id, multiple, |v: &bool| {
+                v.into_bound_py_any(py)
+            }),
+            Conv::Str => collect(py, matches, id, multiple, |v: &String| {
+                v.into_bound_py_any(py)
+            }),
+            Conv::Choice(choices) => collect(py, matches, id, multiple, |v: &String| {
+                let (_, value) = choices
+                    .iter()
+                    .find(|(name, _)| name == v)
+                    .expect("validated by clap");
+                Ok(value.bind(py).clone())
+            }),
+            Conv::Call(func) => collect(py, matches, id, multiple, |v: &String| {
+                func.bind(py).call1((v.as_str(),))
+            }),
+        }
+    }
+}
+
+fn limit<T>(value: Option<T>) -> std::ops::Bound<T> {
+    value.map_or(std::ops::Bound::Unbounded, std::ops::Bound::Included)
+}
+
+/// Check that `text` is an integer, of any size, for Python's `int()` to
+/// convert. Bounded ints are parsed as `i64` by clap instead.
+fn parse_int(text: &str) -> Result<String, String> {
+    let text = text.trim();
+    let digits = text.strip_prefix(['+', '-']).unwrap_or(text);
+    if digits.is_empty() {
+        return Err("cannot parse integer from empty string".to_string());
+    }
+    // Python allows single underscores between digits, as in `1_000`.
+    let valid = digits
+        .split('_')
+        .all(|group| !group.is_empty() && group.bytes().all(|b| b.is_ascii_digit()));
+    if !valid {
+        return Err("invalid digit found in string".to_string());
+    }
+    Ok(text.to_string())
+}
+
+fn parse_float(text: &str, min: Option<f64>, max: Option<f64>) -> Result<f64, String> {
+    let value: f64 = text.trim().parse().map_err(|e| format!("{}", e))?;
+    if min.is_some_and(|min| value < min) || max.is_some_and(|max| value > max) {
+        let min = min.map_or(String::new(), |min| min.to_string());
+        let max = max.map_or(String::new(), |max| format!("={}", max));
+        return Err(format!("{} is not in {}..{}", value, min, max));
+    }
+    Ok(value)
+}
+
+/// Convert the values clap parsed for `id`: a list when `multiple`, else
+/// the single value.
+fn collect<'py, T: Clone + Send + Sync + 'static>(
+    py: Python<'py>,
+    matches: &ArgMatches,
+    id: &str,
+    multiple: bool,
+    convert: impl Fn(&T) -> PyResult<Bound<'py, PyAny>>,
+) -> PyResult<Option<Bound<'py, PyAny>>> {
+    let Some(mut values) = matches.get_many::<T>(id) else {
+        return Ok(None);
+    };
+    if multiple {
+        let items = values.map(convert).collect::<PyResult<Vec<_>>>()?;
+        Ok(Some(PyList::new(py, items)?.into_any()))
+    } else {
+        values.next().map(convert).transpose()
+    }
+}
+
+/// A Python function, held directly or by import path. Commands call one
+/// when dispatched, and value completers when completing.
+enum Handler {
+    Func(Py<PyAny>),
+    /// A `"pkg.module:func"` path, imported on first use.
+    Lazy {
+        target: String,
+        func: OnceLock<Py<PyAny>>,
+    },
+}
+
+impl Handler {
+    fn lazy(target: String) -> PyResult<Self> {
+        match target.split_once(':') {
+            Some((module, attr)) if !module.is_empty() && !attr.is_empty() => Ok(Handler::Lazy {
+                target,
+                func: OnceLock::new(),
+            }),
+            _ => Err(PyValueError::new_err(format!(
+                "invalid command target '{}', expected 'module:function'",
+                target
+            ))),
+        }
+    }
+
+    /// The function to call, importing it first for a lazy command.
+    fn func<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyAny>> {
+        let (target, func) = match self {
+            Handler::Func(func) => return Ok(func.bind(py).clone()),
+            Handler::Lazy { target, func } => (target, func),
+        };
+        if let Some(func) = func.get() {
+            return Ok(func.bind(py).clone());
+        }
+        let (module, attr) = target.split_once(':').unwrap_or_default();
+        let mut obj = py.import(module)?.into_any();
+        for name in attr.split('.') {
+            obj = obj.getattr(name)?;
+        }
+        // Another thread may have imported it meanwhile; either is fine.
+        let _ = func.set(obj.clone().unbind());
+        Ok(obj)
+    }
 }
 
-#[allow(dead_code)]
 struct PyCliCommand {
     name: String,
-    func: Py<PyAny>,
+    handler: Handler,
     doc: Option<String>,
     params: Vec<CliParam>,
+    parser: OnceLock<Command>,
 }
 
-static CLI_COMMAND_REGISTRY: std::sync::LazyLock<std::sync::Mutex<HashMap<String, PyCliCommand>>> =
-    std::sync::LazyLock::new(|| std::sync::Mutex::new(HashMap::new()));
+/// The commands registered with one registry. Parsing and dispatch work on
+/// a shared snapshot of them, so registering a command copies the map only
+/// while another thread is still using the previous snapshot.
+#[derive(Clone, Default)]
+struct Commands {
+    commands: HashMap<String, Arc<PyCliCommand>>,
+    /// Compiled from `commands` on first use and dropped when they change.
+    root: OnceLock<Command>,
+}
 
-/// Register a command with pre-processed parameter metadata.
-/// Called from the Python `@command()` decorator which handles signature inspection.
-#[pyfunction]
-#[pyo3(signature = (name, func, doc=None, params=vec![]))]
-pub fn register_command(
-    _py: Python,
-    name: String,
-    func: Py<PyAny>,
-    doc: Option<String>,
-    params: Vec<Bound<'_, PyDict>>,
-) -> PyResult<()> {
-    let mut cli_params = Vec::new();
-
-    for param_dict in params {
-        let param_name: String = param_dict
-            .get_item("name")?
-            .ok_or_else(|| PyValueError::new_err("param missing 'name'"))?
-            .extract()?;
-        let kind_str: String = param_dict
-            .get_item("kind")?
-            .ok_or_else(|| PyValueError::new_err("param missing 'kind'"))?
-            .extract()?;
-        let help: String = param_dict
-            .get_item("help")?
-            .map(|v| v.extract().unwrap_or_default())
-            .unwrap_or_default();
-        let required: bool = param_dict
-            .get_item("required")?
-            .map(|v| v.extract().unwrap_or(true))
-            .unwrap_or(true);
-
-        let type_ann = param_dict
-            .get_item("type")?
-            .filter(|v| !v.is_none())
-            .map(|v| v.unbind());
-
-        let default_val = param_dict.get_item("default")?.map(|v| v.unbind());
-
-        let kind = if kind_str == "option" {
-            let flags: Vec<String> = param_dict
-                .get_item("flags")?
-                .ok_or_else(|| PyValueError::new_err("option param missing 'flags'"))?
-                .extract()?;
-            ParamKind::Option { flag_names: flags }
-        } else {
-            ParamKind::Positional
+/// One parameter as passed from Python: `(name, flags, help, type, required,
+/// default, complete, count, bounds)`. `flags` is `None` for a positional
+/// argument, `default` is ignored for a required parameter, and `bounds` is
+/// `None` or a `(min, max)` pair for a number.
+type ParamSpec<'py> = (
+    String,
+    Option<Vec<String>>,
+    String,
+    Option<Bound<'py, PyAny>>,
+    bool,
+    Bound<'py, PyAny>,
+    Option<Bound<'py, PyAny>>,
+    bool,
+    Option<(Option<Bound<'py, PyAny>>, Option<Bound<'py, PyAny>>)>,
+);
+
+fn read_params<'py>(py: Python<'py>, params: Vec<ParamSpec<'py>>) -> PyResult<Vec<CliParam>> {
+    let mut cli_params: Vec<CliParam> = Vec::with_capacity(params.len());
+
+    for (name, flags, help, type_ann, required, default, complete, count, bounds) in params {
+        let (mut conv, multiple) = Conv::resolve(py, &name, type_ann.as_ref())?;
+        if let Some((min, max)) = bounds {
+            conv = conv.bounded(&name, min, max)?;
+        }
+        // An option annotated `bool` is a flag that takes no value.
+        let is_bool = flags.is_some() && !multiple && matches!(conv, Conv::Bool);
+        let kind = match flags {
+            Some(flag_names) => ParamKind::Option { flag_names },
+            None => ParamKind::Positional,
         };
 
-        let is_bool = if kind_str == "option" {
-            param_dict
-                .get_item("is_bool")?
-                .map(|v| v.extract().unwrap_or(false))
-                .unwrap_or(false)
-        } else {
-            false
+        let completer = match complete {
+            Some(v) => match v.extract::<String>() {
+                Ok(target) => Some(Handler::lazy(target)?),
+                Err(_) => Some(Handler::Func(v.unbind())),
+            },
+            None => None,
         };
 
         cli_params.push(CliParam {
-            name: param_name,
+            name,
             kind,
             help,
-            type_annotation: type_ann,
-            default_value: default_val,
+            conv,
+            multiple,
+            count,
+            default_value: (!required).then(|| default.unbind()),
             is_bool_flag: is_bool,
             required,
+            completer,
         });
     }
 
-    let command = PyCliCommand {
-        name: name.clone(),
-        func,
-        doc,
-        params: cli_params,
-    };
-
-    let mut registry = CLI_COMMAND_REGISTRY.lock().unwrap();
-    registry.insert(name, command);
-    Ok(())
-}
-
-/// Convert a string CLI value to a Python object using the type annotation as constructor.
-fn convert_value(
-    py: Python,
-    val: &str,
-    type_annotation: &Option<Py<PyAny>>,
-) -> PyResult<Py<PyAny>> {
-    if let Some(ty) = type_annotation {
-        // Call the Python type: int("42"), float("3.14"), str("hello"), etc.
-        ty.call1(py, (val,))
-    } else {
-        // No annotation — pass as string
-        Ok(val.into_pyobject(py).unwrap().into_any().unbind())
+    // clap only lets the last positional argument take several values.
+    let mut positionals = cli_params
+        .iter()
+        .filter(|p| matches!(p.kind, ParamKind::Positional));
+    positionals.next_back();
+    if let Some(param) = positionals.find(|p| p.multiple) {
+        return Err(PyValueError::new_err(format!(
+            "parameter '{}': only the last positional argument can take a list",
+            param.name
+        )));
     }
-}
 
-/// Snapshot of CliParam data needed for clap (no Py<PyAny> fields, all owned).
-struct ClapParamInfo {
-    name: String,
-    kind: ParamKind,
-    help: String,
-    is_bool_flag: bool,
-    required: bool,
+    Ok(cli_params)
 }
 
-struct ClapCommandInfo {
-    name: String,
-    doc: Option<String>,
-    params: Vec<ClapParamInfo>,
-}
+/// Program name shown in usage and help.
+const BIN_NAME: &str = "app";
+
+impl PyCliCommand {
+    fn new(name: String, handler: Handler, doc: Option<String>, params: Vec<CliParam>) -> Self {
+        PyCliCommand {
+            name,
+            handler,
+            doc,
+            params,
+            parser: OnceLock::new(),
+        }
+    }
 
-fn build_clap_app(commands: &[ClapCommandInfo]) -> Command {
-    let mut app = Command::new("app".to_string())
-        .subcommand_required(true)
-        .arg_required_else_help(true);
+    /// The parser for this command alone, built on first use. It carries no
+    /// help text, so parsing never styles any.
+    fn parser(&self) -> &Command {
+        self.parser.get_or_init(|| {
+            let mut parser = self.build(false);
+            parser.build();
+            parser
+        })
+    }
 
-    for cmd in commands {
-        let mut subcmd = Command::new(cmd.name.clone());
-        if let Some(ref doc) = cmd.doc {
-            subcmd = subcmd.about(crate::lexer::apply_styles(doc));
+    /// Build the clap command, with the doc and parameter help styled when
+    /// `help` is set.
+    fn build(&self, help: bool) -> Command {
+        let styled = |text: &str| crate::lexer::apply_styles(text);
+        let mut subcmd =
+            Command::new(self.name.clone()).bin_name(format!("{} {}", BIN_NAME, self.name));
+        if help {
+            if let Some(ref doc) = self.doc {
+                subcmd = subcmd.about(styled(doc));
+            }
         }
 
-        for param in &cmd.params {
+        for param in &self.params {
+            let mut arg = Arg::new(param.name.clone());
+            if help && !param.help.is_empty() {
+                arg = arg.help(styled(&param.help));
+            }
             match &param.kind {
                 ParamKind::Positional => {
-                    let mut arg = Arg::new(param.name.clone()).required(param.required);
-                    if !param.help.is_empty() {
-                        arg = arg.help(crate::lexer::apply_styles(&param.help));
+                    arg = arg
+                        .required(param.required)
+                        .value_parser(param.conv.value_parser());
+                    if param.multiple {
+                        arg = arg.num_args(1..);
                     }
-                    subcmd = subcmd.arg(arg);
                 }
                 ParamKind::Option { flag_names } => {
-                    let mut arg = Arg::new(param.name.clone());
-                    if !param.help.is_empty() {
-                        arg = arg.help(crate::lexer::apply_styles(&param.help));
-                    }
                     for flag in flag_names {
                         if let Some(long_name) = flag.strip_prefix("--") {
                             arg = arg.long(long_name.to_string());
@@ -177,101 +485,369 @@ fn build_clap_app(commands: &[ClapCommandInfo]) -> Command {
                     }
                     if param.is_bool_flag {
                         arg = arg.action(ArgAction::SetTrue);
+                    } else if param.count {
+                        arg = arg.action(ArgAction::Count);
                     } else {
-                        arg = arg.required(param.required);
+                        arg = arg
+                            .required(param.required)
+                            .value_parser(param.conv.value_parser());
+                        if param.multiple {
+                            arg = arg.action(ArgAction::Append);
+                        }
                     }
-                    subcmd = subcmd.arg(arg);
                 }
             }
+            subcmd = subcmd.arg(arg);
         }
 
+        subcmd
+    }
+}
+
+/// The top-level command, listing every command with its styled doc. It is
+/// only needed for top-level help and errors.
+fn build_root(commands: &HashMap<String, Arc<PyCliCommand>>) -> Command {
+    let mut app = Command::new(BIN_NAME)
+        .subcommand_required(true)
+        .arg_required_else_help(true);
+
+    for cmd in commands.values() {
+        let mut subcmd = Command::new(cmd.name.clone());
+        if let Some(ref doc) = cmd.doc {
+            subcmd = subcmd.about(crate::lexer::apply_styles(doc));
+        }
         app = app.subcommand(subcmd);
     }
 
     app
 }
 
-#[pyfunction]
-pub fn run_cli(py: Python, args: Vec<String>) -> PyResult<()> {
-    // Phase 1: Snapshot clap-relevant data from registry (owned strings only)
-    let clap_commands: Vec<ClapCommandInfo> = {
-        let registry = CLI_COMMAND_REGISTRY.lock().unwrap();
-        registry
-            .iter()
-            .map(|(name, cmd)| ClapCommandInfo {
-                name: name.clone(),
-                doc: cmd.doc.clone(),
-                params: cmd
-                    .params
-                    .iter()
-                    .map(|p| ClapParamInfo {
-                        name: p.name.clone(),
-                        kind: p.kind.clone(),
-                        help: p.help.clone(),
-                        is_bool_flag: p.is_bool_flag,
-                        required: p.required,
-                    })
-                    .collect(),
-            })
-            .collect()
-    }; // registry lock dropped here
-
-    // Phase 2: Build clap command from owned data and parse
-    let app = build_clap_app(&clap_commands);
-
-    let full_args: Vec<&str> = std::iter::once("app")
-        .chain(args.iter().map(|s| s.as_str()))
-        .collect();
-
-    let matches = match app.try_get_matches_from(full_args) {
-        Ok(m) => m,
-        Err(e) => match e.kind() {
-            clap::error::ErrorKind::DisplayHelp | clap::error::ErrorKind::DisplayVersion => {
-                print!("{}", e);
-                return Ok(());
+/// The outcome of parsing a command line.
+enum Parsed {
+    Command(Arc<PyCliCommand>, ArgMatches),
+    /// Help was requested; the text still has to be printed.
+    Help(String),
+}
+
+/// The help text made by `help` if `e` asks for help, or `e` as a
+/// `ValueError`.
+fn show_help(e: clap::Error, help: impl FnOnce(&clap::Error) -> String) -> PyResult<Parsed> {
+    match e.kind() {
+        clap::error::ErrorKind::DisplayHelp | clap::error::ErrorKind::DisplayVersion => {
+            Ok(Parsed::Help(help(&e)))
+        }
+        _ => Err(PyValueError::new_err(e.to_string())),
+    }
+}
+
+impl Commands {
+    fn insert(&mut self, command: PyCliCommand) {
+        self.commands
+            .insert(command.name.clone(), Arc::new(command));
+        self.root = OnceLock::new();
+    }
+
+    /// Parse `args`, returning the selected command and its matches, or the
+    /// help text when help was requested.
+    ///
+    /// A command line that starts with a command name is parsed by that
+    /// command's own parser, so only its metadata is touched; help text is
+    /// styled only when help for it is printed. Anything else goes to the
+    /// top-level parser, which reports help and errors. Nothing here calls
+    /// into Python, so it runs without the GIL.
+    fn parse(&self, args: &[String]) -> PyResult<Parsed> {
+        let mut args = args;
+        let help_for;
+        let mut found = args.first().and_then(|name| self.commands.get(name));
+        // `app help <command>` is `app <command> --help`.
+        if found.is_none() && args.len() == 2 && args[0] == "help" {
+            found = self.commands.get(&args[1]);
+            if found.is_some() {
+                help_for = [args[1].clone(), "--help".to_string()];
+                args = &help_for;
             }
-            _ => return Err(PyValueError::new_err(e.to_string())),
-        },
-    };
+        }
 
-    let (subcmd_name, subcmd_matches) = matches
-        .subcommand()
-        .ok_or_else(|| PyValueError::new_err("No subcommand provided"))?;
+        if let Some(cmd) = found {
+            let argv = std::iter::once(BIN_NAME).chain(args[1..].iter().map(|s| s.as_str()));
+            return match cmd.parser().clone().try_get_matches_from(argv) {
+                Ok(matches) => Ok(Parsed::Command(cmd.clone(), matches)),
+                Err(e) => show_help(e, |_| cmd.build(true).render_help().to_string()),
+            };
+        }
 
-    // Phase 3: Re-lock registry for dispatch
-    let registry = CLI_COMMAND_REGISTRY.lock().unwrap();
-    let cmd = registry
-        .get(subcmd_name)
-        .ok_or_else(|| PyValueError::new_err(format!("Unknown command: {}", subcmd_name)))?;
+        let argv = std::iter::once(BIN_NAME).chain(args.iter().map(|s| s.as_str()));
+        let root = self.root.get_or_init(|| {
+            let mut root = build_root(&self.commands);
+            root.build();
+            root
+        });
+        let matches = match root.clone().try_get_matches_from(argv) {
+            Ok(matches) => matches,
+            Err(e) => return show_help(e, |e| e.to_string()),
+        };
+        let name = matches.subcommand_name().unwrap_or_default();
+        Err(PyValueError::new_err(format!("Unknown command: {}", name)))
+    }
+
+    /// Candidates for `current`, the word being completed after `args`.
+    ///
+    /// Command names are completed first, then a command's flags when `current`
+    /// starts with `-`, then values: the completer of the option named by the
+    /// previous word or of the positional argument at this position is called
+    /// with `current`, and only the candidates starting with it are kept. An
+    /// empty result lets the shell fall back to its own completion (files).
+    fn complete(&self, py: Python, args: &[String], current: &str) -> PyResult<Vec<String>> {
+        let cmd = {
+            let name = match args {
+                [] => None,
+                [help] if help == "help" => None,
+                [name, ..] => Some(name),
+            };
+            match name {
+                Some(name) => self.commands.get(name).cloned(),
+                None if current.starts_with('-') => return Ok(filter(["--help"], current)),
+                None => {
+                    let mut names: Vec<&str> = self.commands.keys().map(|s| s.as_str()).collect();
+                    if args.is_empty() {
+                        names.push("help");
+                    }
+                    names.sort_unstable();
+                    return Ok(filter(names, current));
+                }
+            }
+        };
+        let Some(cmd) = cmd else {
+            return Ok(Vec::new());
+        };
+
+        let rest = &args[1..];
+        let after_dashes = rest.iter().any(|a| a == "--");
+        if current.starts_with('-') && !after_dashes {
+            let flags = cmd.params.iter().flat_map(|p| p.flags());
+            let flags = flags.map(|f| f.as_str()).chain(["--help"]);
+            return Ok(filter(flags, current));
+        }
+
+        // The option whose value is being completed, or else the positional
+        // argument at this position.
+        let by_flag = |word: &str| {
+            cmd.params
+                .iter()
+                .find(|p| p.takes_value() && p.flags().iter().any(|f| f == word))
+        };
+        let prev = rest.last().filter(|_| !after_dashes);
+        let param = prev.and_then(|prev| by_flag(prev)).or_else(|| {
+            let mut position = 0;
+            let mut words = rest.iter();
+            let mut dashes = false;
+            while let Some(word) = words.next() {
+                if dashes || !word.starts_with('-') || word == "-" {
+                    position += 1;
+                } else if word == "--" {
+                    dashes = true;
+                } else if !word.contains('=') && by_flag(word).is_some() {
+                    words.next();
+                }
+            }
+            let positionals: Vec<&CliParam> = cmd
+                .params
+                .iter()
+                .filter(|p| matches!(p.kind, ParamKind::Positional))
+                .collect();
+            // A trailing list argument takes every remaining word.
+            let last = positionals.last().filter(|p| p.multiple);
+            positionals.get(position).or(last).copied()
+        });
 
-    // Build kwargs from parsed arguments
+        let Some(param) = param else {
+            return Ok(Vec::new());
+        };
+        let Some(completer) = &param.completer else {
+            // Enum and `Literal` choices complete without a completer.
+            return Ok(match &param.conv {
+                Conv::Choice(choices) => {
+                    filter(choices.iter().map(|(name, _)| name.as_str()), current)
+                }
+                _ => Vec::new(),
+            });
+        };
+        let mut candidates = Vec::new();
+        for candidate in completer.func(py)?.call1((current,))?.try_iter()? {
+            let candidate = candidate?.str()?;
+            let candidate = candidate.to_str()?;
+            if candidate.starts_with(current) {
+                candidates.push(candidate.to_string());
+            }
+        }
+        Ok(candidates)
+    }
+}
+/// Build the keyword arguments for `cmd` from its parsed arguments.
+fn build_kwargs<'py>(
+    py: Python<'py>,
+    cmd: &PyCliCommand,
+    matches: &ArgMatches,
+) -> PyResult<Bound<'py, PyDict>> {
     let kwargs = PyDict::new(py);
 
     for param in &cmd.params {
-        match &param.kind {
-            ParamKind::Positional => {
-                if let Some(val) = subcmd_matches.get_one::<String>(param.name.as_str()) {
-                    let converted = convert_value(py, val, &param.type_annotation)?;
-                    kwargs.set_item(&param.name, converted)?;
-                } else if let Some(ref default) = param.default_value {
+        let id = param.name.as_str();
+        let value = if param.is_bool_flag {
+            Some(matches.get_flag(id).into_bound_py_any(py)?)
+        } else if param.count {
+            Some(matches.get_count(id).into_bound_py_any(py)?)
+        } else {
+            param.conv.values(py, matches, id, param.multiple)?
+        };
+        match value {
+            Some(value) => kwargs.set_item(&param.name, value)?,
+            None => {
+                if let Some(ref default) = param.default_value {
                     kwargs.set_item(&param.name, default.bind(py))?;
                 }
             }
-            ParamKind::Option { .. } => {
-                if param.is_bool_flag {
-                    let val = subcmd_matches.get_flag(param.name.as_str());
-                    kwargs.set_item(&param.name, val)?;
-                } else if let Some(val) = subcmd_matches.get_one::<String>(param.name.as_str()) {
-                    let converted = convert_value(py, val, &param.type_annotation)?;
-                    kwargs.set_item(&param.name, converted)?;
-                } else if let Some(ref default) = param.default_value {
-                    kwargs.set_item(&param.name, default.bind(py))?;
-                }
+        }
+    }
+
+    Ok(kwargs)
+}
+
+fn filter<'a>(words: impl IntoIterator<Item = &'a str>, prefix: &str) -> Vec<String> {
+    words
+        .into_iter()
+        .filter(|w| w.starts_with(prefix))
+        .map(String::from)
+        .collect()
+}
+
+/// The commands of one `turboterm.cli.App`, with parsers compiled on first
+/// use and reused until a command is registered.
+///
+/// Parsing and dispatch take a snapshot of the commands under a short lock
+/// and release it before parsing or calling into Python, so threads can
+/// dispatch concurrently and a command may itself dispatch. Parsing also
+/// releases the GIL.
+#[pyclass(frozen)]
+pub struct CliRegistry {
+    commands: Mutex<Arc<Commands>>,
+}
+
+impl CliRegistry {
+    fn snapshot(&self) -> Arc<Commands> {
+        self.commands.lock().unwrap().clone()
+    }
+
+    fn insert(&self, command: PyCliCommand) {
+        let mut commands = self.commands.lock().unwrap();
+        Arc::make_mut(&mut commands).insert(command);
+    }
+
+    /// Parse `args` without holding the GIL. Help is written to
+    /// `sys.stdout` afterwards, so that redirecting it in Python captures
+    /// help too, and `None` returned.
+    fn parse(
+        &self,
+        py: Python,
+        args: &[String],
+    ) -> PyResult<Option<(Arc<PyCliCommand>, ArgMatches)>> {
+        let commands = self.snapshot();
+        match py.detach(|| commands.parse(args))? {
+            Parsed::Command(cmd, matches) => Ok(Some((cmd, matches))),
+            Parsed::Help(text) => {
+                let stdout = py.import("sys")?.getattr("stdout")?;
+                stdout.call_method1("write", (text,))?;
+                Ok(None)
             }
         }
     }
+}
 
-    cmd.func.bind(py).call((), Some(&kwargs))?;
+#[pymethods]
+impl CliRegistry {
+    #[new]
+    fn py_new() -> Self {
+        CliRegistry {
+            commands: Mutex::default(),
+        }
+    }
 
-    Ok(())
+    /// Register a command with pre-processed parameter metadata.
+    /// Called from `App.command()`, which handles signature inspection.
+    #[pyo3(signature = (name, func, doc=None, params=vec![]))]
+    fn register<'py>(
+        &self,
+        py: Python<'py>,
+        name: String,
+        func: Py<PyAny>,
+        doc: Option<String>,
+        params: Vec<ParamSpec<'py>>,
+    ) -> PyResult<()> {
+        let params = read_params(py, params)?;
+        self.insert(PyCliCommand::new(name, Handler::Func(func), doc, params));
+        Ok(())
+    }
+
+    /// Register a command by the `"pkg.module:func"` path of its function,
+    /// which is imported only when the command is dispatched. Help and
+    /// parsing use the given metadata.
+    #[pyo3(signature = (name, target, doc=None, params=vec![]))]
+    fn register_lazy<'py>(
+        &self,
+        py: Python<'py>,
+        name: String,
+        target: String,
+        doc: Option<String>,
+        params: Vec<ParamSpec<'py>>,
+    ) -> PyResult<()> {
+        let handler = Handler::lazy(target)?;
+        let params = read_params(py, params)?;
+        self.insert(PyCliCommand::new(name, handler, doc, params));
+        Ok(())
+    }
+
+    /// Parse `argv` (without the program name) and return the command name
+    /// and the keyword arguments it would be called with, without calling
+    /// it. Returns `None` if `argv` asks for help, which is printed instead;
+    /// usage errors raise `ValueError`.
+    fn parse_args<'py>(
+        &self,
+        py: Python<'py>,
+        argv: Vec<String>,
+    ) -> PyResult<Option<(String, Bound<'py, PyDict>)>> {
+        let Some((cmd, matches)) = self.parse(py, &argv)? else {
+            return Ok(None);
+        };
+        let kwargs = build_kwargs(py, &cmd, &matches)?;
+        Ok(Some((cmd.name.clone(), kwargs)))
+    }
+
+    /// The function of the command `name`, imported first if the command
+    /// was registered lazily.
+    fn handler(&self, py: Python, name: &str) -> PyResult<Py<PyAny>> {
+        let commands = self.snapshot();
+        let cmd = commands
+            .commands
+            .get(name)
+            .ok_or_else(|| PyKeyError::new_err(name.to_string()))?;
+        cmd.handler.func(py).map(Bound::unbind)
+    }
+
+    /// Parse `argv` and call the selected command, returning its result.
+    fn dispatch(&self, py: Python, argv: Vec<String>) -> PyResult<Py<PyAny>> {
+        let Some((cmd, matches)) = self.parse(py, &argv)? else {
+            return Ok(py.None());
+        };
+        let kwargs = build_kwargs(py, &cmd, &matches)?;
+        let func = cmd.handler.func(py)?;
+        func.call((), Some(&kwargs)).map(Bound::unbind)
+    }
+
+    /// Shell completion candidates for `current`, the word being typed
+    /// after `argv` (without the program name). Value completers are called
+    /// only for the argument being completed.
+    #[pyo3(signature = (argv, current=""))]
+    fn complete(&self, py: Python, argv: Vec<String>, current: &str) -> PyResult<Vec<String>> {
+        self.snapshot().complete(py, &argv, current)
+    }
 }
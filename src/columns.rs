@@ -0,0 +1,189 @@
+use pyo3::buffer::{Element, PyBuffer};
+use pyo3::exceptions::{PyTypeError, PyValueError};
+use pyo3::prelude::*;
+use pyo3::types::PyString;
+
+/// How to print the numbers of one column: a subset of Python's format-spec
+/// mini-language, `[,|_][.precision][d|f|e|%]`.
+#[derive(Clone, Copy, Debug, Default, PartialEq)]
+pub struct FormatSpec {
+    thousands: Option<char>,
+    precision: Option<usize>,
+    kind: Option<char>,
+}
+
+impl FormatSpec {
+    pub fn parse(spec: &str) -> Result<Self, String> {
+        let mut out = FormatSpec::default();
+        let mut rest = spec;
+
+        if let Some(sep) = rest.chars().next().filter(|&c| c == ',' || c == '_') {
+            out.thousands = Some(sep);
+            rest = &rest[1..];
+        }
+        if let Some(after_dot) = rest.strip_prefix('.') {
+            let digits = after_dot.bytes().take_while(u8::is_ascii_digit).count();
+            out.precision = after_dot[..digits].parse().ok();
+            if out.precision.is_none() {
+                return Err(format!("missing precision in format spec '{}'", spec));
+            }
+            rest = &after_dot[digits..];
+        }
+        match rest {
+            "" => {}
+            "d" | "f" | "e" | "%" => out.kind = rest.chars().next(),
+            _ => return Err(format!("unsupported format spec '{}'", spec)),
+        }
+        Ok(out)
+    }
+
+    pub fn format_int(&self, v: i128) -> String {
+        match self.kind {
+            None | Some('d') if self.precision.is_none() => self.group(v.to_string()),
+            _ => self.format_float(v as f64),
+        }
+    }
+
+    pub fn format_float(&self, v: f64) -> String {
+        if !v.is_finite() {
+            return match (v.is_nan(), v > 0.0) {
+                (true, _) => "nan",
+                (false, true) => "inf",
+                (false, false) => "-inf",
+            }
+            .to_string();
+        }
+        let text = match (self.kind, self.precision) {
+            (Some('d'), _) => format!("{:.0}", v),
+            (Some('e'), p) => format_exp(v, p.unwrap_or(6)),
+            (Some('%'), p) => format!("{:.*}%", p.unwrap_or(6), v * 100.0),
+            (Some('f'), p) => format!("{:.*}", p.unwrap_or(6), v),
+            (_, Some(p)) => format!("{:.*}", p, v),
+            // Shortest round-trip form, as Python's `repr()` prints it.
+            (_, None) => python_exponent(format!("{:?}", v)),
+        };
+        self.group(text)
+    }
+
+    pub fn format_bool(&self, v: bool) -> String {
+        if v { "True" } else { "False" }.to_string()
+    }
+
+    /// Insert the thousands separator into the integer part of `text`.
+    fn group(&self, text: String) -> String {
+        let Some(sep) = self.thousands else {
+            return text;
+        };
+        let sign = usize::from(text.starts_with('-'));
+        let digits = text[sign..].bytes().take_while(u8::is_ascii_digit).count();
+        if digits <= 3 {
+            return text;
+        }
+
+        let int_part = &text[sign..sign + digits];
+        let mut out = String::with_capacity(text.len() + digits / 3);
+        out.push_str(&text[..sign]);
+        for (i, c) in int_part.chars().enumerate() {
+            if i > 0 && (digits - i) % 3 == 0 {
+                out.push(sep);
+            }
+            out.push(c);
+        }
+        out.push_str(&text[sign + digits..]);
+        out
+    }
+}
+
+/// Python-style exponent notation: `1.50e+03` rather than Rust's `1.50e3`.
+fn format_exp(v: f64, precision: usize) -> String {
+    python_exponent(format!("{:.*e}", precision, v))
+}
+
+/// Give the exponent of a number Rust printed, if any, a sign and at least
+/// two digits, as Python does: `1e-7` becomes `1e-07`.
+fn python_exponent(text: String) -> String {
+    match text.split_once('e') {
+        Some((mantissa, exp)) => {
+            let (sign, digits) = match exp.strip_prefix('-') {
+                Some(d) => ('-', d),
+                None => ('+', exp),
+            };
+            format!("{}e{}{:0>2}", mantissa, sign, digits)
+        }
+        None => text,
+    }
+}
+
+/// Format every value of a one-dimensional buffer without copying it.
+/// Returns `None` when `obj` does not export a buffer of element type `T`.
+fn read_buffer<T: Element>(
+    py: Python,
+    obj: &Bound<'_, PyAny>,
+    format: impl Fn(T) -> String,
+) -> PyResult<Option<Vec<String>>> {
+    let Ok(buffer) = PyBuffer::<T>::get(obj) else {
+        return Ok(None);
+    };
+    if buffer.dimensions() != 1 {
+        return Err(PyValueError::new_err(
+            "column buffers must be one-dimensional",
+        ));
+    }
+    let values = buffer
+        .as_slice(py)
+        .ok_or_else(|| PyValueError::new_err("column buffers must be contiguous"))?;
+    Ok(Some(values.iter().map(|v| format(v.get())).collect()))
+}
+
+/// Turn one column into display cells.
+///
+/// Objects exporting an integer, float or bool buffer (`array.array`, NumPy
+/// arrays, `memoryview`) are read in place and formatted with `spec`. Any
+/// other iterable is treated as text: strings go through the markup lexer
+/// (unless `markup` is false) and everything else through `str()`.
+pub fn read_column(
+    py: Python,
+    obj: &Bound<'_, PyAny>,
+    spec: &FormatSpec,
+    markup: bool,
+) -> PyResult<Vec<String>> {
+    macro_rules! try_buffer {
+        ($($t:ty => $format:expr),* $(,)?) => {$(
+            if let Some(cells) = read_buffer::<$t>(py, obj, $format)? {
+                return Ok(cells);
+            }
+        )*};
+    }
+    try_buffer!(
+        bool => |v| spec.format_bool(v),
+        i64 => |v| spec.format_int(v.into()),
+        i32 => |v| spec.format_int(v.into()),
+        i16 => |v| spec.format_int(v.into()),
+        i8 => |v| spec.format_int(v.into()),
+        u64 => |v| spec.format_int(v.into()),
+        u32 => |v| spec.format_int(v.into()),
+        u16 => |v| spec.format_int(v.into()),
+        u8 => |v| spec.format_int(v.into()),
+        f64 => |v| spec.format_float(v),
+        f32 => |v| spec.format_float(v.into()),
+    );
+
+    if obj.is_instance_of::<PyString>() {
+        return Err(PyTypeError::new_err(
+            "a column must be a buffer or an iterable of values, not str",
+        ));
+    }
+    let mut cells = Vec::new();
+    for item in obj.try_iter()? {
+        let item = item?;
+        let cell = if item.is_instance_of::<PyString>() && markup {
+            crate::lexer::apply_styles(&item.extract::<String>()?)
+        } else if item.is_instance_of::<PyString>() {
+            item.extract::<String>()?
+        } else {
+            item.str()?.to_str()?.to_string()
+        };
+        cells.push(cell);
+    }
+    Ok(cells)
+}
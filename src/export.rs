@@ -0,0 +1,161 @@
+//! Plain-text exports for `PyTable.to_csv()`, `to_tsv()`, `to_markdown()`
+//! and `to_jsonl()`. Cells are written by their visible text, without styles.
+
+use crate::layout::Align;
+use crate::lexer;
+
+/// Output is handed to a file object once it grows past this many bytes.
+pub const CHUNK_BYTES: usize = 64 * 1024;
+
+#[derive(Clone, Copy, PartialEq)]
+pub enum Format {
+    /// CSV-style fields separated by this character, quoted when needed.
+    Delimited(char),
+    /// A GitHub pipe table whose first row is the header.
+    Markdown,
+    /// One JSON object per row keyed by the header cells, or one JSON array
+    /// per row when the table has no header rows.
+    JsonLines,
+}
+
+/// Writes the rows of one table, one line per row.
+pub struct Exporter {
+    format: Format,
+    cols: usize,
+    /// Markdown alignment of each column.
+    aligns: Vec<Align>,
+    /// JSON-encoded object keys, for `Format::JsonLines` with a header.
+    keys: Option<Vec<String>>,
+    /// Rows written so far.
+    rows: usize,
+}
+
+impl Exporter {
+    /// `header` is the first row of the table when it is a header row.
+    pub fn new(format: Format, cols: usize, aligns: Vec<Align>, header: Option<Vec<&str>>) -> Self {
+        let keys = match format {
+            Format::JsonLines => header.map(|header| {
+                (0..cols)
+                    .map(|c| {
+                        let name = header.get(c).map(|cell| lexer::strip_ansi(cell));
+                        let mut key = String::new();
+                        match name.as_deref() {
+                            Some(name) if !name.is_empty() => push_json_str(&mut key, name),
+                            _ => push_json_str(&mut key, &c.to_string()),
+                        }
+                        key
+                    })
+                    .collect()
+            }),
+            _ => None,
+        };
+        Exporter {
+            format,
+            cols,
+            aligns,
+            keys,
+            rows: 0,
+        }
+    }
+
+    /// Append one row; missing cells are written as empty ones and extra
+    /// cells are dropped.
+    pub fn push_row<'a>(&mut self, out: &mut String, cells: impl Iterator<Item = &'a str>) {
+        let mut cells = cells.map(lexer::strip_ansi);
+        match self.format {
+            Format::Delimited(delimiter) => {
+                for c in 0..self.cols {
+                    if c > 0 {
+                        out.push(delimiter);
+                    }
+                    push_delimited(out, &cells.next().unwrap_or_default(), delimiter);
+                }
+            }
+            Format::Markdown => {
+                out.push('|');
+                for _ in 0..self.cols {
+                    out.push(' ');
+                    push_markdown(out, &cells.next().unwrap_or_default());
+                    out.push_str(" |");
+                }
+                if self.rows == 0 {
+                    out.push_str("\n|");
+                    for align in &self.aligns {
+                        out.push_str(match align {
+                            Align::Left => " --- |",
+                            Align::Center => " :-: |",
+                            Align::Right | Align::Decimal => " --: |",
+                        });
+                    }
+                }
+            }
+            Format::JsonLines => {
+                let (open, close) = if self.keys.is_some() {
+                    ('{', '}')
+                } else {
+                    ('[', ']')
+                };
+                out.push(open);
+                for c in 0..self.cols {
+                    if c > 0 {
+                        out.push(',');
+                    }
+                    if let Some(keys) = &self.keys {
+                        out.push_str(&keys[c]);
+                        out.push(':');
+                    }
+                    push_json_str(out, &cells.next().unwrap_or_default());
+                }
+                out.push(close);
+            }
+        }
+        out.push('\n');
+        self.rows += 1;
+    }
+}
+
+/// A field quoted the way Python's `csv` module does by default: only when
+/// it holds the delimiter, a quote or a line break, with quotes doubled.
+fn push_delimited(out: &mut String, field: &str, delimiter: char) {
+    if !field.contains([delimiter, '"', '\n', '\r']) {
+        out.push_str(field);
+        return;
+    }
+    out.push('"');
+    for c in field.chars() {
+        if c == '"' {
+            out.push('"');
+        }
+        out.push(c);
+    }
+    out.push('"');
+}
+
+/// A table cell with pipes escaped and line breaks turned into `<br>`.
+fn push_markdown(out: &mut String, cell: &str) {
+    for c in cell.chars() {
+        match c {
+            '|' => out.push_str("\\|"),
+            '\n' => out.push_str("<br>"),
+            '\r' => {}
+            c => out.push(c),
+        }
+    }
+}
+
+/// A JSON string literal.
+fn push_json_str(out: &mut String, s: &str) {
+    out.push('"');
+    for c in s.chars() {
+        match c {
+            '"' => out.push_str("\\\""),
+            '\\' => out.push_str("\\\\"),
+            '\n' => out.push_str("\\n"),
+            '\r' => out.push_str("\\r"),
+            '\t' => out.push_str("\\t"),
+            c if c < ' ' => out.push_str(&format!("\\u{:04x}", c as u32)),
+            c => out.push(c),
+        }
+    }
+    out.push('"');
+}
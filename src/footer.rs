@@ -0,0 +1,197 @@
+//! Footer aggregations for `PyTable.set_footer()`.
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use std::ops::Range;
+
+use crate::columns::FormatSpec;
+use crate::lexer;
+use crate::query::parse_number;
+use crate::store::CellStore;
+
+#[derive(Clone, Copy, Debug, PartialEq)]
+enum Aggregate {
+    Sum,
+    Mean,
+    Min,
+    Max,
+    Count,
+    /// Interpolated between the nearest ranks, like NumPy's default.
+    Percentile(f64),
+}
+
+/// One column's aggregation, e.g. `"sum"` or `"p95:.1f"`.
+#[derive(Clone, Copy, Debug)]
+pub struct FooterSpec {
+    aggregate: Aggregate,
+    format: Option<FormatSpec>,
+}
+
+impl FooterSpec {
+    pub fn parse(spec: &str) -> PyResult<Self> {
+        let (name, format) = match spec.split_once(':') {
+            Some((name, format)) => (name, Some(format)),
+            None => (spec, None),
+        };
+        let aggregate = match name {
+            "sum" => Aggregate::Sum,
+            "mean" => Aggregate::Mean,
+            "min" => Aggregate::Min,
+            "max" => Aggregate::Max,
+            "count" => Aggregate::Count,
+            _ => match name.strip_prefix('p').and_then(|p| p.parse::<f64>().ok()) {
+                Some(p) if (0.0..=100.0).contains(&p) => Aggregate::Percentile(p),
+                _ => {
+                    return Err(PyValueError::new_err(format!(
+                        "unsupported aggregation '{}': expected sum, mean, min, max, \
+                         count or a percentile such as p95",
+                        name
+                    )))
+                }
+            },
+        };
+        let format = format
+            .map(|f| FormatSpec::parse(f).map_err(PyValueError::new_err))
+            .transpose()?;
+        Ok(FooterSpec { aggregate, format })
+    }
+}
+
+/// The footer row of a table: what to compute for each column, and a label
+/// for the first column when it has no aggregation.
+pub struct Footer {
+    pub specs: Vec<Option<FooterSpec>>,
+    pub label: String,
+}
+
+impl Footer {
+    /// Aggregate `rows` of `store` in one pass and format the footer cells.
+    pub fn compute(&self, store: &CellStore, rows: Range<usize>) -> Vec<String> {
+        let mut accs: Vec<Option<Accumulator>> = self
+            .specs
+            .iter()
+            .map(|spec| spec.map(|s| Accumulator::new(s.aggregate)))
+            .collect();
+
+        for r in rows {
+            for (c, acc) in accs.iter_mut().enumerate() {
+                if let (Some(acc), Some((text, _))) = (acc, store.cell(r, c)) {
+                    acc.push(&lexer::strip_ansi(text));
+                }
+            }
+        }
+
+        accs.into_iter()
+            .zip(&self.specs)
+            .enumerate()
+            .map(|(c, (acc, spec))| match (acc, spec) {
+                (Some(acc), Some(spec)) => acc.finish(spec),
+                _ if c == 0 => self.label.clone(),
+                _ => String::new(),
+            })
+            .collect()
+    }
+}
+
+/// Running totals for one column.
+struct Accumulator {
+    /// Non-empty cells.
+    count: usize,
+    /// Cells that hold a number.
+    numbers: usize,
+    sum: f64,
+    min: f64,
+    max: f64,
+    /// Every number seen was a whole number.
+    integral: bool,
+    /// Some number was written with a thousands separator.
+    grouped: bool,
+    /// All numbers, kept only for percentiles.
+    values: Option<Vec<f64>>,
+}
+
+impl Accumulator {
+    fn new(aggregate: Aggregate) -> Self {
+        Accumulator {
+            count: 0,
+            numbers: 0,
+            sum: 0.0,
+            min: f64::INFINITY,
+            max: f64::NEG_INFINITY,
+            integral: true,
+            grouped: false,
+            values: matches!(aggregate, Aggregate::Percentile(_)).then(Vec::new),
+        }
+    }
+
+    fn push(&mut self, text: &str) {
+        let text = text.trim();
+        if text.is_empty() {
+            return;
+        }
+        self.count += 1;
+        let Some(v) = parse_number(text) else {
+            return;
+        };
+        self.numbers += 1;
+        self.sum += v;
+        self.min = self.min.min(v);
+        self.max = self.max.max(v);
+        self.integral &= v.fract() == 0.0 && v.abs() < 1e15;
+        self.grouped |= text.contains(',');
+        if let Some(values) = self.values.as_mut() {
+            values.push(v);
+        }
+    }
+
+    fn finish(self, spec: &FooterSpec) -> String {
+        if spec.aggregate == Aggregate::Count {
+            return spec
+                .format
+                .unwrap_or_default()
+                .format_int(self.count as i128);
+        }
+        if self.numbers == 0 {
+            return String::new();
+        }
+        let (value, whole) = match spec.aggregate {
+            Aggregate::Sum => (self.sum, self.integral),
+            Aggregate::Min => (self.min, self.integral),
+            Aggregate::Max => (self.max, self.integral),
+            Aggregate::Mean => (self.sum / self.numbers as f64, false),
+            Aggregate::Percentile(p) => (percentile(&mut self.values.unwrap(), p), false),
+            Aggregate::Count => unreachable!(),
+        };
+        match spec.format {
+            Some(format) if whole => format.format_int(value as i128),
+            Some(format) => format.format_float(value),
+            None => {
+                // Whole numbers stay whole; anything else gets two decimals.
+                let default = match (whole, self.grouped) {
+                    (true, false) => "",
+                    (true, true) => ",",
+                    (false, false) => ".2f",
+                    (false, true) => ",.2f",
+                };
+                let format = FormatSpec::parse(default).unwrap();
+                if whole {
+                    format.format_int(value as i128)
+                } else {
+                    format.format_float(value)
+                }
+            }
+        }
+    }
+}
+
+/// The `p`th percentile (0-100) of `values`, interpolating between the two
+/// nearest ranks. Reorders `values`.
+fn percentile(values: &mut [f64], p: f64) -> f64 {
+    let pos = p / 100.0 * (values.len() - 1) as f64;
+    let lo = pos.floor() as usize;
+    let (_, &mut low, above) = values.select_nth_unstable_by(lo, f64::total_cmp);
+    match above.iter().copied().min_by(f64::total_cmp) {
+        Some(high) => low + (high - low) * (pos - lo as f64),
+        None => low,
+    }
+}
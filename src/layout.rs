@@ -0,0 +1,277 @@
+//! Column layout for `PyTable`: per-column constraints, the width solver
+//! and decimal alignment.
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use std::sync::OnceLock;
+
+use crate::lexer;
+
+#[derive(Clone, Copy, Debug, Default, PartialEq)]
+pub enum Align {
+    #[default]
+    Left,
+    Center,
+    Right,
+    /// Numbers line up on their decimal point; other cells are right-aligned.
+    Decimal,
+}
+
+impl Align {
+    pub fn parse(name: &str) -> PyResult<Self> {
+        match name {
+            "left" => Ok(Align::Left),
+            "center" => Ok(Align::Center),
+            "right" => Ok(Align::Right),
+            "decimal" => Ok(Align::Decimal),
+            other => Err(PyValueError::new_err(format!(
+                "align must be 'left', 'center', 'right' or 'decimal', got '{}'",
+                other
+            ))),
+        }
+    }
+}
+
+/// What to do with cells wider than their column.
+#[derive(Clone, Copy, Debug, Default, PartialEq)]
+pub enum Overflow {
+    #[default]
+    Wrap,
+    Truncate,
+}
+
+impl Overflow {
+    pub fn parse(name: &str) -> PyResult<Self> {
+        match name {
+            "wrap" => Ok(Overflow::Wrap),
+            "truncate" => Ok(Overflow::Truncate),
+            other => Err(PyValueError::new_err(format!(
+                "overflow must be 'truncate' or 'wrap', got '{}'",
+                other
+            ))),
+        }
+    }
+}
+
+/// Constraints for one column, as set with `PyTable.set_column()`.
+#[derive(Clone, Copy, Debug, Default)]
+pub struct ColumnSpec {
+    pub min_width: usize,
+    pub max_width: Option<usize>,
+    /// Share of the space left by the other columns; 0 for a column sized
+    /// by its content.
+    pub ratio: usize,
+    pub align: Align,
+    pub overflow: Overflow,
+    /// Whether new cells go through the markup lexer; `None` follows the
+    /// table's setting.
+    pub markup: Option<bool>,
+}
+
+impl ColumnSpec {
+    fn clamp(&self, width: usize) -> usize {
+        let width = width.max(self.min_width).max(1);
+        self.max_width.map_or(width, |max| width.min(max))
+    }
+}
+
+/// How one column is drawn.
+#[derive(Clone, Copy, Debug, Default, PartialEq)]
+pub struct ColumnFormat {
+    pub width: usize,
+    pub align: Align,
+    /// Offset of the decimal point from the left edge of the column, for
+    /// `Align::Decimal`.
+    pub point: usize,
+    pub overflow: Overflow,
+}
+
+impl ColumnFormat {
+    /// A plain left-aligned column.
+    pub fn left(width: usize) -> Self {
+        ColumnFormat {
+            width,
+            ..Default::default()
+        }
+    }
+
+    /// Spaces to put before a cell of visible width `cell_w`.
+    pub fn left_pad(&self, cell: &str, cell_w: usize) -> usize {
+        let room = self.width.saturating_sub(cell_w);
+        match self.align {
+            Align::Left => 0,
+            Align::Center => room / 2,
+            Align::Right => room,
+            Align::Decimal => match decimal_point(cell) {
+                Some(p) => self
+                    .point
+                    .saturating_sub(lexer::visible_width(&cell[..p]))
+                    .min(room),
+                None => room,
+            },
+        }
+    }
+}
+
+/// Solve the width of every column.
+///
+/// `natural` holds the widest cell of each column and `decimal(c)` the
+/// widest integer and fractional parts of a decimal-aligned column. Natural
+/// widths are first clamped to each column's min/max. When `total` is given,
+/// ratio columns then share whatever the other columns and the `frame`
+/// (borders and padding) leave of it, and if
+/// the table is still too wide every column gives up space in proportion to
+/// how far it is above its minimum.
+pub fn solve(
+    specs: &[ColumnSpec],
+    natural: &[usize],
+    decimal: impl Fn(usize) -> (usize, usize),
+    total: Option<usize>,
+    frame: usize,
+) -> Vec<ColumnFormat> {
+    let spec = |c: usize| specs.get(c).copied().unwrap_or_default();
+    let mut fracs = vec![0; natural.len()];
+    let mut formats: Vec<ColumnFormat> = natural
+        .iter()
+        .enumerate()
+        .map(|(c, &width)| {
+            let spec = spec(c);
+            let mut width = width;
+            if spec.align == Align::Decimal {
+                let (int, frac) = decimal(c);
+                fracs[c] = frac;
+                width = width.max(int + frac);
+            }
+            ColumnFormat {
+                width: spec.clamp(width),
+                align: spec.align,
+                point: 0,
+                overflow: spec.overflow,
+            }
+        })
+        .collect();
+
+    if let Some(total) = total {
+        let available = total.saturating_sub(frame);
+        share_by_ratio(&mut formats, spec, available);
+        shrink_to(&mut formats, spec, available);
+    }
+
+    for (format, frac) in formats.iter_mut().zip(fracs) {
+        format.point = format.width.saturating_sub(frac);
+    }
+    formats
+}
+
+/// Give ratio columns their share of the space the other columns leave.
+fn share_by_ratio(
+    formats: &mut [ColumnFormat],
+    spec: impl Fn(usize) -> ColumnSpec,
+    available: usize,
+) {
+    let mut ratios: usize = (0..formats.len()).map(|c| spec(c).ratio).sum();
+    if ratios == 0 {
+        return;
+    }
+    let fixed: usize = formats
+        .iter()
+        .enumerate()
+        .filter(|&(c, _)| spec(c).ratio == 0)
+        .map(|(_, f)| f.width)
+        .sum();
+
+    let mut spare = available.saturating_sub(fixed);
+    for (c, format) in formats.iter_mut().enumerate() {
+        let spec = spec(c);
+        if spec.ratio == 0 {
+            continue;
+        }
+        // Dividing what is left by what is left keeps rounding from
+        // losing columns at the end.
+        format.width = spec.clamp(spare * spec.ratio / ratios);
+        spare = spare.saturating_sub(format.width);
+        ratios -= spec.ratio;
+    }
+}
+
+/// Narrow columns until their widths add up to `available`, taking from
+/// each in proportion to its width above the minimum.
+fn shrink_to(formats: &mut [ColumnFormat], spec: impl Fn(usize) -> ColumnSpec, available: usize) {
+    let used: usize = formats.iter().map(|f| f.width).sum();
+    if used <= available {
+        return;
+    }
+    let slack: Vec<usize> = formats
+        .iter()
+        .enumerate()
+        .map(|(c, f)| f.width - spec(c).min_width.max(1).min(f.width))
+        .collect();
+    let mut slack_left: usize = slack.iter().sum();
+    let mut excess = (used - available).min(slack_left);
+
+    for (format, slack) in formats.iter_mut().zip(slack) {
+        if excess == 0 {
+            break;
+        }
+        // Rounding up keeps `excess <= slack_left` for the later columns.
+        let cut = (excess * slack).div_ceil(slack_left).min(slack).min(excess);
+        format.width -= cut;
+        excess -= cut;
+        slack_left -= slack;
+    }
+}
+
+/// Byte offset of the decimal point of a numeric cell, or of the end of its
+/// last digit when it has none. `None` for cells that are not numbers.
+pub fn decimal_point(cell: &str) -> Option<usize> {
+    let mut i = 0;
+    let mut first = true;
+    let mut digits_end = None;
+    let mut prev = ' ';
+    while i < cell.len() {
+        let esc = lexer::escape_len(cell, i);
+        if esc > 0 {
+            i += esc;
+            continue;
+        }
+        let c = cell[i..].chars().next().unwrap();
+        if first {
+            if !(c.is_ascii_digit() || matches!(c, '+' | '-' | '.')) {
+                return None;
+            }
+            first = false;
+        } else if matches!(prev, '+' | '-') && !(c.is_ascii_digit() || c == '.') {
+            return None;
+        }
+        if c == '.' {
+            return Some(i);
+        }
+        i += c.len_utf8();
+        if c.is_ascii_digit() {
+            digits_end = Some(i);
+        }
+        prev = c;
+    }
+    digits_end
+}
+
+/// Visible widths of the integer part (up to the decimal point) and of the
+/// rest of a cell, or `None` if it is not a number.
+pub fn decimal_parts(cell: &str, cell_w: usize) -> Option<(usize, usize)> {
+    let p = decimal_point(cell)?;
+    let int = lexer::visible_width(&cell[..p]);
+    Some((int, cell_w - int))
+}
+
+/// Terminal width in columns, looked up once per process through
+/// `shutil.get_terminal_size()`, which honours `$COLUMNS` and falls back to
+/// 80 when output is not a terminal.
+pub fn terminal_width(py: Python) -> PyResult<usize> {
+    static WIDTH: OnceLock<usize> = OnceLock::new();
+    if let Some(&width) = WIDTH.get() {
+        return Ok(width);
+    }
+    let size = py.import("shutil")?.getattr("get_terminal_size")?.call0()?;
+    let width: usize = size.getattr("columns")?.extract()?;
+    Ok(*WIDTH.get_or_init(|| width))
+}
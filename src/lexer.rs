@@ -1,8 +1,9 @@
+use std::borrow::Cow;
 use std::collections::HashMap;
 use std::sync::LazyLock;
 use unicode_width::UnicodeWidthChar;
 
-const ANSI_RESET: &str = "\x1b[0m";
+pub(crate) const ANSI_RESET: &str = "\x1b[0m";
 
 static STYLES: LazyLock<HashMap<&'static str, &'static str>> = LazyLock::new(|| {
     let mut m = HashMap::new();
@@ -169,7 +170,15 @@ fn resolve_compound(tag: &str) -> Option<String> {
     Some(codes)
 }
 
+/// Whether `[` followed by `c` opens a tag.
+fn opens_tag(c: char) -> bool {
+    c.is_alphabetic() || c == '/' || c == '#'
+}
+
 pub fn apply_styles(text: &str) -> String {
+    if !text.contains('[') {
+        return text.to_string();
+    }
     let mut result = String::new();
     let mut style_stack: Vec<String> = Vec::new();
     let mut in_tag = false;
@@ -180,15 +189,21 @@ pub fn apply_styles(text: &str) -> String {
 
     while i < chars.len() {
         match chars[i] {
+            // `\[` keeps a `[` that would open a tag as literal text.
+            '\\' if !in_tag
+                && chars.get(i + 1) == Some(&'[')
+                && chars.get(i + 2).is_some_and(|&c| opens_tag(c)) =>
+            {
+                result.push('[');
+                i += 2;
+                continue;
+            }
             '[' => {
-                if i + 1 < chars.len() {
-                    let next_char = chars[i + 1];
-                    if next_char.is_alphabetic() || next_char == '/' || next_char == '#' {
-                        in_tag = true;
-                        current_tag.clear();
-                        i += 1;
-                        continue;
-                    }
+                if chars.get(i + 1).is_some_and(|&c| opens_tag(c)) {
+                    in_tag = true;
+                    current_tag.clear();
+                    i += 1;
+                    continue;
                 }
                 result.push(chars[i]);
             }
@@ -240,8 +255,26 @@ pub fn apply_styles(text: &str) -> String {
     result
 }
 
+/// Escape `text` so that `apply_styles` prints it as is: every `[` that
+/// would open a tag is prefixed with a backslash.
+pub fn escape(text: &str) -> String {
+    let mut out = String::with_capacity(text.len() + 8);
+    let mut chars = text.chars().peekable();
+    while let Some(c) = chars.next() {
+        if c == '[' && chars.peek().is_some_and(|&next| opens_tag(next)) {
+            out.push('\\');
+        }
+        out.push(c);
+    }
+    out
+}
+
 /// Returns the visible (display) width of a string, ignoring ANSI escape sequences.
 pub fn visible_width(s: &str) -> usize {
+    // Printable ASCII is one column per byte.
+    if s.bytes().all(|b| (0x20..0x7f).contains(&b)) {
+        return s.len();
+    }
     let mut width = 0;
     let mut chars = s.chars();
     while let Some(c) = chars.next() {
@@ -259,3 +292,171 @@ pub fn visible_width(s: &str) -> usize {
     }
     width
 }
+
+/// Returns `s` without its ANSI escape sequences, borrowing when there are
+/// none.
+pub fn strip_ansi(s: &str) -> Cow<'_, str> {
+    if !s.contains('\x1b') {
+        return Cow::Borrowed(s);
+    }
+    let mut out = String::with_capacity(s.len());
+    let mut i = 0;
+    while i < s.len() {
+        let esc = escape_len(s, i);
+        if esc > 0 {
+            i += esc;
+            continue;
+        }
+        let c = s[i..].chars().next().unwrap();
+        out.push(c);
+        i += c.len_utf8();
+    }
+    Cow::Owned(out)
+}
+
+/// Length in bytes of the escape sequence starting at `i`, or 0 if `s[i..]`
+/// does not start with one. Mirrors what `visible_width` skips over.
+pub(crate) fn escape_len(s: &str, i: usize) -> usize {
+    let bytes = s.as_bytes();
+    if bytes[i] != 0x1b {
+        return 0;
+    }
+    if bytes.get(i + 1) != Some(&b'[') {
+        return 1 + s[i + 1..].chars().next().map_or(0, char::len_utf8);
+    }
+    match bytes[i + 2..].iter().position(|&b| b == b'm') {
+        Some(end) => end + 3,
+        None => bytes.len() - i,
+    }
+}
+
+/// Cuts `s` down to at most `width` visible columns, ending with `…` when
+/// anything was dropped. Escape sequences are preserved, and a reset is
+/// appended if the cut falls inside styled text.
+pub fn truncate_visible(s: &str, width: usize) -> String {
+    if visible_width(s) <= width {
+        return s.to_string();
+    }
+    if width == 0 {
+        return String::new();
+    }
+
+    let budget = width - 1;
+    let mut out = String::with_capacity(s.len());
+    let mut used = 0;
+    let mut styled = false;
+    let mut i = 0;
+
+    while i < s.len() {
+        let esc = escape_len(s, i);
+        if esc > 0 {
+            let seq = &s[i..i + esc];
+            styled = seq != ANSI_RESET;
+            out.push_str(seq);
+            i += esc;
+            continue;
+        }
+        let c = s[i..].chars().next().unwrap();
+        let w = c.width().unwrap_or(0);
+        if used + w > budget {
+            break;
+        }
+        out.push(c);
+        used += w;
+        i += c.len_utf8();
+    }
+
+    out.push('…');
+    if styled {
+        out.push_str(ANSI_RESET);
+    }
+    out
+}
+
+/// Wraps `s` into lines of at most `width` visible columns, breaking at
+/// spaces where possible and mid-word otherwise. Styles that are open at a
+/// break are closed at the end of the line and re-opened on the next one.
+pub fn wrap_visible(s: &str, width: usize) -> Vec<String> {
+    let width = width.max(1);
+    if visible_width(s) <= width {
+        return vec![s.to_string()];
+    }
+
+    let mut lines = Vec::new();
+    let mut line = String::new();
+    let mut line_w = 0;
+    // SGR codes in effect, replayed at the start of each continuation line.
+    let mut active = String::new();
+    // Last space seen on the current line: (byte offset after it, width up to
+    // it, active codes at that point).
+    let mut last_break: Option<(usize, usize, String)> = None;
+    let mut i = 0;
+
+    while i < s.len() {
+        let esc = escape_len(s, i);
+        if esc > 0 {
+            let seq = &s[i..i + esc];
+            if seq == ANSI_RESET {
+                active.clear();
+            } else {
+                active.push_str(seq);
+            }
+            line.push_str(seq);
+            i += esc;
+            continue;
+        }
+
+        let c = s[i..].chars().next().unwrap();
+        let w = c.width().unwrap_or(0);
+        i += c.len_utf8();
+
+        if line_w + w > width {
+            if c == ' ' {
+                close_line(&mut lines, &mut line, &active);
+                line_w = 0;
+                last_break = None;
+                continue;
+            }
+            match last_break.take() {
+                Some((at, w_at, active_at)) if w_at > 0 => {
+                    let tail = line.split_off(at);
+                    line.truncate(line.trim_end_matches(' ').len());
+                    close_line(&mut lines, &mut line, &active_at);
+                    line.push_str(&tail);
+                    line_w -= w_at;
+                }
+                _ => {
+                    close_line(&mut lines, &mut line, &active);
+                    line_w = 0;
+                }
+            }
+        }
+
+        if c == ' ' && line_w == 0 && !lines.is_empty() {
+            // Swallow spaces carried over to the start of a wrapped line.
+            continue;
+        }
+        line.push(c);
+        line_w += w;
+        if c == ' ' {
+            last_break = Some((line.len(), line_w, active.clone()));
+        }
+    }
+
+    // A leftover made only of escape codes adds nothing: the previous line
+    // was already closed with a reset.
+    if line_w > 0 || lines.is_empty() {
+        lines.push(line);
+    }
+    lines
+}
+
+/// Pushes `line` onto `lines`, closing any open styles, and starts the next
+/// line with those styles re-applied.
+fn close_line(lines: &mut Vec<String>, line: &mut String, active: &str) {
+    if !active.is_empty() {
+        line.push_str(ANSI_RESET);
+    }
+    lines.push(std::mem::take(line));
+    line.push_str(active);
+}
@@ -2,20 +2,53 @@ use pyo3::prelude::*;
 use pyo3::types::PyModule;
 use pyo3::Bound;
 
+mod borders;
 mod cli;
+mod columns;
+mod export;
+mod footer;
+mod layout;
 mod lexer;
+mod markdown;
+mod query;
+mod store;
+mod stream;
 mod table; // Add this line
+mod tree;
 
 #[pyfunction]
 fn apply_styles(text: &str) -> PyResult<String> {
     Ok(lexer::apply_styles(text))
 }
 
+/// Render Markdown `text` to ANSI-styled text. Horizontal rules span
+/// `width` columns, the terminal width by default.
+#[pyfunction]
+#[pyo3(signature = (text, width=None))]
+fn render_markdown(py: Python, text: &str, width: Option<usize>) -> PyResult<String> {
+    let width = match width {
+        Some(width) => width,
+        None => layout::terminal_width(py)?,
+    };
+    let mut out = String::new();
+    markdown::render(text, width, &mut out);
+    Ok(out)
+}
+
+/// Escape markup in `text` so it is shown literally.
+#[pyfunction]
+fn escape(text: &str) -> String {
+    lexer::escape(text)
+}
+
 #[pymodule]
 fn turboterm(_py: Python, m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(apply_styles, m)?)?;
+    m.add_function(wrap_pyfunction!(escape, m)?)?;
+    m.add_function(wrap_pyfunction!(render_markdown, m)?)?;
     m.add_class::<table::PyTable>()?;
-    m.add_function(wrap_pyfunction!(cli::register_command, m)?)?;
-    m.add_function(wrap_pyfunction!(cli::run_cli, m)?)?;
+    m.add_class::<stream::StreamTable>()?;
+    m.add_class::<tree::Tree>()?;
+    m.add_class::<cli::CliRegistry>()?;
     Ok(())
 }
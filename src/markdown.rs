@@ -0,0 +1,330 @@
+//! A small Markdown-to-ANSI renderer for docstrings and release notes.
+//!
+//! Lines are handled one at a time in a single pass: headings, bullet and
+//! numbered lists, block quotes, rules and fenced code blocks are recognised
+//! at the start of a line, and emphasis, code spans, strikethrough and links
+//! inside it. Everything else, including line breaks, is kept as written.
+
+use crate::lexer::ANSI_RESET;
+
+const BOLD: &str = "\x1b[1m";
+const DIM: &str = "\x1b[2m";
+const ITALIC: &str = "\x1b[3m";
+const STRIKE: &str = "\x1b[9m";
+const CODE: &str = "\x1b[36m";
+const LINK: &str = "\x1b[4m\x1b[34m";
+const H1: &str = "\x1b[1m\x1b[4m";
+
+/// Render `text` as ANSI-styled text, appending to `out`. Rules are drawn
+/// `width` columns wide.
+pub fn render(text: &str, width: usize, out: &mut String) {
+    out.reserve(text.len() + text.len() / 8);
+    let mut active: Vec<&'static str> = Vec::new();
+    // The fence that opened the current code block, if any.
+    let mut fence: Option<&str> = None;
+
+    for (i, line) in text.split('\n').enumerate() {
+        if i > 0 {
+            out.push('\n');
+        }
+        let line = line.strip_suffix('\r').unwrap_or(line);
+        let trimmed = line.trim_start();
+        let indent = &line[..line.len() - trimmed.len()];
+
+        if let Some(open) = fence {
+            if trimmed.starts_with(open) && trimmed.trim_end() == &trimmed[..open.len()] {
+                fence = None;
+                trim_blank_line(out);
+            } else {
+                out.push_str("  ");
+                push_styled(out, DIM, line);
+            }
+            continue;
+        }
+        if let Some(open) = fence_marker(trimmed) {
+            fence = Some(open);
+            trim_blank_line(out);
+            continue;
+        }
+
+        if let Some((level, title)) = heading(trimmed) {
+            let style = match level {
+                1 => H1,
+                2 => BOLD,
+                _ => ITALIC,
+            };
+            if level > 2 {
+                out.push_str(BOLD);
+                active.push(BOLD);
+            }
+            out.push_str(style);
+            active.push(style);
+            inline(out, title, &mut active);
+            active.clear();
+            out.push_str(ANSI_RESET);
+        } else if is_rule(trimmed) {
+            push_styled(out, DIM, &"─".repeat(width));
+        } else if let Some(quote) = trimmed.strip_prefix('>') {
+            out.push_str(indent);
+            push_styled(out, DIM, "│");
+            out.push(' ');
+            inline(out, quote.strip_prefix(' ').unwrap_or(quote), &mut active);
+        } else if let Some(item) = bullet(trimmed) {
+            out.push_str(indent);
+            out.push_str("• ");
+            inline(out, item, &mut active);
+        } else if let Some((marker, item)) = numbered(trimmed) {
+            out.push_str(indent);
+            out.push_str(marker);
+            out.push(' ');
+            inline(out, item, &mut active);
+        } else {
+            out.push_str(indent);
+            inline(out, trimmed, &mut active);
+        }
+    }
+}
+
+/// Drop the line break just written for a fence line, so fences take no
+/// room of their own.
+fn trim_blank_line(out: &mut String) {
+    if out.ends_with('\n') {
+        out.pop();
+    }
+}
+
+fn push_styled(out: &mut String, style: &str, text: &str) {
+    out.push_str(style);
+    out.push_str(text);
+    out.push_str(ANSI_RESET);
+}
+
+/// The opening ```` ``` ```` or `~~~` run of a fence line.
+fn fence_marker(line: &str) -> Option<&str> {
+    let c = line.chars().next().filter(|&c| c == '`' || c == '~')?;
+    let run = line.len() - line.trim_start_matches(c).len();
+    (run >= 3).then(|| &line[..run])
+}
+
+/// Level and text of an ATX heading such as `## Usage ##`.
+fn heading(line: &str) -> Option<(usize, &str)> {
+    let level = line.len() - line.trim_start_matches('#').len();
+    if !(1..=6).contains(&level) {
+        return None;
+    }
+    let rest = &line[level..];
+    if !(rest.is_empty() || rest.starts_with(' ')) {
+        return None;
+    }
+    let title = rest.trim().trim_end_matches('#').trim_end();
+    Some((level, title))
+}
+
+/// `---`, `***` or `___`, optionally spaced out.
+fn is_rule(line: &str) -> bool {
+    let mut chars = line.chars().filter(|c| !c.is_whitespace());
+    let Some(first) = chars.next().filter(|c| matches!(c, '-' | '*' | '_')) else {
+        return false;
+    };
+    let mut count = 1;
+    for c in chars {
+        if c != first {
+            return false;
+        }
+        count += 1;
+    }
+    count >= 3
+}
+
+/// The text of a `-`, `*` or `+` list item.
+fn bullet(line: &str) -> Option<&str> {
+    let rest = line.strip_prefix(['-', '*', '+'])?;
+    rest.strip_prefix(' ').map(str::trim_start)
+}
+
+/// The marker and text of a `1.` or `1)` list item. The number is kept as
+/// written.
+fn numbered(line: &str) -> Option<(&str, &str)> {
+    let digits = line.len() - line.trim_start_matches(|c: char| c.is_ascii_digit()).len();
+    if !(1..=9).contains(&digits) {
+        return None;
+    }
+    let rest = line[digits..].strip_prefix(['.', ')'])?;
+    let item = rest.strip_prefix(' ')?.trim_start();
+    Some((&line[..digits + 1], item))
+}
+
+fn open(out: &mut String, active: &mut Vec<&'static str>, style: &'static str) {
+    out.push_str(style);
+    active.push(style);
+}
+
+/// End the innermost style: reset, then re-apply the ones still open.
+fn close(out: &mut String, active: &mut Vec<&'static str>) {
+    active.pop();
+    out.push_str(ANSI_RESET);
+    for style in active.iter() {
+        out.push_str(style);
+    }
+}
+
+/// Render the inline elements of one line.
+fn inline(out: &mut String, text: &str, active: &mut Vec<&'static str>) {
+    let bytes = text.as_bytes();
+    let mut i = 0;
+    while i < text.len() {
+        let b = bytes[i];
+        match b {
+            b'\\' if bytes.get(i + 1).is_some_and(u8::is_ascii_punctuation) => {
+                out.push(bytes[i + 1] as char);
+                i += 2;
+                continue;
+            }
+            b'`' => {
+                let ticks = run_len(bytes, i, b'`');
+                let body = i + ticks;
+                if let Some(end) = find_code_end(text, body, ticks) {
+                    let code = &text[body..end];
+                    let code = match code.strip_prefix(' ').and_then(|c| c.strip_suffix(' ')) {
+                        Some(inner) if !inner.trim().is_empty() => inner,
+                        _ => code,
+                    };
+                    open(out, active, CODE);
+                    out.push_str(code);
+                    close(out, active);
+                    i = end + ticks;
+                } else {
+                    out.push_str(&text[i..body]);
+                    i = body;
+                }
+                continue;
+            }
+            b'*' | b'_' | b'~' => {
+                let run = run_len(bytes, i, b);
+                let n = match b {
+                    b'~' if run == 2 => 2,
+                    b'~' => {
+                        out.push_str(&text[i..i + run]);
+                        i += run;
+                        continue;
+                    }
+                    _ => run.min(2),
+                };
+                if let Some(end) = find_closer(text, i, n, b) {
+                    let style = match (b, n) {
+                        (b'~', _) => STRIKE,
+                        (_, 2) => BOLD,
+                        _ => ITALIC,
+                    };
+                    open(out, active, style);
+                    inline(out, &text[i + n..end], active);
+                    close(out, active);
+                    i = end + n;
+                } else {
+                    out.push_str(&text[i..i + run]);
+                    i += run;
+                }
+                continue;
+            }
+            b'[' => {
+                if let Some((label, url, end)) = link(text, i) {
+                    open(out, active, LINK);
+                    inline(out, label, active);
+                    close(out, active);
+                    if !url.is_empty() && url != label {
+                        out.push(' ');
+                        push_styled(out, DIM, &format!("({})", url));
+                        for style in active.iter() {
+                            out.push_str(style);
+                        }
+                    }
+                    i = end;
+                    continue;
+                }
+            }
+            _ => {}
+        }
+        // Copy plain text up to the next byte that may start markup.
+        let next = bytes[i + 1..]
+            .iter()
+            .position(|b| matches!(b, b'\\' | b'`' | b'*' | b'_' | b'~' | b'['))
+            .map_or(text.len(), |p| i + 1 + p);
+        out.push_str(&text[i..next]);
+        i = next;
+    }
+}
+
+/// Length of the run of `c` starting at `i`.
+fn run_len(bytes: &[u8], i: usize, c: u8) -> usize {
+    bytes[i..].iter().take_while(|&&b| b == c).count()
+}
+
+/// Start of the backtick run of exactly `ticks` that closes a code span
+/// whose content starts at `from`.
+fn find_code_end(text: &str, from: usize, ticks: usize) -> Option<usize> {
+    let bytes = text.as_bytes();
+    let mut i = from;
+    while i < bytes.len() {
+        if bytes[i] == b'`' {
+            let run = run_len(bytes, i, b'`');
+            if run == ticks {
+                return Some(i);
+            }
+            i += run;
+        } else {
+            i += 1;
+        }
+    }
+    None
+}
+
+/// Position of the delimiter that closes an `n`-character emphasis run of
+/// `c` opening at `at`, if that run can open one at all.
+///
+/// Like CommonMark, an opener must be followed and a closer preceded by a
+/// non-space, and `_` does not open or close inside a word, so `snake_case`
+/// stays as written.
+fn find_closer(text: &str, at: usize, n: usize, c: u8) -> Option<usize> {
+    let bytes = text.as_bytes();
+    let is_word = |i: usize| bytes.get(i).is_some_and(|b| b.is_ascii_alphanumeric());
+    let is_space = |i: usize| bytes.get(i).is_none_or(|b| b.is_ascii_whitespace());
+
+    let from = at + n;
+    if is_space(from) || (c == b'_' && at > 0 && is_word(at - 1)) {
+        return None;
+    }
+    let mut i = from + 1;
+    while i < bytes.len() {
+        if bytes[i] == b'\\' {
+            i += 2;
+            continue;
+        }
+        if bytes[i] != c {
+            i += 1;
+            continue;
+        }
+        let run = run_len(bytes, i, c);
+        let end = i + run;
+        // A run of 3 can close either a single or a double delimiter.
+        let fits = run == n || run == 3;
+        if fits && !is_space(i - 1) && !(c == b'_' && is_word(end)) {
+            return Some(end - n);
+        }
+        i = end;
+    }
+    None
+}
+
+/// `[label](url)` starting at `at`: the label, the url and the end offset.
+fn link(text: &str, at: usize) -> Option<(&str, &str, usize)> {
+    let rest = &text[at + 1..];
+    let label_end = rest.find("](")?;
+    let label = &rest[..label_end];
+    if label.contains('[') {
+        return None;
+    }
+    let after = &rest[label_end + 2..];
+    let url_end = after.find(')')?;
+    let url = after[..url_end].trim();
+    Some((label, url, at + 1 + label_end + 2 + url_end + 1))
+}
@@ -0,0 +1,153 @@
+//! Sort keys and filter predicates for `PyTable.sort_by()`, `filter()` and
+//! `top_k()`. Cells are compared by their visible text, without styles.
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use std::cmp::Ordering;
+
+use crate::lexer;
+
+#[derive(Clone, Copy, PartialEq)]
+pub enum KeyType {
+    Text,
+    Number,
+}
+
+impl KeyType {
+    pub fn parse(name: &str) -> PyResult<Self> {
+        match name {
+            "text" | "str" => Ok(KeyType::Text),
+            "number" | "num" => Ok(KeyType::Number),
+            other => Err(PyValueError::new_err(format!(
+                "key must be 'text' or 'number', got '{}'",
+                other
+            ))),
+        }
+    }
+}
+
+/// The value a cell is ordered by.
+pub enum SortKey {
+    Number(f64),
+    Text(String),
+    /// Not a number under `KeyType::Number`, or a missing cell.
+    Missing,
+}
+
+impl SortKey {
+    pub fn new(cell: Option<&str>, key_type: KeyType) -> Self {
+        let Some(cell) = cell else {
+            return SortKey::Missing;
+        };
+        let text = lexer::strip_ansi(cell);
+        match key_type {
+            KeyType::Text => SortKey::Text(text.into_owned()),
+            KeyType::Number => parse_number(&text).map_or(SortKey::Missing, SortKey::Number),
+        }
+    }
+}
+
+/// Order two keys, descending when `reverse`. Missing keys always sort last.
+pub fn compare(a: &SortKey, b: &SortKey, reverse: bool) -> Ordering {
+    let ord = match (a, b) {
+        (SortKey::Number(x), SortKey::Number(y)) => x.total_cmp(y),
+        (SortKey::Text(x), SortKey::Text(y)) => x.cmp(y),
+        (SortKey::Missing, SortKey::Missing) => return Ordering::Equal,
+        (SortKey::Missing, _) => return Ordering::Greater,
+        (_, SortKey::Missing) => return Ordering::Less,
+        // Text and numbers never share a column of keys.
+        _ => Ordering::Equal,
+    };
+    if reverse {
+        ord.reverse()
+    } else {
+        ord
+    }
+}
+
+/// Reads the number at the start of a cell such as `1,234.5`, `12 ms` or
+/// `99.9%`. Thousands separators are ignored, and words such as `NaN` or
+/// `inf` are not numbers.
+pub fn parse_number(text: &str) -> Option<f64> {
+    let token = text.split_whitespace().next()?;
+    let token = token.strip_suffix('%').unwrap_or(token);
+    let value: f64 = if token.contains([',', '_']) {
+        token.replace([',', '_'], "").parse().ok()?
+    } else {
+        token.parse().ok()?
+    };
+    value.is_finite().then_some(value)
+}
+
+#[derive(Clone, Copy)]
+enum Op {
+    Eq,
+    Ne,
+    Lt,
+    Le,
+    Gt,
+    Ge,
+    Contains,
+    StartsWith,
+    EndsWith,
+}
+
+/// A parsed filter such as `">= 100"`, `"== ok"` or `"contains err"`.
+pub struct Predicate {
+    op: Op,
+    value: String,
+    number: Option<f64>,
+}
+
+impl Predicate {
+    pub fn parse(spec: &str) -> PyResult<Self> {
+        const OPS: [(&str, Op); 9] = [
+            ("==", Op::Eq),
+            ("!=", Op::Ne),
+            ("<=", Op::Le),
+            (">=", Op::Ge),
+            ("<", Op::Lt),
+            (">", Op::Gt),
+            ("contains ", Op::Contains),
+            ("startswith ", Op::StartsWith),
+            ("endswith ", Op::EndsWith),
+        ];
+        let spec = spec.trim_start();
+        let Some((op, rest)) = OPS
+            .iter()
+            .find_map(|&(name, op)| Some((op, spec.strip_prefix(name)?)))
+        else {
+            return Err(PyValueError::new_err(format!(
+                "unsupported filter '{}': expected one of ==, !=, <, <=, >, >=, \
+                 contains, startswith, endswith followed by a value",
+                spec
+            )));
+        };
+        let value = rest.trim().to_string();
+        Ok(Predicate {
+            op,
+            number: parse_number(&value),
+            value,
+        })
+    }
+
+    /// Whether a cell (`None` if the row is too short) passes. Comparisons
+    /// are numeric when both sides are numbers and textual otherwise;
+    /// ordering comparisons never match text that is not a number.
+    pub fn matches(&self, cell: Option<&str>) -> bool {
+        let text = lexer::strip_ansi(cell.unwrap_or(""));
+        let text = text.trim();
+        let number = self.number.zip(parse_number(text));
+        match self.op {
+            Op::Eq => number.map_or(text == self.value, |(v, n)| n == v),
+            Op::Ne => number.map_or(text != self.value, |(v, n)| n != v),
+            Op::Lt => number.is_some_and(|(v, n)| n < v),
+            Op::Le => number.is_some_and(|(v, n)| n <= v),
+            Op::Gt => number.is_some_and(|(v, n)| n > v),
+            Op::Ge => number.is_some_and(|(v, n)| n >= v),
+            Op::Contains => text.contains(self.value.as_str()),
+            Op::StartsWith => text.starts_with(self.value.as_str()),
+            Op::EndsWith => text.ends_with(self.value.as_str()),
+        }
+    }
+}
@@ -0,0 +1,278 @@
+//! Compact cell storage for `PyTable`.
+//!
+//! All cell text lives in a single `String` arena. Each cell is a 12-byte
+//! record holding its byte range in the arena and its visible width, and each
+//! row is a contiguous run of those records. Edits append new text and leave
+//! the old bytes behind; the store compacts itself once more than half of it
+//! is garbage.
+
+/// Compaction is skipped below this much garbage, in bytes or records.
+const MIN_GARBAGE: usize = 4096;
+
+#[derive(Clone, Copy, Default)]
+struct Cell {
+    start: u32,
+    len: u32,
+    width: u32,
+}
+
+#[derive(Clone, Copy)]
+struct RowRef {
+    first: u32,
+    len: u32,
+}
+
+/// Returned when the arena would outgrow its 32-bit offsets (4 GiB of text
+/// or 4 billion cells).
+#[derive(Debug)]
+pub struct CapacityError;
+
+#[derive(Default)]
+pub struct CellStore {
+    text: String,
+    cells: Vec<Cell>,
+    rows: Vec<RowRef>,
+    /// Arena bytes and cell records no longer referenced by any row.
+    dead_text: usize,
+    dead_cells: usize,
+}
+
+impl CellStore {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Number of rows.
+    pub fn len(&self) -> usize {
+        self.rows.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.rows.is_empty()
+    }
+
+    /// Number of cells in row `r`.
+    pub fn row_len(&self, r: usize) -> usize {
+        self.rows[r].len as usize
+    }
+
+    /// Visible width of cell `(r, c)`, or 0 if the row is shorter.
+    pub fn width(&self, r: usize, c: usize) -> usize {
+        self.row_cells(r)
+            .get(c)
+            .map_or(0, |cell| cell.width as usize)
+    }
+
+    /// Text and visible width of cell `(r, c)`, or `None` if the row is
+    /// shorter.
+    pub fn cell(&self, r: usize, c: usize) -> Option<(&str, usize)> {
+        self.row_cells(r)
+            .get(c)
+            .map(|cell| (self.text_of(cell), cell.width as usize))
+    }
+
+    /// Text and visible width of every cell in row `r`.
+    pub fn row(&self, r: usize) -> impl Iterator<Item = (&str, usize)> + Clone + '_ {
+        self.row_cells(r)
+            .iter()
+            .map(|cell| (self.text_of(cell), cell.width as usize))
+    }
+
+    /// Visible widths of every cell in row `r`.
+    pub fn row_widths(&self, r: usize) -> impl Iterator<Item = usize> + '_ {
+        self.row_cells(r).iter().map(|cell| cell.width as usize)
+    }
+
+    /// Total bytes of cell text in row `r`.
+    pub fn row_text_len(&self, r: usize) -> usize {
+        self.row_cells(r).iter().map(|cell| cell.len as usize).sum()
+    }
+
+    /// Insert a row before `at`.
+    pub fn insert_row<'a>(
+        &mut self,
+        at: usize,
+        cells: impl IntoIterator<Item = (&'a str, usize)>,
+    ) -> Result<(), CapacityError> {
+        let row = self.append_cells(cells)?;
+        self.rows.insert(at, row);
+        Ok(())
+    }
+
+    /// Replace every cell of row `r`.
+    pub fn replace_row<'a>(
+        &mut self,
+        r: usize,
+        cells: impl IntoIterator<Item = (&'a str, usize)>,
+    ) -> Result<(), CapacityError> {
+        let row = self.append_cells(cells)?;
+        let old = std::mem::replace(&mut self.rows[r], row);
+        self.release(old);
+        self.maybe_compact();
+        Ok(())
+    }
+
+    pub fn remove_row(&mut self, r: usize) {
+        let old = self.rows.remove(r);
+        self.release(old);
+        self.maybe_compact();
+    }
+
+    /// Rearrange the rows so that row `i` is the old row `order[i]`. Rows
+    /// missing from `order` are dropped; none may appear twice.
+    pub fn select_rows(&mut self, order: &[usize]) {
+        let mut kept = vec![false; self.rows.len()];
+        let rows: Vec<RowRef> = order
+            .iter()
+            .map(|&r| {
+                kept[r] = true;
+                self.rows[r]
+            })
+            .collect();
+        for (r, keep) in kept.into_iter().enumerate() {
+            if !keep {
+                let row = self.rows[r];
+                self.release(row);
+            }
+        }
+        self.rows = rows;
+        self.maybe_compact();
+    }
+
+    /// Replace cell `(r, c)`, padding the row with empty cells if it is
+    /// shorter than `c + 1`.
+    pub fn set_cell(
+        &mut self,
+        r: usize,
+        c: usize,
+        text: &str,
+        width: usize,
+    ) -> Result<(), CapacityError> {
+        let row = self.rows[r];
+        if c >= row.len as usize {
+            // Rows are contiguous runs, so a longer row moves to the end.
+            let first = self.cells.len();
+            let moved = RowRef {
+                first: to_u32(first)?,
+                len: to_u32(c + 1)?,
+            };
+            to_u32(first + c + 1)?;
+            let start = row.first as usize;
+            self.cells
+                .extend_from_within(start..start + row.len as usize);
+            self.cells.resize(first + c + 1, Cell::default());
+            self.dead_cells += row.len as usize;
+            self.rows[r] = moved;
+        }
+
+        let new = self.append_text(text, width)?;
+        let slot = &mut self.cells[self.rows[r].first as usize + c];
+        self.dead_text += slot.len as usize;
+        *slot = new;
+        self.maybe_compact();
+        Ok(())
+    }
+
+    /// Heap bytes held by the arena, the cell records and the row index.
+    pub fn heap_bytes(&self) -> (usize, usize, usize) {
+        (
+            self.text.capacity(),
+            self.cells.capacity() * std::mem::size_of::<Cell>(),
+            self.rows.capacity() * std::mem::size_of::<RowRef>(),
+        )
+    }
+
+    /// Total number of live cells.
+    pub fn cell_count(&self) -> usize {
+        self.cells.len() - self.dead_cells
+    }
+
+    /// Release spare capacity, e.g. once a table has been fully built.
+    pub fn shrink_to_fit(&mut self) {
+        self.compact();
+        self.text.shrink_to_fit();
+        self.cells.shrink_to_fit();
+        self.rows.shrink_to_fit();
+    }
+
+    fn row_cells(&self, r: usize) -> &[Cell] {
+        let row = self.rows[r];
+        &self.cells[row.first as usize..(row.first + row.len) as usize]
+    }
+
+    fn text_of(&self, cell: &Cell) -> &str {
+        &self.text[cell.start as usize..(cell.start + cell.len) as usize]
+    }
+
+    fn append_text(&mut self, text: &str, width: usize) -> Result<Cell, CapacityError> {
+        let start = to_u32(self.text.len())?;
+        to_u32(self.text.len() + text.len())?;
+        self.text.push_str(text);
+        Ok(Cell {
+            start,
+            len: text.len() as u32,
+            width: to_u32(width)?,
+        })
+    }
+
+    fn append_cells<'a>(
+        &mut self,
+        cells: impl IntoIterator<Item = (&'a str, usize)>,
+    ) -> Result<RowRef, CapacityError> {
+        let first = self.cells.len();
+        for (text, width) in cells {
+            let cell = self.append_text(text, width)?;
+            self.cells.push(cell);
+        }
+        Ok(RowRef {
+            first: to_u32(first)?,
+            len: to_u32(self.cells.len() - first)?,
+        })
+    }
+
+    fn release(&mut self, row: RowRef) {
+        let start = row.first as usize;
+        let cells = &self.cells[start..start + row.len as usize];
+        self.dead_text += cells.iter().map(|c| c.len as usize).sum::<usize>();
+        self.dead_cells += cells.len();
+    }
+
+    fn maybe_compact(&mut self) {
+        let text_waste = self.dead_text > MIN_GARBAGE && self.dead_text * 2 > self.text.len();
+        let cell_waste = self.dead_cells > MIN_GARBAGE && self.dead_cells * 2 > self.cells.len();
+        if text_waste || cell_waste {
+            self.compact();
+        }
+    }
+
+    /// Rewrite the arena and cell records in row order, dropping garbage.
+    fn compact(&mut self) {
+        if self.dead_text == 0 && self.dead_cells == 0 {
+            return;
+        }
+        let mut text = String::with_capacity(self.text.len() - self.dead_text);
+        let mut cells = Vec::with_capacity(self.cells.len() - self.dead_cells);
+        for row in self.rows.iter_mut() {
+            let first = cells.len() as u32;
+            let start = row.first as usize;
+            for cell in &self.cells[start..start + row.len as usize] {
+                let begin = cell.start as usize;
+                let new_start = text.len() as u32;
+                text.push_str(&self.text[begin..begin + cell.len as usize]);
+                cells.push(Cell {
+                    start: new_start,
+                    ..*cell
+                });
+            }
+            row.first = first;
+        }
+        self.text = text;
+        self.cells = cells;
+        self.dead_text = 0;
+        self.dead_cells = 0;
+    }
+}
+
+fn to_u32(n: usize) -> Result<u32, CapacityError> {
+    u32::try_from(n).map_err(|_| CapacityError)
+}
@@ -0,0 +1,287 @@
+use pyo3::exceptions::{PyRuntimeError, PyValueError};
+use pyo3::prelude::*;
+use pyo3::types::{PyBytes, PyString};
+
+use crate::borders::{Borders, SQUARE};
+use crate::layout::{ColumnFormat, Overflow};
+use crate::lexer;
+use crate::table::push_row_line;
+
+/// Buffered output is handed to the sink once it grows past this many bytes.
+const FLUSH_AT: usize = 64 * 1024;
+
+/// Writes a table row by row to a file object, text or binary, or a file
+/// descriptor.
+///
+/// Column widths are fixed up front, either explicitly or from the first
+/// `sample` rows, so memory use does not grow with the number of rows.
+/// Cells wider than their column are truncated or wrapped.
+#[pyclass]
+pub struct StreamTable {
+    /// `file.write` for file objects, `os.write` bound to the fd otherwise.
+    write: Py<PyAny>,
+    /// Whether `write` takes bytes, as for a descriptor or a binary file.
+    binary: bool,
+    /// Empty until the widths are known.
+    col_widths: Vec<usize>,
+    /// Left-aligned layout for `col_widths`.
+    formats: Vec<ColumnFormat>,
+    /// Rules drawn once `col_widths` is known.
+    borders: Option<Borders>,
+    sample: usize,
+    /// Rows held back while sampling column widths.
+    pending: Vec<Vec<String>>,
+    overflow: Overflow,
+    buf: String,
+    rows_written: usize,
+    closed: bool,
+}
+
+#[pymethods]
+impl StreamTable {
+    #[new]
+    #[pyo3(signature = (file, widths=None, sample=100, overflow="truncate"))]
+    fn new(
+        py: Python,
+        file: &Bound<'_, PyAny>,
+        widths: Option<Vec<usize>>,
+        sample: usize,
+        overflow: &str,
+    ) -> PyResult<Self> {
+        let overflow = Overflow::parse(overflow)?;
+        if sample == 0 {
+            return Err(PyValueError::new_err("sample must be at least 1"));
+        }
+
+        let (write, binary) = if file.hasattr("write")? {
+            (file.getattr("write")?.unbind(), is_binary(py, file)?)
+        } else {
+            let fd: i32 = file.extract()?;
+            let os_write = py.import("os")?.getattr("write")?;
+            let partial = py.import("functools")?.getattr("partial")?;
+            (partial.call1((os_write, fd))?.unbind(), true)
+        };
+
+        let mut table = StreamTable {
+            write,
+            binary,
+            col_widths: Vec::new(),
+            formats: Vec::new(),
+            borders: None,
+            sample,
+            pending: Vec::new(),
+            overflow,
+            buf: String::with_capacity(FLUSH_AT + 4096),
+            rows_written: 0,
+            closed: false,
+        };
+        if let Some(widths) = widths {
+            if widths.is_empty() || widths.contains(&0) {
+                return Err(PyValueError::new_err(
+                    "widths must be a non-empty list of positive integers",
+                ));
+            }
+            table.start(widths);
+        }
+        Ok(table)
+    }
+
+    /// Add a row. It is written out once the column widths are known. A row
+    /// with more cells than the table has columns raises `ValueError`.
+    fn write_row(&mut self, py: Python, row: Vec<String>) -> PyResult<()> {
+        self.check_open()?;
+        if !self.col_widths.is_empty() && row.len() > self.col_widths.len() {
+            return Err(PyValueError::new_err(format!(
+                "row has {} cells but the table has {} columns",
+                row.len(),
+                self.col_widths.len()
+            )));
+        }
+        let styled: Vec<String> = row.iter().map(|s| lexer::apply_styles(s)).collect();
+
+        if self.col_widths.is_empty() {
+            self.pending.push(styled);
+            if self.pending.len() >= self.sample {
+                self.start_from_sample();
+            }
+        } else {
+            self.emit(&styled);
+        }
+
+        if self.buf.len() >= FLUSH_AT {
+            self.flush(py)?;
+        }
+        Ok(())
+    }
+
+    /// Add every row from an iterable of rows.
+    fn write_rows(&mut self, py: Python, rows: &Bound<'_, PyAny>) -> PyResult<()> {
+        for row in rows.try_iter()? {
+            self.write_row(py, row?.extract()?)?;
+        }
+        Ok(())
+    }
+
+    /// Write any buffered output to the underlying file.
+    fn flush(&mut self, py: Python) -> PyResult<()> {
+        if self.buf.is_empty() {
+            return Ok(());
+        }
+        let write = self.write.bind(py);
+        if self.binary {
+            // os.write may accept fewer bytes than offered.
+            let mut data = self.buf.as_bytes();
+            while !data.is_empty() {
+                let n: usize = write.call1((PyBytes::new(py, data),))?.extract()?;
+                data = &data[n..];
+            }
+        } else {
+            write.call1((PyString::new(py, &self.buf),))?;
+        }
+        self.buf.clear();
+        Ok(())
+    }
+
+    /// Write the bottom border and flush. The file itself is left open.
+    fn close(&mut self, py: Python) -> PyResult<()> {
+        if self.closed {
+            return Ok(());
+        }
+        if self.col_widths.is_empty() {
+            if self.pending.is_empty() {
+                self.buf.push_str("┌┐\n└┘\n");
+            } else {
+                self.start_from_sample();
+            }
+        }
+        if let Some(bottom) = self.borders.as_ref().and_then(|b| b.bottom.as_ref()) {
+            self.buf.push_str(bottom);
+            self.buf.push('\n');
+        }
+        self.flush(py)?;
+        self.closed = true;
+        Ok(())
+    }
+
+    /// Column widths in use, or `None` while still sampling.
+    #[getter]
+    fn widths(&self) -> Option<Vec<usize>> {
+        if self.col_widths.is_empty() {
+            None
+        } else {
+            Some(self.col_widths.clone())
+        }
+    }
+
+    /// Number of rows written so far (excluding rows held for sampling).
+    #[getter]
+    fn rows_written(&self) -> usize {
+        self.rows_written
+    }
+
+    fn __enter__(slf: Py<Self>) -> Py<Self> {
+        slf
+    }
+
+    fn __exit__(
+        &mut self,
+        py: Python,
+        _exc_type: &Bound<'_, PyAny>,
+        _exc_value: &Bound<'_, PyAny>,
+        _traceback: &Bound<'_, PyAny>,
+    ) -> PyResult<bool> {
+        self.close(py)?;
+        Ok(false)
+    }
+}
+
+/// Whether the file object `file` takes bytes: an `io` binary stream, or
+/// any other object whose `mode` says so, as with `open(path, "wb")`.
+fn is_binary(py: Python, file: &Bound<'_, PyAny>) -> PyResult<bool> {
+    let io = py.import("io")?;
+    if file.is_instance(&io.getattr("RawIOBase")?)?
+        || file.is_instance(&io.getattr("BufferedIOBase")?)?
+    {
+        return Ok(true);
+    }
+    let mode = file.getattr("mode").ok();
+    let mode = mode.and_then(|mode| mode.extract::<String>().ok());
+    Ok(mode.is_some_and(|mode| mode.contains('b')))
+}
+
+impl StreamTable {
+    fn check_open(&self) -> PyResult<()> {
+        if self.closed {
+            return Err(PyRuntimeError::new_err("write to a closed StreamTable"));
+        }
+        Ok(())
+    }
+
+    /// Fix the column widths and write the top border.
+    fn start(&mut self, col_widths: Vec<usize>) {
+        let borders = SQUARE.borders(&col_widths);
+        self.buf.push_str(borders.top.as_deref().unwrap_or(""));
+        self.borders = Some(borders);
+        self.formats = col_widths.iter().map(|&w| ColumnFormat::left(w)).collect();
+        self.col_widths = col_widths;
+    }
+
+    /// Size the columns from the sampled rows, then write those rows out.
+    fn start_from_sample(&mut self) {
+        let col_count = self.pending.iter().map(|r| r.len()).max().unwrap_or(0);
+        let mut col_widths = vec![1usize; col_count.max(1)];
+        for row in &self.pending {
+            for (j, cell) in row.iter().enumerate() {
+                col_widths[j] = col_widths[j].max(lexer::visible_width(cell));
+            }
+        }
+        self.start(col_widths);
+
+        let pending = std::mem::take(&mut self.pending);
+        for row in &pending {
+            self.emit(row);
+        }
+    }
+
+    /// Render one row into the buffer, truncating or wrapping cells that do
+    /// not fit their column.
+    fn emit(&mut self, row: &[String]) {
+        if self.rows_written > 0 {
+            let rule = self.borders.as_ref().and_then(|b| b.row.as_deref());
+            self.buf.push_str(rule.unwrap_or(""));
+        }
+        self.rows_written += 1;
+
+        let fits = self
+            .col_widths
+            .iter()
+            .zip(row)
+            .all(|(&w, cell)| lexer::visible_width(cell) <= w);
+        if fits {
+            push_row_line(&mut self.buf, row, &self.formats);
+            return;
+        }
+
+        let cells: Vec<Vec<String>> = self
+            .col_widths
+            .iter()
+            .enumerate()
+            .map(|(j, &w)| {
+                let cell = row.get(j).map(|s| s.as_str()).unwrap_or("");
+                match self.overflow {
+                    Overflow::Truncate => vec![lexer::truncate_visible(cell, w)],
+                    Overflow::Wrap => lexer::wrap_visible(cell, w),
+                }
+            })
+            .collect();
+
+        let height = cells.iter().map(|c| c.len()).max().unwrap_or(1);
+        for line in 0..height {
+            let parts: Vec<&str> = cells
+                .iter()
+                .map(|c| c.get(line).map(|s| s.as_str()).unwrap_or(""))
+                .collect();
+            push_row_line(&mut self.buf, &parts, &self.formats);
+        }
+    }
+}
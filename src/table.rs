@@ -1,111 +1,1245 @@
+use pyo3::exceptions::{PyIndexError, PyMemoryError, PyValueError};
 use pyo3::prelude::*;
+use pyo3::types::{PyDict, PyString};
+
+use crate::borders::{self, Borders, BoxStyle};
+use crate::columns::{read_column, FormatSpec};
+use crate::export::{self, Exporter, Format};
+use crate::footer::{Footer, FooterSpec};
+use crate::layout::{self, Align, ColumnFormat, ColumnSpec, Overflow};
+use crate::lexer;
+use crate::query::{compare, KeyType, Predicate, SortKey};
+use crate::store::{CapacityError, CellStore};
+use std::ops::Range;
+
+/// Tables with at least this many rows are rendered with the GIL released.
+const DETACH_MIN_ROWS: usize = 4096;
+
+/// Smallest number of rows worth handing to a worker thread.
+const ROWS_PER_THREAD: usize = 16 * 1024;
 
 /// Formats a table from Python data.
 #[pyclass]
 pub struct PyTable {
-    rows: Vec<Vec<String>>,
+    /// Styled text and visible width of every cell. Widths are measured
+    /// once, when the cell is stored.
+    cells: CellStore,
+    /// Running per-column maximum of the cell widths (minimum 1). Entries
+    /// flagged in `dirty_cols` are only an upper bound until re-measured.
+    col_widths: Vec<usize>,
+    /// Columns whose widest cell shrank or went away.
+    dirty_cols: Vec<bool>,
+    /// Set when the widest row lost cells, so the column count may shrink.
+    recount: bool,
+    rendered: Option<Rendered>,
+    /// Worker threads for large renders; 0 picks the available parallelism.
+    threads: usize,
+    /// Constraints set with `set_column()`; missing entries use defaults.
+    specs: Vec<ColumnSpec>,
+    width: TableWidth,
+    /// Solved layout of every column, updated by `relayout()`.
+    formats: Vec<ColumnFormat>,
+    /// `formats` is up to date with the cells and settings.
+    laid_out: bool,
+    /// Leading rows that sorting and filtering leave in place.
+    header_rows: usize,
+    footer: Option<Footer>,
+    /// Footer text and visible width per column, updated by `relayout()`.
+    footer_cells: Vec<(String, usize)>,
+    border: &'static BoxStyle,
+    /// New cells go through the markup lexer, unless their column says
+    /// otherwise.
+    markup: bool,
+}
+
+/// How wide the whole table may get.
+#[derive(Clone, Copy, PartialEq)]
+enum TableWidth {
+    /// As wide as the content needs.
+    Natural,
+    Fixed(usize),
+    /// The terminal width, detected once per process.
+    Terminal,
+}
+
+/// The last `to_string()` result and where each row landed in it, so rows
+/// that have not changed can be copied instead of formatted again.
+struct Rendered {
+    text: Py<PyString>,
+    /// Column layout the text was drawn with.
+    formats: Vec<ColumnFormat>,
+    /// Byte range of each row's line in `text`, or `None` once it changed.
+    row_spans: Vec<Option<Range<usize>>>,
+    /// Rows were inserted or removed, so every later line moved.
+    reflowed: bool,
+    /// The table changed since `text` was produced.
+    stale: bool,
+}
+
+/// The lines of a contiguous run of rows, formatted on one thread.
+struct Chunk {
+    text: String,
+    /// Byte range of each row's line in `text`.
+    spans: Vec<Range<usize>>,
+    /// Line number (counted from the chunk start) and span of each row that
+    /// was formatted anew.
+    fresh: Vec<(usize, Range<usize>)>,
+    lines: usize,
 }
 
 #[pymethods]
 impl PyTable {
+    /// `width` limits the table to that many columns, or to the terminal
+    /// width with `"terminal"`. By default columns fit their content.
+    /// `border` picks a border style, see the `border` property. With
+    /// `markup=False` cells are stored as given, brackets and all.
     #[new]
-    fn new() -> Self {
-        PyTable { rows: Vec::new() }
+    #[pyo3(signature = (width=None, border="square", markup=true))]
+    fn py_new(width: Option<&Bound<'_, PyAny>>, border: &str, markup: bool) -> PyResult<Self> {
+        let mut table = PyTable::new();
+        table.width = parse_width(width)?;
+        table.border = BoxStyle::find(border)?;
+        table.markup = markup;
+        Ok(table)
+    }
+
+    /// Build a table from columns instead of rows.
+    ///
+    /// Columns exporting an int, float or bool buffer (`array.array`,
+    /// NumPy arrays, `memoryview`) are read in place and formatted in Rust
+    /// using the matching entry of `formats`, e.g. `",d"` or `".2f"`. Other
+    /// columns are treated as text, and parsed for markup unless `markup`
+    /// is false. All columns must have the same length.
+    #[staticmethod]
+    #[pyo3(signature = (columns, formats=None, header=None, markup=true))]
+    fn from_columns(
+        py: Python,
+        columns: Vec<Bound<'_, PyAny>>,
+        formats: Option<Vec<Option<String>>>,
+        header: Option<Vec<String>>,
+        markup: bool,
+    ) -> PyResult<Self> {
+        let formats = formats.unwrap_or_else(|| vec![None; columns.len()]);
+        if formats.len() != columns.len() {
+            return Err(PyValueError::new_err(format!(
+                "got {} formats for {} columns",
+                formats.len(),
+                columns.len()
+            )));
+        }
+
+        let mut cells = Vec::with_capacity(columns.len());
+        for (column, format) in columns.iter().zip(&formats) {
+            let spec = match format {
+                Some(f) => FormatSpec::parse(f).map_err(PyValueError::new_err)?,
+                None => FormatSpec::default(),
+            };
+            cells.push(read_column(py, column, &spec, markup)?);
+        }
+        let row_count = cells.first().map_or(0, Vec::len);
+        if cells.iter().any(|c| c.len() != row_count) {
+            return Err(PyValueError::new_err(
+                "all columns must have the same length",
+            ));
+        }
+
+        let mut table = PyTable::new();
+        table.markup = markup;
+        if let Some(header) = header {
+            table.insert_styled(0, header)?;
+            table.header_rows = 1;
+        }
+        for r in 0..row_count {
+            let row = cells.iter().map(|column| {
+                let cell = column[r].as_str();
+                (cell, lexer::visible_width(cell))
+            });
+            table.insert_measured(table.cells.len(), row)?;
+        }
+        table.cells.shrink_to_fit();
+        Ok(table)
     }
 
     /// Add a row to the table.
     /// Expects a list of strings for now.
     fn add_row(&mut self, py_row: Vec<String>) -> PyResult<()> {
-        let styled: Vec<String> = py_row
-            .into_iter()
-            .map(|s| super::lexer::apply_styles(&s))
-            .collect();
-        self.rows.push(styled);
+        self.insert_styled(self.cells.len(), py_row)
+    }
+
+    /// Insert a row before `index`, like `list.insert`.
+    fn insert_row(&mut self, index: isize, values: Vec<String>) -> PyResult<()> {
+        let len = self.cells.len() as isize;
+        let at = if index < 0 { index + len } else { index };
+        self.insert_styled(at.clamp(0, len) as usize, values)
+    }
+
+    /// Remove the row at `index`.
+    fn remove_row(&mut self, index: isize) -> PyResult<()> {
+        let r = self.row_index(index)?;
+        let row_len = self.cells.row_len(r);
+        let old_widths: Vec<usize> = self.cells.row_widths(r).collect();
+        self.cells.remove_row(r);
+
+        for (c, &old) in old_widths.iter().enumerate() {
+            self.retrack(c, old, 0);
+        }
+        if row_len == self.col_widths.len() {
+            self.recount = true;
+        }
+        self.laid_out = false;
+        if let Some(rendered) = self.rendered.as_mut() {
+            rendered.row_spans.remove(r);
+            rendered.reflowed = true;
+            rendered.stale = true;
+        }
+        Ok(())
+    }
+
+    /// Replace every cell of the row at `index`.
+    fn update_row(&mut self, index: isize, values: Vec<String>) -> PyResult<()> {
+        let r = self.row_index(index)?;
+        let (styled, widths) = self.style_row(values);
+        let old_widths: Vec<usize> = self.cells.row_widths(r).collect();
+        let old_len = old_widths.len();
+        let new_len = widths.len();
+        let row = styled
+            .iter()
+            .map(String::as_str)
+            .zip(widths.iter().copied());
+        self.cells.replace_row(r, row).map_err(too_large)?;
+
+        self.grow_columns(new_len);
+        for c in 0..old_len.max(new_len) {
+            let old = old_widths.get(c).copied().unwrap_or(0);
+            let new = widths.get(c).copied().unwrap_or(0);
+            self.retrack(c, old, new);
+        }
+        if new_len < old_len && old_len == self.col_widths.len() {
+            self.recount = true;
+        }
+        self.touch_row(r);
+        Ok(())
+    }
+
+    /// Replace a single cell. Rows shorter than `col + 1` are padded with
+    /// empty cells.
+    fn set_cell(&mut self, row: isize, col: usize, value: &str) -> PyResult<()> {
+        let r = self.row_index(row)?;
+        let styled = self.style_cell(col, value.to_string());
+        let w = lexer::visible_width(&styled);
+
+        let old = self.cells.width(r, col);
+        self.cells.set_cell(r, col, &styled, w).map_err(too_large)?;
+        self.grow_columns(col + 1);
+        self.retrack(col, old, w);
+        self.touch_row(r);
         Ok(())
     }
 
     /// Returns the table as a formatted string.
+    /// The result is cached until the table is modified. Large tables are
+    /// rendered with the GIL released; another thread changing the table
+    /// meanwhile gets a `RuntimeError` ("Already borrowed").
     #[pyo3(name = "to_string")]
-    fn render(&self) -> String {
-        if self.rows.is_empty() {
-            return "┌┐\n└┘".to_string();
+    fn render(&mut self, py: Python) -> PyResult<Py<PyString>> {
+        if let Some(rendered) = self.rendered.as_ref().filter(|r| !r.stale) {
+            return Ok(rendered.text.clone_ref(py));
         }
+        self.refresh(py)?;
+        Ok(self.rendered.as_ref().unwrap().text.clone_ref(py))
+    }
 
-        let col_count = self.rows.iter().map(|r| r.len()).max().unwrap_or(0);
-        if col_count == 0 {
-            return "┌┐\n└┘".to_string();
+    /// Number of leading rows, such as a header, that `sort_by()`,
+    /// `filter()`, `head()` and `top_k()` leave in place. Tables built by
+    /// `from_columns()` with a `header` start with 1, others with 0.
+    #[getter]
+    fn header_rows(&self) -> usize {
+        self.header_rows
+    }
+
+    #[setter]
+    fn set_header_rows(&mut self, header_rows: usize) {
+        if header_rows == self.header_rows {
+            return;
+        }
+        self.header_rows = header_rows;
+        // Border styles with a header rule draw it below these rows.
+        if let Some(rendered) = self.rendered.as_mut() {
+            rendered.reflowed = true;
+            rendered.stale = true;
         }
+    }
 
-        // Compute column widths (visible width of content, minimum 1)
-        let mut col_widths = vec![1usize; col_count];
-        for row in &self.rows {
-            for (j, cell) in row.iter().enumerate() {
-                let w = super::lexer::visible_width(cell);
-                if w > col_widths[j] {
-                    col_widths[j] = w;
-                }
+    /// Border style: `"square"` (the default), `"rounded"`, `"heavy"`,
+    /// `"ascii"`, `"minimal"` (inner lines only, with a rule below the
+    /// header rows), `"markdown"` (a pipe table) or `"borderless"`
+    /// (columns separated by spaces, without any rules).
+    #[getter]
+    fn border(&self) -> &'static str {
+        self.border.name
+    }
+
+    #[setter]
+    fn set_border(&mut self, border: &str) -> PyResult<()> {
+        self.border = BoxStyle::find(border)?;
+        self.laid_out = false;
+        self.rendered = None;
+        Ok(())
+    }
+
+    /// Whether cells added from now on are parsed for markup. Raw cells
+    /// (`False`) skip the lexer and are shown exactly as given, so text
+    /// such as `[INFO]` or `arr[0]` is never taken for a tag. Columns can
+    /// override this with `set_column(markup=...)`; `turboterm.escape()`
+    /// protects single cells instead.
+    #[getter]
+    fn markup(&self) -> bool {
+        self.markup
+    }
+
+    #[setter]
+    fn set_markup(&mut self, markup: bool) {
+        self.markup = markup;
+    }
+
+    /// Sort the rows below the header by column `col`, stably and in
+    /// place. `key` is `"text"` or `"number"`; with `"number"`, cells such
+    /// as `1,234.5`, `12 ms` or `99%` compare by value and anything else
+    /// sorts last.
+    #[pyo3(signature = (col, key="text", reverse=false))]
+    fn sort_by(&mut self, col: usize, key: &str, reverse: bool) -> PyResult<()> {
+        let keys = self.sort_keys(col, KeyType::parse(key)?);
+        let mut order = self.data_rows();
+        order.sort_by(|&a, &b| compare(&keys[a], &keys[b], reverse));
+        self.reorder(order);
+        Ok(())
+    }
+
+    /// Keep only the rows below the header whose cell in column `col`
+    /// matches `predicate`: an operator (`==`, `!=`, `<`, `<=`, `>`, `>=`,
+    /// `contains`, `startswith` or `endswith`) and a value, e.g. `"> 100"`
+    /// or `"contains err"`. Returns the number of rows removed.
+    fn filter(&mut self, col: usize, predicate: &str) -> PyResult<usize> {
+        let predicate = Predicate::parse(predicate)?;
+        let before = self.cells.len();
+        let order = self
+            .data_rows()
+            .into_iter()
+            .filter(|&r| predicate.matches(self.cells.cell(r, col).map(|(text, _)| text)))
+            .collect();
+        self.reorder(order);
+        Ok(before - self.cells.len())
+    }
+
+    /// Keep the first `n` rows below the header.
+    fn head(&mut self, n: usize) {
+        let mut order = self.data_rows();
+        order.truncate(n);
+        self.reorder(order);
+    }
+
+    /// Keep the `k` rows below the header with the largest values in
+    /// column `col` (the smallest with `largest=False`), in sorted order.
+    /// The same as `sort_by()` then `head(k)`, but only the top `k` rows
+    /// are fully sorted.
+    #[pyo3(signature = (col, k, key="number", largest=true))]
+    fn top_k(&mut self, col: usize, k: usize, key: &str, largest: bool) -> PyResult<()> {
+        let keys = self.sort_keys(col, KeyType::parse(key)?);
+        // Ties go to the earlier row, as with a stable sort.
+        let cmp = |a: &usize, b: &usize| compare(&keys[*a], &keys[*b], largest).then(a.cmp(b));
+        let mut order = self.data_rows();
+        if k < order.len() {
+            order.select_nth_unstable_by(k, cmp);
+            order.truncate(k);
+        }
+        order.sort_unstable_by(cmp);
+        self.reorder(order);
+        Ok(())
+    }
+
+    /// Add a footer row, below a solid separator, summarising the rows under
+    /// the header. Each entry of `aggregations` is `None` or one of
+    /// `"sum"`, `"mean"`, `"min"`, `"max"`, `"count"` or a percentile such
+    /// as `"p50"`, `"p95"` or `"p99"`, optionally followed by a format spec
+    /// as in `from_columns()`, e.g. `"mean:.1f"`. `label` fills the first
+    /// column when it has no aggregation. Pass `None` to remove the footer.
+    #[pyo3(signature = (aggregations, label=None))]
+    fn set_footer(
+        &mut self,
+        aggregations: Option<Vec<Option<String>>>,
+        label: Option<&str>,
+    ) -> PyResult<()> {
+        self.footer = match aggregations {
+            Some(aggregations) => Some(Footer {
+                specs: aggregations
+                    .iter()
+                    .map(|a| a.as_deref().map(FooterSpec::parse).transpose())
+                    .collect::<PyResult<_>>()?,
+                label: lexer::apply_styles(label.unwrap_or("")),
+            }),
+            None => None,
+        };
+        self.invalidate();
+        Ok(())
+    }
+
+    /// Render only rows `start:stop`, and optionally columns
+    /// `col_start:col_stop`, laid out with the widths of the whole table.
+    /// Indices follow slice rules. The footer, if any, is drawn below a
+    /// window that reaches the last row. The cost depends on the size of
+    /// the window, not of the table, which suits pagers and scrolling views.
+    #[pyo3(signature = (start, stop, col_start=0, col_stop=None))]
+    fn render_range(
+        &mut self,
+        py: Python,
+        start: isize,
+        stop: isize,
+        col_start: isize,
+        col_stop: Option<isize>,
+    ) -> PyResult<String> {
+        self.relayout(py)?;
+        let rows = slice_range(start, Some(stop), self.cells.len());
+        let cols = slice_range(col_start, col_stop, self.formats.len());
+        let formats = &self.formats[cols.clone()];
+        if formats.is_empty() {
+            return Ok(self.border.empty());
+        }
+
+        let style = self.border;
+        let widths: Vec<usize> = formats.iter().map(|f| f.width).collect();
+        let borders = style.borders(&widths);
+        let rule_len = borders.row.as_ref().map_or(0, String::len);
+        let mut out = String::with_capacity(self.rows_size(rows.clone(), rule_len) + 64);
+        out.push_str(borders.top.as_deref().unwrap_or(""));
+        let header_after = style.header_after(self.header_rows);
+        for r in rows.clone() {
+            let cells = self.cells.row(r).skip(cols.start);
+            push_formatted_row(&mut out, cells, formats, style);
+            out.push_str(borders.after_row(r, rows.end, header_after).unwrap_or(""));
+        }
+        if self.footer.is_some() && !rows.is_empty() && rows.end == self.cells.len() {
+            out.push_str(borders.footer.as_deref().unwrap_or(""));
+            let cells = self
+                .footer_cells
+                .iter()
+                .skip(cols.start)
+                .map(|(cell, w)| (cell.as_str(), *w));
+            push_formatted_row(&mut out, cells, formats, style);
+        }
+        finish(&mut out, &borders);
+        Ok(out)
+    }
+
+    /// Re-render and return only the lines that differ from the previous
+    /// render, as `(line_number, text)` pairs. Every line is returned the
+    /// first time, and whenever column widths change or rows are inserted
+    /// or removed.
+    fn render_updates(&mut self, py: Python) -> PyResult<Vec<(usize, String)>> {
+        if self.rendered.as_ref().is_some_and(|r| !r.stale) {
+            return Ok(Vec::new());
+        }
+        let (text, fresh) = self.refresh(py)?;
+        let lines = match fresh {
+            None => text.lines().map(str::to_string).enumerate().collect(),
+            Some(fresh) => fresh
+                .into_iter()
+                .flat_map(|(line_no, span)| {
+                    text[span]
+                        .lines()
+                        .enumerate()
+                        .map(move |(i, line)| (line_no + i, line.to_string()))
+                        .collect::<Vec<_>>()
+                })
+                .collect(),
+        };
+        Ok(lines)
+    }
+
+    /// Export the rows as CSV, with fields quoted only where needed. Styles
+    /// are stripped and the footer is left out. Returns the text, or writes
+    /// it to `file` in chunks and returns `None`.
+    #[pyo3(signature = (file=None))]
+    fn to_csv(&self, py: Python, file: Option<&Bound<'_, PyAny>>) -> PyResult<Option<String>> {
+        self.export(py, Format::Delimited(','), file)
+    }
+
+    /// Export the rows as tab-separated values, like `to_csv()`.
+    #[pyo3(signature = (file=None))]
+    fn to_tsv(&self, py: Python, file: Option<&Bound<'_, PyAny>>) -> PyResult<Option<String>> {
+        self.export(py, Format::Delimited('\t'), file)
+    }
+
+    /// Export the rows as a Markdown pipe table whose first row is the
+    /// header, aligned like the columns. Otherwise like `to_csv()`.
+    #[pyo3(signature = (file=None))]
+    fn to_markdown(&self, py: Python, file: Option<&Bound<'_, PyAny>>) -> PyResult<Option<String>> {
+        self.export(py, Format::Markdown, file)
+    }
+
+    /// Export the rows as JSON Lines: one object per row keyed by the cells
+    /// of the first header row, or one array per row when `header_rows` is
+    /// 0. Values are the cell text. Otherwise like `to_csv()`.
+    #[pyo3(signature = (file=None))]
+    fn to_jsonl(&self, py: Python, file: Option<&Bound<'_, PyAny>>) -> PyResult<Option<String>> {
+        self.export(py, Format::JsonLines, file)
+    }
+
+    /// Set layout constraints for column `index`.
+    ///
+    /// `min_width` and `max_width` bound the column's content width, and
+    /// `ratio` makes it share the space the other columns leave (only when
+    /// the table has a width). `align` is `"left"`, `"center"`, `"right"`
+    /// or `"decimal"`; `overflow` (`"wrap"` or `"truncate"`) decides what
+    /// happens to cells wider than the column. `markup` overrides the
+    /// table's `markup` setting for cells added to this column afterwards.
+    #[pyo3(signature = (
+        index,
+        *,
+        min_width=None,
+        max_width=None,
+        ratio=None,
+        align="left",
+        overflow="wrap",
+        markup=None,
+    ))]
+    #[allow(clippy::too_many_arguments)]
+    fn set_column(
+        &mut self,
+        index: usize,
+        min_width: Option<usize>,
+        max_width: Option<usize>,
+        ratio: Option<usize>,
+        align: &str,
+        overflow: &str,
+        markup: Option<bool>,
+    ) -> PyResult<()> {
+        if max_width == Some(0) {
+            return Err(PyValueError::new_err("max_width must be at least 1"));
+        }
+        if let (Some(min), Some(max)) = (min_width, max_width) {
+            if min > max {
+                return Err(PyValueError::new_err(
+                    "min_width must not be greater than max_width",
+                ));
+            }
+        }
+        let spec = ColumnSpec {
+            min_width: min_width.unwrap_or(0),
+            max_width,
+            ratio: ratio.unwrap_or(0),
+            align: Align::parse(align)?,
+            overflow: Overflow::parse(overflow)?,
+            markup,
+        };
+        if index >= self.specs.len() {
+            self.specs.resize(index + 1, ColumnSpec::default());
+        }
+        self.specs[index] = spec;
+        self.invalidate();
+        Ok(())
+    }
+
+    /// The width limit in columns, with `"terminal"` resolved, or `None`
+    /// when the table takes the width its content needs.
+    #[getter]
+    fn width(&self, py: Python) -> PyResult<Option<usize>> {
+        match self.width {
+            TableWidth::Natural => Ok(None),
+            TableWidth::Fixed(width) => Ok(Some(width)),
+            TableWidth::Terminal => layout::terminal_width(py).map(Some),
+        }
+    }
+
+    #[setter]
+    fn set_width(&mut self, width: Option<&Bound<'_, PyAny>>) -> PyResult<()> {
+        self.width = parse_width(width)?;
+        self.invalidate();
+        Ok(())
+    }
+
+    /// Number of threads used to format rows of large tables. `0` (the
+    /// default) uses every available core; `1` keeps rendering on the
+    /// calling thread. Small tables are always rendered on one thread.
+    /// Either way, other threads cannot use the table during a render.
+    #[getter]
+    fn threads(&self) -> usize {
+        self.threads
+    }
+
+    #[setter]
+    fn set_threads(&mut self, threads: usize) {
+        self.threads = threads;
+    }
+
+    /// Bytes held by the table, by component: `text` (the cell text
+    /// arena), `cells` and `rows` (the offset and width index), `layout`
+    /// (column widths and row positions) and `cache` (the last
+    /// `to_string()` result, which is a separate Python object). `total`
+    /// covers everything except `cache`, matching `sys.getsizeof`.
+    fn memory_usage<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let (text, cells, rows) = self.cells.heap_bytes();
+        let layout = self.layout_bytes();
+        let cache = match &self.rendered {
+            Some(rendered) => rendered.text.bind(py).to_str()?.len(),
+            None => 0,
+        };
+
+        let usage = PyDict::new(py);
+        usage.set_item("text", text)?;
+        usage.set_item("cells", cells)?;
+        usage.set_item("rows", rows)?;
+        usage.set_item("layout", layout)?;
+        usage.set_item("cache", cache)?;
+        usage.set_item("total", self.__sizeof__())?;
+        Ok(usage)
+    }
+
+    fn __sizeof__(&self) -> usize {
+        let (text, cells, rows) = self.cells.heap_bytes();
+        std::mem::size_of::<Self>() + text + cells + rows + self.layout_bytes()
+    }
+
+    fn __len__(&self) -> usize {
+        self.cells.len()
+    }
+}
+
+impl PyTable {
+    fn new() -> Self {
+        PyTable {
+            cells: CellStore::new(),
+            col_widths: Vec::new(),
+            dirty_cols: Vec::new(),
+            recount: false,
+            rendered: None,
+            threads: 0,
+            specs: Vec::new(),
+            width: TableWidth::Natural,
+            formats: Vec::new(),
+            laid_out: false,
+            header_rows: 0,
+            footer: None,
+            footer_cells: Vec::new(),
+            border: &borders::SQUARE,
+            markup: true,
+        }
+    }
+
+    fn row_index(&self, index: isize) -> PyResult<usize> {
+        let len = self.cells.len() as isize;
+        let i = if index < 0 { index + len } else { index };
+        if i < 0 || i >= len {
+            return Err(PyIndexError::new_err("row index out of range"));
+        }
+        Ok(i as usize)
+    }
+
+    fn insert_styled(&mut self, at: usize, values: Vec<String>) -> PyResult<()> {
+        let (styled, widths) = self.style_row(values);
+        self.insert_measured(at, styled.iter().map(String::as_str).zip(widths))
+    }
+
+    /// Insert a row of `(text, visible width)` pairs before `at`.
+    fn insert_measured<'a>(
+        &mut self,
+        at: usize,
+        row: impl IntoIterator<Item = (&'a str, usize)>,
+    ) -> PyResult<()> {
+        self.cells.insert_row(at, row).map_err(too_large)?;
+        self.grow_columns(self.cells.row_len(at));
+        for c in 0..self.cells.row_len(at) {
+            let w = self.cells.width(at, c);
+            self.retrack(c, 0, w);
+        }
+        self.laid_out = false;
+        if let Some(rendered) = self.rendered.as_mut() {
+            rendered.row_spans.insert(at, None);
+            rendered.reflowed = true;
+            rendered.stale = true;
+        }
+        Ok(())
+    }
+
+    /// Whether new cells of column `c` go through the markup lexer.
+    fn column_markup(&self, c: usize) -> bool {
+        self.specs
+            .get(c)
+            .and_then(|spec| spec.markup)
+            .unwrap_or(self.markup)
+    }
+
+    /// Apply markup to a cell of column `c`, or keep it as is in a raw
+    /// column.
+    fn style_cell(&self, c: usize, value: String) -> String {
+        if self.column_markup(c) {
+            lexer::apply_styles(&value)
+        } else {
+            value
+        }
+    }
+
+    /// Style every cell of a row and measure the result.
+    fn style_row(&self, values: Vec<String>) -> (Vec<String>, Vec<usize>) {
+        let styled: Vec<String> = values
+            .into_iter()
+            .enumerate()
+            .map(|(c, value)| self.style_cell(c, value))
+            .collect();
+        let widths = styled.iter().map(|s| lexer::visible_width(s)).collect();
+        (styled, widths)
+    }
+
+    fn grow_columns(&mut self, count: usize) {
+        if count > self.col_widths.len() {
+            self.col_widths.resize(count, 1);
+            self.dirty_cols.resize(count, false);
+        }
+    }
+
+    /// Update the running width of column `c` after one of its cells went
+    /// from `old` to `new` visible columns. Growing is applied at once; a
+    /// shrinking maximum marks the column for re-measurement at render time.
+    fn retrack(&mut self, c: usize, old: usize, new: usize) {
+        if c >= self.col_widths.len() {
+            return;
+        }
+        if new >= self.col_widths[c] {
+            self.col_widths[c] = new;
+            self.dirty_cols[c] = false;
+        } else if old >= self.col_widths[c] {
+            self.dirty_cols[c] = true;
+        }
+    }
+
+    /// Indices of the rows below the header.
+    fn data_rows(&self) -> Vec<usize> {
+        self.data_rows_range().collect()
+    }
+
+    fn data_rows_range(&self) -> Range<usize> {
+        self.header_rows.min(self.cells.len())..self.cells.len()
+    }
+
+    fn sort_keys(&self, col: usize, key_type: KeyType) -> Vec<SortKey> {
+        (0..self.cells.len())
+            .map(|r| SortKey::new(self.cells.cell(r, col).map(|(text, _)| text), key_type))
+            .collect()
+    }
+
+    /// Keep the header rows followed by `rows`, in that order.
+    fn reorder(&mut self, rows: Vec<usize>) {
+        let header = self.header_rows.min(self.cells.len());
+        let order: Vec<usize> = (0..header).chain(rows).collect();
+        self.cells.select_rows(&order);
+
+        // Rows may have gone, so every column is re-measured.
+        self.recount = true;
+        self.dirty_cols.fill(true);
+        self.laid_out = false;
+        self.rendered = None;
+    }
+
+    /// Force a re-layout on the next render; unchanged lines are still
+    /// reused if the layout comes out the same.
+    fn invalidate(&mut self) {
+        self.laid_out = false;
+        if let Some(rendered) = self.rendered.as_mut() {
+            rendered.stale = true;
+        }
+    }
+
+    fn touch_row(&mut self, r: usize) {
+        self.laid_out = false;
+        if let Some(rendered) = self.rendered.as_mut() {
+            rendered.row_spans[r] = None;
+            rendered.stale = true;
+        }
+    }
+
+    /// Re-measure only the columns flagged as dirty, then solve the column
+    /// layout. Does nothing if the table has not changed since.
+    fn relayout(&mut self, py: Python) -> PyResult<()> {
+        if self.laid_out {
+            return Ok(());
+        }
+        if self.recount {
+            let count = (0..self.cells.len())
+                .map(|r| self.cells.row_len(r))
+                .max()
+                .unwrap_or(0);
+            self.col_widths.truncate(count);
+            self.dirty_cols.truncate(count);
+            self.recount = false;
+        }
+        for c in 0..self.col_widths.len() {
+            if self.dirty_cols[c] {
+                self.col_widths[c] = (0..self.cells.len())
+                    .map(|r| self.cells.width(r, c))
+                    .max()
+                    .unwrap_or(0)
+                    .max(1);
+                self.dirty_cols[c] = false;
             }
         }
 
-        let mut out = String::new();
+        let footer = match &self.footer {
+            Some(footer) => footer.compute(&self.cells, self.data_rows_range()),
+            None => Vec::new(),
+        };
+        self.footer_cells = footer
+            .into_iter()
+            .map(|cell| {
+                let w = lexer::visible_width(&cell);
+                (cell, w)
+            })
+            .collect();
+        let mut natural = self.col_widths.clone();
+        for (width, (_, footer_w)) in natural.iter_mut().zip(&self.footer_cells) {
+            *width = (*width).max(*footer_w);
+        }
+
+        let total = match self.width {
+            TableWidth::Natural => None,
+            TableWidth::Fixed(width) => Some(width),
+            TableWidth::Terminal => Some(layout::terminal_width(py)?),
+        };
+        let frame = self.border.frame_width(natural.len());
+        self.formats = layout::solve(
+            &self.specs,
+            &natural,
+            |c| self.decimal_widths(c),
+            total,
+            frame,
+        );
+        self.laid_out = true;
+        Ok(())
+    }
 
-        // Top border
-        out.push('┌');
-        for (i, &w) in col_widths.iter().enumerate() {
-            for _ in 0..w + 2 {
-                out.push('─');
+    /// Widest integer part and widest remainder over the numeric cells of
+    /// column `c`, footer included.
+    fn decimal_widths(&self, c: usize) -> (usize, usize) {
+        let footer = self
+            .footer_cells
+            .get(c)
+            .map(|(cell, w)| (cell.as_str(), *w));
+        (0..self.cells.len())
+            .filter_map(|r| self.cells.cell(r, c))
+            .chain(footer)
+            .filter_map(|(cell, w)| layout::decimal_parts(cell, w))
+            .fold((0, 0), |(int, frac), (i, f)| (int.max(i), frac.max(f)))
+    }
+
+    /// Render the table into a new cached string and return it. Rows whose
+    /// line from the previous render is still valid are copied over.
+    ///
+    /// Also returns the first line number and byte range of each row that
+    /// was formatted anew, or `None` when every line should be treated as
+    /// changed.
+    #[allow(clippy::type_complexity)]
+    fn refresh(&mut self, py: Python) -> PyResult<(String, Option<Vec<(usize, Range<usize>)>>)> {
+        self.relayout(py)?;
+        let col_count = self.formats.len();
+        let row_count = self.cells.len();
+
+        if row_count == 0 || col_count == 0 {
+            let text = self.border.empty();
+            self.rendered = Some(Rendered {
+                text: PyString::new(py, &text).unbind(),
+                formats: self.formats.clone(),
+                row_spans: vec![None; row_count],
+                reflowed: false,
+                stale: false,
+            });
+            return Ok((text, None));
+        }
+
+        let previous = self.rendered.as_ref().filter(|r| r.formats == self.formats);
+        let reusable = match previous {
+            Some(prev) => Some((prev.text.bind(py).to_str()?, prev.row_spans.as_slice())),
+            None => None,
+        };
+        let full = previous.is_none_or(|prev| prev.reflowed);
+
+        // Large renders run without the GIL so other Python threads keep
+        // going. They cannot touch the cell store or the previous text
+        // meanwhile: `self` stays mutably borrowed, so PyO3 fails any other
+        // call on this table with "Already borrowed".
+        let this = &*self;
+        let (out, row_spans, fresh) = if row_count >= DETACH_MIN_ROWS {
+            py.detach(|| this.render_rows(reusable))
+        } else {
+            this.render_rows(reusable)
+        };
+
+        self.rendered = Some(Rendered {
+            text: PyString::new(py, &out).unbind(),
+            formats: self.formats.clone(),
+            row_spans,
+            reflowed: false,
+            stale: false,
+        });
+        Ok((out, if full { None } else { Some(fresh) }))
+    }
+
+    /// Format every row between the top and bottom borders, copying lines
+    /// from `reusable` where their span is still valid. Large tables are
+    /// split into contiguous chunks of rows formatted on worker threads.
+    #[allow(clippy::type_complexity)]
+    fn render_rows(
+        &self,
+        reusable: Option<(&str, &[Option<Range<usize>>])>,
+    ) -> (
+        String,
+        Vec<Option<Range<usize>>>,
+        Vec<(usize, Range<usize>)>,
+    ) {
+        let row_count = self.cells.len();
+        let widths: Vec<usize> = self.formats.iter().map(|f| f.width).collect();
+        // Every rule is drawn once here and copied wherever it is needed.
+        let borders = &self.border.borders(&widths);
+
+        let workers = self.worker_count();
+        let chunks = if workers == 1 {
+            vec![self.render_chunk(0..row_count, borders, reusable)]
+        } else {
+            let chunk_rows = row_count.div_ceil(workers);
+            std::thread::scope(|scope| {
+                let handles: Vec<_> = (0..row_count)
+                    .step_by(chunk_rows)
+                    .map(|first| {
+                        let rows = first..(first + chunk_rows).min(row_count);
+                        scope.spawn(move || self.render_chunk(rows, borders, reusable))
+                    })
+                    .collect();
+                handles
+                    .into_iter()
+                    .map(|h| h.join().unwrap_or_else(|e| std::panic::resume_unwind(e)))
+                    .collect()
+            })
+        };
+
+        let body: usize = chunks.iter().map(|c| c.text.len()).sum();
+        let mut out = String::with_capacity(body + 4096);
+        let mut line_no = 0;
+        if let Some(top) = &borders.top {
+            out.push_str(top);
+            line_no += 1;
+        }
+
+        let mut row_spans = Vec::with_capacity(row_count);
+        let mut fresh = Vec::new();
+        for chunk in chunks {
+            let base = out.len();
+            let shift = |span: Range<usize>| span.start + base..span.end + base;
+            row_spans.extend(chunk.spans.into_iter().map(|span| Some(shift(span))));
+            fresh.extend(
+                chunk
+                    .fresh
+                    .into_iter()
+                    .map(|(line, span)| (line_no + line, shift(span))),
+            );
+            line_no += chunk.lines;
+            out.push_str(&chunk.text);
+        }
+
+        if self.footer.is_some() {
+            if let Some(rule) = &borders.footer {
+                out.push_str(rule);
+                line_no += 1;
             }
-            if i < col_count - 1 {
-                out.push('┬');
+            let start = out.len();
+            let cells = self
+                .footer_cells
+                .iter()
+                .map(|(cell, w)| (cell.as_str(), *w));
+            push_formatted_row(&mut out, cells, &self.formats, self.border);
+            // Totals change with any row, so the footer always counts as new.
+            fresh.push((line_no, start..out.len()));
+        }
+
+        finish(&mut out, borders);
+        // Without a bottom rule the last line lost its newline, so it can
+        // not be copied into a later render as is.
+        let end = out.len();
+        if let Some(last) = row_spans.last_mut() {
+            if last.as_ref().is_some_and(|span| span.end > end) {
+                *last = None;
             }
         }
-        out.push_str("┐\n");
-
-        // Rows
-        for (row_idx, row) in self.rows.iter().enumerate() {
-            out.push('│');
-            for (j, &w) in col_widths.iter().enumerate() {
-                let cell = row.get(j).map(|s| s.as_str()).unwrap_or("");
-                let visible_w = super::lexer::visible_width(cell);
-                let padding = w - visible_w;
-                out.push(' ');
-                out.push_str(cell);
-                for _ in 0..padding + 1 {
-                    out.push(' ');
+        for (_, span) in &mut fresh {
+            span.end = span.end.min(end);
+        }
+        (out, row_spans, fresh)
+    }
+
+    /// Format the rows in `rows`, each followed by the rule the border style
+    /// draws below it, if any.
+    fn render_chunk(
+        &self,
+        rows: Range<usize>,
+        borders: &Borders,
+        reusable: Option<(&str, &[Option<Range<usize>>])>,
+    ) -> Chunk {
+        let row_count = self.cells.len();
+        let header_after = self.border.header_after(self.header_rows);
+        let rule_len = borders.row.as_ref().map_or(0, String::len);
+        let mut chunk = Chunk {
+            text: String::with_capacity(self.rows_size(rows.clone(), rule_len)),
+            spans: Vec::with_capacity(rows.len()),
+            fresh: Vec::new(),
+            lines: 0,
+        };
+        for r in rows {
+            let out = &mut chunk.text;
+            let start = out.len();
+            match reusable.and_then(|(old, spans)| Some(&old[spans[r].clone()?])) {
+                Some(line) => out.push_str(line),
+                None => {
+                    push_formatted_row(out, self.cells.row(r), &self.formats, self.border);
+                    chunk.fresh.push((chunk.lines, start..out.len()));
                 }
-                if j < col_count - 1 {
-                    out.push('┆');
+            }
+            chunk.lines += out[start..].matches('\n').count();
+            chunk.spans.push(start..out.len());
+
+            if let Some(rule) = borders.after_row(r, row_count, header_after) {
+                out.push_str(rule);
+                chunk.lines += 1;
+            }
+        }
+        chunk
+    }
+
+    /// Write every row in `format`, straight from the cell store, either
+    /// into a returned string or in chunks to `file.write`.
+    fn export(
+        &self,
+        py: Python,
+        format: Format,
+        file: Option<&Bound<'_, PyAny>>,
+    ) -> PyResult<Option<String>> {
+        let write = file.map(|f| f.getattr("write")).transpose()?;
+        let row_count = self.cells.len();
+        let cols = if self.recount {
+            (0..row_count)
+                .map(|r| self.cells.row_len(r))
+                .max()
+                .unwrap_or(0)
+        } else {
+            self.col_widths.len()
+        };
+        let aligns = (0..cols)
+            .map(|c| self.specs.get(c).map_or(Align::Left, |s| s.align))
+            .collect();
+        let (header, first) = match format {
+            Format::JsonLines if self.header_rows > 0 && row_count > 0 => (
+                Some(self.cells.row(0).map(|(text, _)| text).collect()),
+                self.header_rows.min(row_count),
+            ),
+            _ => (None, 0),
+        };
+        let mut exporter = Exporter::new(format, cols, aligns, header);
+
+        let capacity = match write {
+            Some(_) => export::CHUNK_BYTES + 4096,
+            None => self.cells.heap_bytes().0 + row_count * (cols * 3 + 4),
+        };
+        let mut out = String::with_capacity(capacity);
+        for r in first..row_count {
+            exporter.push_row(&mut out, self.cells.row(r).map(|(text, _)| text));
+            if let Some(write) = &write {
+                if out.len() >= export::CHUNK_BYTES {
+                    write.call1((PyString::new(py, &out),))?;
+                    out.clear();
                 }
             }
-            out.push_str("│\n");
-
-            // Row separator (not after last row)
-            if row_idx < self.rows.len() - 1 {
-                out.push('├');
-                for (i, &w) in col_widths.iter().enumerate() {
-                    for _ in 0..w + 2 {
-                        out.push('╌');
-                    }
-                    if i < col_count - 1 {
-                        out.push('┼');
-                    }
+        }
+        match write {
+            Some(write) => {
+                if !out.is_empty() {
+                    write.call1((PyString::new(py, &out),))?;
                 }
-                out.push_str("┤\n");
+                Ok(None)
             }
+            None => Ok(Some(out)),
         }
+    }
 
-        // Bottom border
-        out.push('└');
-        for (i, &w) in col_widths.iter().enumerate() {
-            for _ in 0..w + 2 {
-                out.push('─');
-            }
-            if i < col_count - 1 {
-                out.push('┴');
+    /// Number of threads to format rows on: the `threads` setting (or the
+    /// available parallelism) capped so that each gets a worthwhile share.
+    fn worker_count(&self) -> usize {
+        let threads = match self.threads {
+            0 => std::thread::available_parallelism().map_or(1, |n| n.get()),
+            n => n,
+        };
+        threads.min(self.cells.len() / ROWS_PER_THREAD).max(1)
+    }
+
+    /// Byte length of the lines for `rows`, each followed by a rule of
+    /// `rule_len` bytes. Every line has the same frame; only the cell text
+    /// and its padding vary. Exact unless cells are wrapped or truncated.
+    fn rows_size(&self, rows: Range<usize>, rule_len: usize) -> usize {
+        let style = self.border;
+        let col_count = self.formats.len();
+        let inner: usize = self.formats.iter().map(|f| f.width + 2 * style.pad).sum();
+        let row_frame_bytes = inner
+            + style.left.len()
+            + style.right.len()
+            + col_count.saturating_sub(1) * style.mid.len()
+            + 1;
+        rows.map(|r| {
+            let visible: usize = self.cells.row_widths(r).sum();
+            (self.cells.row_text_len(r) + row_frame_bytes).saturating_sub(visible) + rule_len
+        })
+        .sum()
+    }
+
+    /// Heap bytes of the column widths and the render bookkeeping.
+    fn layout_bytes(&self) -> usize {
+        let cols =
+            self.col_widths.capacity() * std::mem::size_of::<usize>() + self.dirty_cols.capacity();
+        let specs = self.specs.capacity() * std::mem::size_of::<ColumnSpec>()
+            + self.formats.capacity() * std::mem::size_of::<ColumnFormat>();
+        let rendered = self.rendered.as_ref().map_or(0, |r| {
+            r.formats.capacity() * std::mem::size_of::<ColumnFormat>()
+                + r.row_spans.capacity() * std::mem::size_of::<Option<Range<usize>>>()
+        });
+        cols + specs + rendered
+    }
+}
+
+/// The indices selected by the Python slice `start:stop` of a sequence of
+/// length `len`.
+fn slice_range(start: isize, stop: Option<isize>, len: usize) -> Range<usize> {
+    let len = len as isize;
+    let clamp = |i: isize| (if i < 0 { (i + len).max(0) } else { i.min(len) }) as usize;
+    let start = clamp(start);
+    let stop = stop.map_or(len as usize, clamp);
+    start..stop.max(start)
+}
+
+fn parse_width(width: Option<&Bound<'_, PyAny>>) -> PyResult<TableWidth> {
+    let Some(width) = width else {
+        return Ok(TableWidth::Natural);
+    };
+    if width.is_instance_of::<PyString>() {
+        return match width.extract::<String>()?.as_str() {
+            "terminal" => Ok(TableWidth::Terminal),
+            other => Err(PyValueError::new_err(format!(
+                "width must be an int, 'terminal' or None, got '{}'",
+                other
+            ))),
+        };
+    }
+    match width.extract::<usize>()? {
+        0 => Err(PyValueError::new_err("width must be at least 1")),
+        width => Ok(TableWidth::Fixed(width)),
+    }
+}
+
+fn too_large(_: CapacityError) -> PyErr {
+    PyMemoryError::new_err("table text exceeds the 4 GiB storage limit")
+}
+
+/// Ends a table with its bottom rule, or drops the newline after the last
+/// line when the style has none.
+fn finish(out: &mut String, borders: &Borders) {
+    match &borders.bottom {
+        Some(bottom) => out.push_str(bottom),
+        None => {
+            if out.ends_with('\n') {
+                out.pop();
             }
         }
-        out.push('┘');
+    }
+}
+
+/// Appends one `│ a ┆ b │` line in the square style. Cells must already
+/// fit their column; missing cells render as blanks and extra cells are
+/// ignored.
+pub(crate) fn push_row_line<S: AsRef<str>>(
+    out: &mut String,
+    cells: &[S],
+    formats: &[ColumnFormat],
+) {
+    let cells = cells.iter().map(|s| {
+        let cell = s.as_ref();
+        (cell, lexer::visible_width(cell))
+    });
+    push_measured_row(out, cells, formats, &borders::SQUARE);
+}
+
+/// Like [`push_row_line`], but for `(text, visible width)` pairs measured
+/// beforehand and laid out by `formats`, framed by `style`.
+fn push_measured_row<'a>(
+    out: &mut String,
+    cells: impl IntoIterator<Item = (&'a str, usize)>,
+    formats: &[ColumnFormat],
+    style: &BoxStyle,
+) {
+    let mut cells = cells.into_iter();
+    out.push_str(style.left);
+    for (j, format) in formats.iter().enumerate() {
+        if j > 0 {
+            out.push_str(style.mid);
+        }
+        let (cell, cell_w) = cells.next().unwrap_or(("", 0));
+        // Styles without a right border leave no trailing spaces.
+        let open_end = style.right.is_empty() && j == formats.len() - 1;
+        push_cell(out, cell, cell_w, format, style.pad, open_end);
+    }
+    out.push_str(style.right);
+    out.push('\n');
+}
+
+/// Appends a row that may span several lines: cells wider than their
+/// column are wrapped or truncated according to its format.
+fn push_formatted_row<'a, I>(out: &mut String, cells: I, formats: &[ColumnFormat], style: &BoxStyle)
+where
+    I: Iterator<Item = (&'a str, usize)> + Clone,
+{
+    let fits = cells.clone().zip(formats).all(|((_, w), f)| w <= f.width);
+    if fits {
+        push_measured_row(out, cells, formats, style);
+        return;
+    }
+
+    let cells = cells.chain(std::iter::repeat(("", 0)));
+    let parts: Vec<Vec<String>> = formats
+        .iter()
+        .zip(cells)
+        .map(|(format, (cell, w))| match format.overflow {
+            _ if w <= format.width => vec![cell.to_string()],
+            Overflow::Truncate => vec![lexer::truncate_visible(cell, format.width)],
+            Overflow::Wrap => lexer::wrap_visible(cell, format.width),
+        })
+        .collect();
+
+    let height = parts.iter().map(Vec::len).max().unwrap_or(1);
+    for line in 0..height {
+        let cells = parts.iter().map(|p| {
+            let cell = p.get(line).map_or("", String::as_str);
+            (cell, lexer::visible_width(cell))
+        });
+        push_measured_row(out, cells, formats, style);
+    }
+}
 
-        out
+/// Appends a cell with `pad` spaces on either side, aligned by `format`.
+/// With `open_end`, the spaces after it are left out.
+fn push_cell(
+    out: &mut String,
+    cell: &str,
+    cell_w: usize,
+    format: &ColumnFormat,
+    pad: usize,
+    open_end: bool,
+) {
+    let room = format.width.saturating_sub(cell_w);
+    let left = format.left_pad(cell, cell_w);
+    out.extend(std::iter::repeat_n(' ', pad + left));
+    out.push_str(cell);
+    if !open_end {
+        out.extend(std::iter::repeat_n(' ', room - left + pad));
     }
 }
@@ -0,0 +1,329 @@
+use pyo3::exceptions::{PyIndexError, PyMemoryError};
+use pyo3::prelude::*;
+use pyo3::types::{PyDict, PyIterator, PyList, PyTuple};
+
+use crate::lexer;
+
+/// Trees with at least this many nodes are rendered with the GIL released.
+const DETACH_MIN_NODES: usize = 4096;
+
+/// Data still to be added by `Tree.extend`.
+enum Pending<'py> {
+    /// A value to add below a node.
+    Value(Bound<'py, PyAny>, u32),
+    /// The rest of a list or tuple: the node its items go below, and the
+    /// one added last, which a nested list or tuple goes below.
+    Items(Bound<'py, PyIterator>, u32, u32),
+}
+
+fn is_sequence(value: &Bound<'_, PyAny>) -> bool {
+    value.is_instance_of::<PyList>() || value.is_instance_of::<PyTuple>()
+}
+
+/// Marks a missing link between nodes.
+const NONE: u32 = u32::MAX;
+
+/// Guide segments, each four columns wide.
+const BRANCH: &str = "├── ";
+const LAST: &str = "└── ";
+const PIPE: &str = "│   ";
+const SPACE: &str = "    ";
+
+/// One node: its label's span in the text arena and links to its children
+/// and next sibling, so appending a child is O(1).
+#[derive(Clone, Copy)]
+struct Node {
+    start: u32,
+    len: u32,
+    first_child: u32,
+    last_child: u32,
+    next: u32,
+    children: u32,
+}
+
+/// Prints a hierarchy with guide lines, e.g. a dependency tree.
+///
+/// Nodes are kept in a flat arena with their styled labels in one string,
+/// and rendering walks it without recursion, so trees with hundreds of
+/// thousands of nodes are cheap to build and print.
+#[pyclass]
+pub struct Tree {
+    text: String,
+    nodes: Vec<Node>,
+    markup: bool,
+}
+
+/// A node whose children are being printed.
+struct Frame {
+    node: u32,
+    /// Next child to print.
+    next: u32,
+    /// Children printed so far.
+    shown: usize,
+    /// Length of the guide prefix before this node's segment was added.
+    base: usize,
+}
+
+#[pymethods]
+impl Tree {
+    /// Create a tree whose root shows `label`. With `markup=False` labels
+    /// are printed as given instead of going through the markup lexer.
+    #[new]
+    #[pyo3(signature = (label, markup=true))]
+    fn py_new(label: &str, markup: bool) -> PyResult<Self> {
+        let mut tree = Tree {
+            text: String::new(),
+            nodes: Vec::new(),
+            markup,
+        };
+        tree.push_node(label, NONE)?;
+        Ok(tree)
+    }
+
+    /// Add a node below `parent` (the root by default) and return its id.
+    #[pyo3(signature = (label, parent=0))]
+    fn add(&mut self, label: &str, parent: usize) -> PyResult<usize> {
+        let parent = self.node_index(parent)?;
+        self.push_node(label, parent).map(|id| id as usize)
+    }
+
+    /// Add nested data below `parent` (the root by default).
+    ///
+    /// A dict adds one node per key, with the value as that node's
+    /// children. A list or tuple adds its items in order, and a list or
+    /// tuple nested directly in one holds the children of the item before
+    /// it, as in `["src", ("main.rs", "lib.rs"), "README.md"]`. Strings and any other
+    /// values become leaves labelled with `str()`; `None` adds nothing.
+    #[pyo3(signature = (data, parent=0))]
+    fn extend(&mut self, data: &Bound<'_, PyAny>, parent: usize) -> PyResult<()> {
+        let parent = self.node_index(parent)?;
+        // Depth-first with an explicit stack, so each node's children are
+        // added in input order without recursing on deep data.
+        let mut stack = vec![Pending::Value(data.clone(), parent)];
+        while let Some(pending) = stack.pop() {
+            match pending {
+                Pending::Value(data, parent) => {
+                    if let Ok(dict) = data.cast::<PyDict>() {
+                        let mut values = Vec::new();
+                        for (key, value) in dict {
+                            let id = self.push_value(&key, parent)?;
+                            values.push(Pending::Value(value, id));
+                        }
+                        stack.extend(values.into_iter().rev());
+                    } else if is_sequence(&data) {
+                        stack.push(Pending::Items(data.try_iter()?, parent, parent));
+                    } else if !data.is_none() {
+                        self.push_value(&data, parent)?;
+                    }
+                }
+                Pending::Items(mut items, parent, mut previous) => {
+                    while let Some(item) = items.next() {
+                        let item = item?;
+                        if is_sequence(&item) {
+                            // Finish the nested items before the rest of
+                            // this sequence.
+                            stack.push(Pending::Items(items, parent, previous));
+                            stack.push(Pending::Items(item.try_iter()?, previous, previous));
+                            break;
+                        } else if let Ok(dict) = item.cast::<PyDict>() {
+                            let mut values = Vec::new();
+                            for (key, value) in dict {
+                                previous = self.push_value(&key, parent)?;
+                                values.push(Pending::Value(value, previous));
+                            }
+                            // The values come before a list that follows
+                            // the dict, which also nests under its last key.
+                            stack.push(Pending::Items(items, parent, previous));
+                            stack.extend(values.into_iter().rev());
+                            break;
+                        } else if !item.is_none() {
+                            previous = self.push_value(&item, parent)?;
+                        }
+                    }
+                }
+            }
+        }
+        Ok(())
+    }
+
+    /// Render the tree. `max_depth` limits how many levels below the root
+    /// are shown and `max_children` how many children of each node; what
+    /// is left out is summarised as `… N more`, so the output stays small
+    /// however large the tree is.
+    #[pyo3(signature = (max_depth=None, max_children=None))]
+    fn to_string(
+        &self,
+        py: Python,
+        max_depth: Option<usize>,
+        max_children: Option<usize>,
+    ) -> String {
+        let max_depth = max_depth.unwrap_or(usize::MAX);
+        let max_children = max_children.unwrap_or(usize::MAX);
+        if self.nodes.len() >= DETACH_MIN_NODES {
+            py.detach(|| self.render(max_depth, max_children))
+        } else {
+            self.render(max_depth, max_children)
+        }
+    }
+
+    fn __len__(&self) -> usize {
+        self.nodes.len()
+    }
+}
+
+impl Tree {
+    fn node_index(&self, id: usize) -> PyResult<u32> {
+        if id >= self.nodes.len() {
+            return Err(PyIndexError::new_err("node id out of range"));
+        }
+        Ok(id as u32)
+    }
+
+    /// Add a node labelled with `str(value)`.
+    fn push_value(&mut self, value: &Bound<'_, PyAny>, parent: u32) -> PyResult<u32> {
+        self.push_node(value.str()?.to_str()?, parent)
+    }
+
+    /// Store a node and link it in as the last child of `parent`.
+    fn push_node(&mut self, label: &str, parent: u32) -> PyResult<u32> {
+        let styled;
+        let label = if self.markup {
+            styled = lexer::apply_styles(label);
+            styled.as_str()
+        } else {
+            label
+        };
+        let start = self.text.len();
+        let id = self.nodes.len();
+        if start + label.len() > NONE as usize || id >= NONE as usize {
+            return Err(PyMemoryError::new_err(
+                "tree exceeds the 4 GiB storage limit",
+            ));
+        }
+        self.text.push_str(label);
+        let id = id as u32;
+        self.nodes.push(Node {
+            start: start as u32,
+            len: label.len() as u32,
+            first_child: NONE,
+            last_child: NONE,
+            next: NONE,
+            children: 0,
+        });
+        if parent != NONE {
+            let p = &mut self.nodes[parent as usize];
+            let previous = p.last_child;
+            p.last_child = id;
+            p.children += 1;
+            if previous == NONE {
+                p.first_child = id;
+            } else {
+                self.nodes[previous as usize].next = id;
+            }
+        }
+        Ok(id)
+    }
+
+    fn label(&self, node: u32) -> &str {
+        let n = &self.nodes[node as usize];
+        &self.text[n.start as usize..(n.start + n.len) as usize]
+    }
+
+    /// Draw the tree depth-first with an explicit stack, showing nodes up to
+    /// `max_depth` levels below the root and `max_children` per parent.
+    fn render(&self, max_depth: usize, max_children: usize) -> String {
+        let mut out = String::with_capacity(self.text.len() + self.nodes.len() * 24);
+        let mut prefix = String::new();
+        push_label(&mut out, "", "", self.label(0));
+
+        let mut stack: Vec<Frame> = Vec::new();
+        self.open(&mut out, &mut stack, &prefix, 0, 0, max_depth);
+        while let Some(frame) = stack.last_mut() {
+            let parent = self.nodes[frame.node as usize];
+            if frame.next == NONE {
+                prefix.truncate(frame.base);
+                stack.pop();
+                continue;
+            }
+            if frame.shown == max_children {
+                let hidden = parent.children as usize - frame.shown;
+                push_more(&mut out, &prefix, hidden);
+                prefix.truncate(frame.base);
+                stack.pop();
+                continue;
+            }
+
+            let node = frame.next;
+            frame.next = self.nodes[node as usize].next;
+            frame.shown += 1;
+            let last = frame.next == NONE;
+            let (guide, below) = if last { (LAST, SPACE) } else { (BRANCH, PIPE) };
+            push_label(&mut out, &prefix, guide, self.label(node));
+
+            let base = prefix.len();
+            prefix.push_str(below);
+            if !self.open(&mut out, &mut stack, &prefix, base, node, max_depth) {
+                prefix.truncate(base);
+            }
+        }
+        out.pop();
+        out
+    }
+
+    /// Start printing the children of `node`, whose guide segment starts at
+    /// byte `base` of `prefix`: push a frame for them, or summarise them
+    /// when `node` is at the depth limit. Returns whether a frame was
+    /// pushed.
+    fn open(
+        &self,
+        out: &mut String,
+        stack: &mut Vec<Frame>,
+        prefix: &str,
+        base: usize,
+        node: u32,
+        max_depth: usize,
+    ) -> bool {
+        let n = &self.nodes[node as usize];
+        if n.children == 0 {
+            return false;
+        }
+        if stack.len() >= max_depth {
+            push_more(out, prefix, n.children as usize);
+            return false;
+        }
+        stack.push(Frame {
+            node,
+            next: n.first_child,
+            shown: 0,
+            base,
+        });
+        true
+    }
+}
+
+/// Appends a node's line; further lines of a multi-line label continue
+/// under the guide.
+fn push_label(out: &mut String, prefix: &str, guide: &str, label: &str) {
+    let below = if guide == BRANCH {
+        PIPE
+    } else if guide.is_empty() {
+        ""
+    } else {
+        SPACE
+    };
+    for (i, line) in label.split('\n').enumerate() {
+        out.push_str(prefix);
+        out.push_str(if i == 0 { guide } else { below });
+        out.push_str(line);
+        out.push('\n');
+    }
+}
+
+/// Appends the line standing in for `hidden` nodes that are not shown.
+fn push_more(out: &mut String, prefix: &str, hidden: usize) {
+    out.push_str(prefix);
+    out.push_str(LAST);
+    out.push_str("\x1b[2m… ");
+    out.push_str(&hidden.to_string());
+    out.push_str(" more\x1b[0m\n");
+}
@@ -8,6 +8,30 @@ import unittest
 from turboterm.cli import Argument, Option, _Argument, _Option, command
 
 
+def run_script(script, *args, env=None, stdin="", cwd=None):
+    """Run `script`, Python source or the path of a file, with `args` in a
+    fresh interpreter, so that it starts with empty command registries.
+    `env` is added to the environment. Returns (stdout, stderr, returncode).
+    """
+    import os
+    import subprocess
+
+    if isinstance(script, os.PathLike):
+        command = [sys.executable, os.fspath(script), *args]
+    else:
+        command = [sys.executable, "-c", script, *args]
+    result = subprocess.run(
+        command,
+        input=stdin,
+        capture_output=True,
+        text=True,
+        timeout=10,
+        cwd=cwd,
+        env={**os.environ, **(env or {})},
+    )
+    return result.stdout, result.stderr, result.returncode
+
+
 class TestArgumentOption(unittest.TestCase):
     """Test the Argument and Option factory functions."""
 
@@ -80,6 +104,63 @@ class TestCommandDecorator(unittest.TestCase):
         def something():
             pass
 
+    def test_parameters_match_signature(self):
+        """The fast path reads the same parameters as inspect.signature()."""
+        import functools
+        import inspect
+
+        from turboterm.cli import _parameters
+
+        def mixed(a, b: int, c=1, /, d: str = "x", *, e, f: bool = False):
+            local = 1
+            return local
+
+        @functools.wraps(mixed)
+        def wrapped(*args, **kwargs):
+            return mixed(*args, **kwargs)
+
+        def variadic(a: int, *rest, k=2, **extra):
+            pass
+
+        class Handler:
+            def method(self, n: int = 3):
+                pass
+
+        for func in (mixed, wrapped, variadic, Handler().method, lambda: None):
+            expected = [
+                (name, param.annotation, param.default)
+                for name, param in inspect.signature(func).parameters.items()
+            ]
+            self.assertEqual(_parameters(func), expected)
+
+    def test_param_spec_tuples(self):
+        from turboterm.cli import _param_spec
+
+        self.assertEqual(
+            _param_spec("port", int, Option(["--port"], help="Port", default=80)),
+            ("port", ["--port"], "Port", int, False, 80, None, False, None),
+        )
+        self.assertEqual(
+            _param_spec("verbose", bool, Option(["-v"])),
+            ("verbose", ["-v"], "", bool, False, False, None, False, None),
+        )
+        self.assertEqual(
+            _param_spec("name", str, Argument(help="Name")),
+            ("name", None, "Name", str, True, None, None, False, None),
+        )
+        self.assertEqual(
+            _param_spec("count", int, 1),
+            ("count", None, "", int, False, 1, None, False, None),
+        )
+        self.assertEqual(
+            _param_spec("verbose", int, Option(["-v"], count=True)),
+            ("verbose", ["-v"], "", int, False, 0, None, True, None),
+        )
+        self.assertEqual(
+            _param_spec("ratio", float, Argument(min=0, max=1)),
+            ("ratio", None, "", float, True, None, None, False, (0, 1)),
+        )
+
 
 class TestCliIntegration(unittest.TestCase):
     """Integration tests using subprocess to get a clean registry per test."""
@@ -422,6 +503,30 @@ run()
         self.assertEqual(rc, 0)
         self.assertEqual(stdout.strip(), "Hello, World!")
 
+    def test_keyword_only_and_wrapped(self):
+        stdout, _, rc = self._run_cli_script("""
+import functools
+import sys
+from turboterm.cli import Option, command, run
+
+def logged(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        print("wrapped")
+        return func(*args, **kwargs)
+    return wrapper
+
+@command()
+@logged
+def greet(name: str, *, times: int = Option(["--times", "-t"], default=1)):
+    print(name * times)
+
+sys.argv = ["app", "greet", "ab", "-t", "2"]
+run()
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.splitlines(), ["wrapped", "abab"])
+
 
 class TestStyledHelpText(unittest.TestCase):
     """Markup in help= strings and docstrings is rendered to ANSI in --help."""
@@ -532,6 +637,971 @@ run()
         self.assertIn("\x1b[32m", stdout)  # green
         self.assertIn("\x1b[31m", stdout)  # red
 
+    def test_help_subcommand(self):
+        stdout, _, rc = self._run_cli_script("""
+import sys
+from turboterm.cli import command, Argument, run
+
+@command()
+def greet(name: str = Argument(help="[bold]Name[/bold] to greet")):
+    '''Say hello.'''
+
+@command()
+def other():
+    '''[red]Unrelated[/red] command.'''
+
+sys.argv = ["app", "help", "greet"]
+run()
+""")
+        self.assertEqual(rc, 0)
+        self.assertIn("Say hello", stdout)
+        self.assertIn("\x1b[1mName", stdout)
+        self.assertIn("Usage: app greet <name>", stdout)
+        self.assertNotIn("Unrelated", stdout)
+
+
+class TestApp(unittest.TestCase):
+    """An App keeps a compiled parser across parse_args() and dispatch() calls."""
+
+    def test_parse_args_does_not_call(self):
+        stdout, _, rc = run_script("""
+from turboterm.cli import App, Argument, Option
+
+app = App()
+
+@app.command()
+def add(x: int = Argument(help="A"), y: int = Option(["-y"], default=2)):
+    print("called")
+
+print(app.parse_args(["add", "40", "-y", "3"]))
+print(app.parse_args(["add", "1"]))
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(
+            stdout.splitlines(),
+            ["('add', {'x': 40, 'y': 3})", "('add', {'x': 1, 'y': 2})"],
+        )
+
+    def test_dispatch_returns_result(self):
+        stdout, _, rc = run_script("""
+from turboterm.cli import App
+
+app = App()
+
+@app.command()
+def double(n: int):
+    return n * 2
+
+print([app.dispatch(["double", str(i)]) for i in range(3)])
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.strip(), "[0, 2, 4]")
+
+    def test_register_invalidates_parser(self):
+        stdout, _, rc = run_script("""
+from turboterm.cli import App
+
+app = App()
+
+@app.command()
+def first():
+    return 1
+
+print(app.dispatch(["first"]))
+
+@app.command()
+def second():
+    return 2
+
+print(app.dispatch(["second"]))
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.split(), ["1", "2"])
+
+    def test_usage_error_raises_value_error(self):
+        stdout, _, rc = run_script("""
+from turboterm.cli import App
+
+app = App()
+
+@app.command()
+def ping():
+    return "pong"
+
+for argv in (["nosuchcmd"], ["ping", "extra"]):
+    try:
+        app.parse_args(argv)
+    except ValueError:
+        print("error")
+print(app.dispatch(["ping"]))
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.split(), ["error", "error", "pong"])
+
+    def test_help_returns_none(self):
+        stdout, _, rc = run_script("""
+from turboterm.cli import App
+
+app = App()
+
+@app.command()
+def ping():
+    '''Check the connection.'''
+
+print(app.parse_args(["ping", "--help"]))
+""")
+        self.assertEqual(rc, 0)
+        self.assertIn("Check the connection", stdout)
+        self.assertTrue(stdout.rstrip().endswith("None"))
+
+    def test_help_goes_through_sys_stdout(self):
+        stdout, _, rc = run_script("""
+import contextlib, io
+from turboterm.cli import App
+
+app = App()
+
+@app.command()
+def ping():
+    '''Check the connection.'''
+
+for argv in (["ping", "--help"], ["--help"]):
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        result = app.dispatch(argv)
+    print(result, "Check the connection" in buffer.getvalue())
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.splitlines(), ["None True", "None True"])
+
+    def test_apps_are_independent(self):
+        stdout, _, rc = run_script("""
+from turboterm.cli import App, command, default_app
+
+first, second = App(), App()
+
+@first.command("greet")
+def hello():
+    return "hello"
+
+@second.command("greet")
+def hi():
+    return "hi"
+
+@command()
+def shared():
+    return "default"
+
+print(first.dispatch(["greet"]), second.dispatch(["greet"]))
+print(default_app.dispatch(["shared"]))
+for app in (first, second):
+    try:
+        app.parse_args(["shared"])
+    except ValueError:
+        print("error")
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.split(), ["hello", "hi", "default", "error", "error"])
+
+    def test_run_uses_own_commands(self):
+        stdout, _, rc = run_script("""
+import sys
+from turboterm.cli import App, command
+
+app = App()
+
+@app.command()
+def hello(name: str):
+    print(f"hello {name}")
+
+@command()
+def other():
+    print("default app")
+
+sys.argv = ["prog", "hello", "world"]
+app.run()
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.strip(), "hello world")
+
+    def test_nested_dispatch(self):
+        stdout, _, rc = run_script("""
+from turboterm.cli import App
+
+app = App()
+
+@app.command()
+def inner(n: int):
+    return n + 1
+
+@app.command()
+def outer(n: int):
+    @app.command()
+    def late():
+        return "late"
+    return app.dispatch(["inner", str(n)]) * 10
+
+print(app.dispatch(["outer", "4"]), app.dispatch(["late"]))
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.split(), ["50", "late"])
+
+    def test_concurrent_dispatch_and_register(self):
+        stdout, stderr, rc = run_script("""
+import threading
+from turboterm.cli import App, Option
+
+app = App()
+
+@app.command()
+def scale(n: int, by: int = Option(["--by"], default=1)):
+    return n * by
+
+errors = []
+
+def dispatcher(seed):
+    for i in range(300):
+        args = ["scale", str(i), "--by", str(seed)]
+        if app.dispatch(args) != i * seed:
+            errors.append((seed, i))
+
+def registrar():
+    for i in range(100):
+        app.command(f"extra-{i}")(lambda i=i: i)
+
+threads = [threading.Thread(target=dispatcher, args=(s,)) for s in range(16)]
+threads.append(threading.Thread(target=registrar))
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print(errors)
+print(sum(app.dispatch([f"extra-{i}"]) for i in range(100)))
+""")
+        self.assertEqual(rc, 0, stderr)
+        self.assertEqual(stdout.split(), ["[]", "4950"])
+
+
+class TestRegisterLazy(unittest.TestCase):
+    """register_lazy() imports the command's module only on dispatch."""
+
+    SETUP = """
+import sys, tempfile, pathlib
+from turboterm.cli import Argument, Option, default_app, register_lazy, run
+
+pkg = pathlib.Path(tempfile.mkdtemp())
+(pkg / "lazy_cmds.py").write_text(
+    "print('imported')\\n"
+    "def deploy(target, port=443):\\n"
+    "    print(f'deploy {target}:{port}')\\n"
+    "    return port\\n"
+)
+sys.path.insert(0, str(pkg))
+register_lazy(
+    "deploy",
+    "lazy_cmds:deploy",
+    doc="[bold]Deploy[/bold] the project.",
+    params=[
+        ("target", str, Argument(help="Where to deploy")),
+        ("port", int, Option(["--port", "-p"], default=443)),
+    ],
+)
+"""
+
+    def _run_cli_script(self, script, *args, **kwargs):
+        return run_script(self.SETUP + script, *args, **kwargs)
+
+    def test_dispatch_imports_module(self):
+        stdout, _, rc = self._run_cli_script("""
+sys.argv = ["app", "deploy", "prod", "-p", "8080"]
+run()
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.splitlines(), ["imported", "deploy prod:8080"])
+
+    def test_help_and_parse_do_not_import(self):
+        stdout, _, rc = self._run_cli_script("""
+print(default_app.parse_args(["deploy", "prod"]))
+default_app.parse_args(["deploy", "--help"])
+print("lazy_cmds" in sys.modules)
+""")
+        self.assertEqual(rc, 0)
+        self.assertIn("('deploy', {'target': 'prod', 'port': 443})", stdout)
+        self.assertIn("\x1b[1mDeploy", stdout)
+        self.assertIn("Where to deploy", stdout)
+        self.assertNotIn("imported", stdout)
+        self.assertTrue(stdout.rstrip().endswith("False"))
+
+    def test_module_imported_once(self):
+        stdout, _, rc = self._run_cli_script("""
+app = default_app
+print(app.dispatch(["deploy", "a"]) + app.dispatch(["deploy", "b", "-p", "1"]))
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.count("imported"), 1)
+        self.assertTrue(stdout.rstrip().endswith("444"))
+
+    def test_invalid_target(self):
+        stdout, _, rc = self._run_cli_script("""
+try:
+    register_lazy("broken", "no_colon_here")
+except ValueError as e:
+    print(e)
+""")
+        self.assertEqual(rc, 0)
+        self.assertIn("module:function", stdout)
+
+    def test_missing_module_raises_on_dispatch(self):
+        _, stderr, rc = self._run_cli_script("""
+register_lazy("gone", "no_such_module_xyz:main")
+default_app.parse_args(["gone"])
+default_app.dispatch(["gone"])
+""")
+        self.assertNotEqual(rc, 0)
+        self.assertIn("ModuleNotFoundError", stderr)
+
+
+class TestManifestCache(unittest.TestCase):
+    """run(modules=...) answers help and usage errors from a cached manifest."""
+
+    COMMANDS = """
+print("imported")
+from turboterm.cli import Argument, Option, command
+
+@command()
+def deploy(
+    target: str = Argument(help="Where to deploy"),
+    port: int = Option(["--port", "-p"], default=443),
+):
+    '''Deploy the project.'''
+    print(f"deploy {target}:{port}")
+
+@command()
+def custom(value: str = Option(["--value"], default=("not", "json"))):
+    '''Has a default the manifest cannot store.'''
+    print(value)
+"""
+
+    MAIN = """
+from turboterm.cli import run
+
+run(modules=["mf_cmds"], cache="manifest.json")
+"""
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "mf_cmds.py").write_text(self.COMMANDS)
+        (self.root / "main.py").write_text(self.MAIN)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _run(self, *args):
+        return run_script(self.root / "main.py", *args, cwd=self.root)
+
+    def test_help_from_cache(self):
+        stdout, _, rc = self._run("--help")
+        self.assertEqual(rc, 0)
+        self.assertIn("imported", stdout)
+        self.assertTrue((self.root / "manifest.json").exists())
+
+        for args in (["--help"], ["deploy", "--help"]):
+            stdout, _, rc = self._run(*args)
+            self.assertEqual(rc, 0)
+            self.assertNotIn("imported", stdout)
+            self.assertIn("Deploy the project", stdout)
+        self.assertIn("Where to deploy", stdout)
+
+    def test_usage_error_from_cache(self):
+        self._run("--help")
+        stdout, stderr, rc = self._run("deploy", "--port", "x")
+        self.assertNotEqual(rc, 0)
+        self.assertNotIn("imported", stdout)
+        self.assertIn("<target>", stderr)
+
+    def test_dispatch_imports_selected_module(self):
+        self._run("--help")
+        stdout, _, rc = self._run("deploy", "prod", "-p", "80")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.splitlines(), ["imported", "deploy prod:80"])
+
+    def test_uncacheable_command_imports_modules(self):
+        self._run("--help")
+        stdout, _, rc = self._run("custom")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.splitlines(), ["imported", "('not', 'json')"])
+
+    def test_stale_cache_is_rebuilt(self):
+        self._run("--help")
+        with open(self.root / "mf_cmds.py", "a") as f:
+            f.write("\n@command()\ndef added():\n    '''A new command.'''\n")
+        stdout, _, rc = self._run("--help")
+        self.assertEqual(rc, 0)
+        self.assertIn("imported", stdout)
+        self.assertIn("A new command", stdout)
+
+        stdout, _, rc = self._run("--help")
+        self.assertNotIn("imported", stdout)
+        self.assertIn("A new command", stdout)
+
+    def test_generic_types_round_trip(self):
+        import json
+        import typing
+
+        from turboterm import _manifest
+
+        for ann in (
+            int,
+            list[int],
+            typing.Literal["fast", "slow"],
+            int | None,
+            list[str] | None,
+        ):
+            path = json.loads(json.dumps(_manifest._type_path(ann)))
+            self.assertEqual(_manifest._resolve_type(path), ann)
+
+
+class TestNativeTypes(unittest.TestCase):
+    """Values are converted and validated by clap before the command runs."""
+
+    SETUP = """
+import enum, sys
+from pathlib import Path
+from typing import Literal
+from turboterm.cli import Argument, Option, command, default_app
+
+class Color(enum.Enum):
+    RED = "red"
+    GREEN = "green"
+
+@command()
+def build(
+    files: list[Path] = Argument(help="Files"),
+    port: int = Option(["--port", "-p"], default=443, min=1, max=65535),
+    ratio: float = Option(["--ratio"], default=0.5, min=0, max=1),
+    tag: list[int] = Option(["--tag", "-t"], default=[]),
+    verbose: int = Option(["--verbose", "-v"], count=True),
+    color: Color = Option(["--color"], default=Color.RED),
+    mode: Literal["fast", "slow"] = Option(["--mode"], default="fast"),
+    limit: int | None = Option(["--limit"], default=None),
+):
+    pass
+
+@command()
+def toggle(on: bool, label: str = Argument(default="x")):
+    pass
+
+app = default_app
+"""
+
+    def _run_cli_script(self, script, *args, **kwargs):
+        return run_script(self.SETUP + script, *args, **kwargs)
+
+    def test_native_values(self):
+        stdout, _, rc = self._run_cli_script("""
+_, kwargs = app.parse_args(
+    ["build", "a.txt", "b.txt", "-p", "80", "--ratio", "0.25", "-t", "1",
+     "--tag", "2", "-vvv", "--color", "GREEN", "--mode", "slow", "--limit", "5"]
+)
+print([type(f).__name__.endswith("Path") for f in kwargs["files"]])
+for name in ("port", "ratio", "tag", "verbose", "color", "mode", "limit"):
+    print(name, repr(kwargs[name]))
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(
+            stdout.splitlines(),
+            [
+                "[True, True]",
+                "port 80",
+                "ratio 0.25",
+                "tag [1, 2]",
+                "verbose 3",
+                "color <Color.GREEN: 'green'>",
+                "mode 'slow'",
+                "limit 5",
+            ],
+        )
+
+    def test_defaults(self):
+        stdout, _, rc = self._run_cli_script("""
+_, kwargs = app.parse_args(["build", "a.txt"])
+print(kwargs["port"], kwargs["tag"], kwargs["verbose"], kwargs["color"])
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.strip(), "443 [] 0 Color.RED")
+
+    def test_unbounded_ints_have_any_size(self):
+        stdout, _, rc = self._run_cli_script("""
+argv = ["build", "a", "--limit", str(2**64), "-t", "-1_000", "-t", "+7"]
+_, kwargs = app.parse_args(argv)
+print(kwargs["limit"] == 2**64, kwargs["tag"])
+for value in ("1__0", "1e3", "_1"):
+    try:
+        app.parse_args(["build", "a", "--limit", value])
+    except ValueError as e:
+        print(str(e).splitlines()[0])
+""")
+        self.assertEqual(rc, 0)
+        lines = stdout.splitlines()
+        self.assertEqual(lines[0], "True [-1000, 7]")
+        self.assertEqual(len(lines), 4)
+        for line, value in zip(lines[1:], ("1__0", "1e3", "_1"), strict=True):
+            self.assertIn(f"'{value}'", line)
+
+    def test_bool_values(self):
+        stdout, _, rc = self._run_cli_script("""
+for value in ("yes", "no", "true", "0"):
+    print(app.parse_args(["toggle", value])[1]["on"])
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.splitlines(), ["True", "False", "True", "False"])
+
+    def test_invalid_values(self):
+        stdout, _, rc = self._run_cli_script("""
+for argv in (
+    ["build", "a", "-p", "70000"],
+    ["build", "a", "--ratio", "2"],
+    ["build", "a", "--color", "green"],
+    ["build", "a", "--mode", "medium"],
+    ["build", "a", "-t", "x"],
+    ["toggle", "maybe"],
+):
+    try:
+        app.parse_args(argv)
+    except ValueError as e:
+        print(str(e).splitlines()[0])
+""")
+        self.assertEqual(rc, 0)
+        lines = stdout.splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertIn("70000 is not in 1..=65535", lines[0])
+        self.assertIn("2 is not in 0..=1", lines[1])
+        self.assertIn("'green'", lines[2])
+        self.assertIn("'medium'", lines[3])
+        self.assertIn("'x'", lines[4])
+        self.assertIn("'maybe'", lines[5])
+
+    def test_choices_in_help_and_completion(self):
+        stdout, _, rc = self._run_cli_script("""
+app.parse_args(["build", "--help"])
+print(app.complete(["build", "--color"], "G"))
+""")
+        self.assertEqual(rc, 0)
+        self.assertIn("possible values: RED, GREEN", stdout)
+        self.assertIn("['GREEN']", stdout)
+
+    def test_enum_choices_use_member_names(self):
+        stdout, _, rc = self._run_cli_script("""
+class Level(enum.IntEnum):
+    LOW = 1
+    HIGH = 2
+
+@command()
+def tune(level: Level):
+    pass
+
+print(app.parse_args(["tune", "HIGH"]))
+print(app.complete(["tune"], ""))
+try:
+    app.parse_args(["tune", "2"])
+except ValueError as e:
+    print(str(e).splitlines()[0])
+""")
+        self.assertEqual(rc, 0)
+        lines = stdout.splitlines()
+        self.assertEqual(lines[0], "('tune', {'level': <Level.HIGH: 2>})")
+        self.assertEqual(lines[1], "['LOW', 'HIGH']")
+        self.assertIn("'2'", lines[2])
+
+    def test_custom_callable_fallback(self):
+        stdout, _, rc = self._run_cli_script("""
+def upper(text):
+    return text.upper()
+
+@command()
+def shout(word: upper):
+    pass
+
+print(app.parse_args(["shout", "hi"]))
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.strip(), "('shout', {'word': 'HI'})")
+
+    def test_invalid_declarations(self):
+        stdout, _, rc = self._run_cli_script("""
+def bounded_text(name: str = Argument(min=1)):
+    pass
+
+def list_first(names: list[str], last: str):
+    pass
+
+for func in (bounded_text, list_first):
+    try:
+        command()(func)
+    except ValueError as e:
+        print(e)
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(
+            stdout.splitlines(),
+            [
+                "parameter 'name': min and max need an int or float type",
+                "parameter 'names': only the last positional argument can take a list",
+            ],
+        )
+
+
+class TestCompletion(unittest.TestCase):
+    """Shell completion from the registry, without dispatching."""
+
+    SETUP = """
+import os, sys
+from turboterm.cli import Argument, Option, command, default_app, run
+
+calls = []
+
+def environments(prefix):
+    calls.append(prefix)
+    return ["production", "preview", "staging"]
+
+def never(prefix):
+    raise AssertionError("wrong completer called")
+
+def ports(prefix):
+    return [80, 443, 8080]
+
+@command()
+def deploy(
+    target: str = Argument(help="Target", complete=environments),
+    tag: str = Argument(help="Tag", default="latest", complete=never),
+    port: int = Option(["--port", "-p"], default=443, complete=ports),
+    region: str = Option(["--region"], default="eu", complete="json:loads"),
+    verbose: bool = Option(["--verbose", "-v"]),
+):
+    print("dispatched")
+
+@command()
+def destroy():
+    pass
+
+app = default_app
+"""
+
+    def _run_cli_script(self, script, *args, **kwargs):
+        return run_script(self.SETUP + script, *args, **kwargs)
+
+    def test_command_names_and_flags(self):
+        stdout, _, rc = self._run_cli_script("""
+print(app.complete([], "de"))
+print(app.complete([], ""))
+print(app.complete(["deploy"], "--"))
+print(app.complete(["deploy", "prod"], "-"))
+print(app.complete(["help"], "dep"))
+print(app.complete(["nosuchcmd"], ""))
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(
+            stdout.splitlines(),
+            [
+                "['deploy', 'destroy']",
+                "['deploy', 'destroy', 'help']",
+                "['--port', '--region', '--verbose', '--help']",
+                "['--port', '-p', '--region', '--verbose', '-v', '--help']",
+                "['deploy']",
+                "[]",
+            ],
+        )
+
+    def test_only_selected_completer_is_called(self):
+        stdout, _, rc = self._run_cli_script("""
+print(app.complete(["deploy"], "pr"))
+print(app.complete(["deploy", "-v", "--port", "80"], "s"))
+print(app.complete(["deploy", "--port"], ""))
+print(calls)
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(
+            stdout.splitlines(),
+            [
+                "['production', 'preview']",
+                "['staging']",
+                "['80', '443', '8080']",
+                "['pr', 's']",
+            ],
+        )
+        self.assertNotIn("wrong completer", stdout)
+
+    def test_completer_by_import_path(self):
+        stdout, _, rc = self._run_cli_script("""
+try:
+    app.complete(["deploy", "--region"], "[")
+except ValueError:
+    print("called json.loads")
+""")
+        self.assertEqual(rc, 0)
+        self.assertIn("called json.loads", stdout)
+
+    def test_protocol_in_run(self):
+        env = {
+            "_TURBOTERM_COMPLETE": "bash",
+            "COMP_WORDS": "app\ndeploy\npr",
+            "COMP_CWORD": "2",
+        }
+        stdout, _, rc = self._run_cli_script("run()\nprint('after run')", env=env)
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.splitlines(), ["production", "preview"])
+
+    def test_source_scripts(self):
+        for shell in ("bash", "zsh", "fish"):
+            env = {"_TURBOTERM_COMPLETE": f"source_{shell}"}
+            stdout, _, rc = self._run_cli_script(
+                "sys.argv = ['my-app']\nrun()", env=env
+            )
+            self.assertEqual(rc, 0)
+            self.assertIn("_TURBOTERM_COMPLETE=" + shell, stdout)
+            self.assertIn("my-app", stdout)
+
+    def test_unknown_shell(self):
+        from turboterm.cli import completion_script
+
+        with self.assertRaises(ValueError):
+            completion_script("tcsh", "my-app")
+
+
+class TestBatch(unittest.TestCase):
+    """batch(), repl() and --batch run many command lines in one process."""
+
+    SETUP = """
+import sys, time
+from turboterm.cli import App
+
+app = App()
+
+@app.command()
+def greet(name: str):
+    print(f"hello {name}")
+    return len(name)
+
+@app.command()
+def slow(n: int):
+    time.sleep(n / 100)
+    print(f"slow {n}")
+    return n
+
+@app.command()
+def boom():
+    raise RuntimeError("bad")
+
+@app.command()
+def leave(code: int):
+    sys.exit(code)
+"""
+
+    def _run_cli_script(self, script, *args, **kwargs):
+        return run_script(self.SETUP + script, *args, **kwargs)
+
+    def test_results_per_line(self):
+        stdout, _, rc = self._run_cli_script("""
+lines = ["greet bob", "", "# note", "nope", "boom", "leave 3", "greet 'a b'"]
+for result in app.batch(lines):
+    print(result.line, result.argv, result.status, result.value)
+    if result.error:
+        print(result.error.splitlines()[0])
+""")
+        self.assertEqual(rc, 0)
+        lines = stdout.splitlines()
+        self.assertEqual(lines[:2], ["hello bob", "1 ['greet', 'bob'] 0 3"])
+        self.assertEqual(lines[2], "4 ['nope'] 2 None")
+        self.assertTrue(lines[3].startswith("error:"))
+        self.assertEqual(lines[4:6], ["5 ['boom'] 1 None", "RuntimeError: bad"])
+        self.assertEqual(
+            lines[6:],
+            ["6 ['leave', '3'] 3 None", "hello a b", "7 ['greet', 'a b'] 0 3"],
+        )
+
+    def test_threads_keep_input_order(self):
+        stdout, _, rc = self._run_cli_script("""
+lines = [f"slow {n}" for n in (9, 1, 5, 2, 7, 3)]
+for result in app.batch(lines, jobs=4):
+    print(f"line {result.line}")
+""")
+        self.assertEqual(rc, 0)
+        expected = []
+        for line, n in enumerate((9, 1, 5, 2, 7, 3), 1):
+            expected += [f"slow {n}", f"line {line}"]
+        self.assertEqual(stdout.splitlines(), expected)
+
+    def test_threads_unordered(self):
+        stdout, _, rc = self._run_cli_script("""
+lines = [f"slow {n * 5}" for n in (9, 1, 5, 2)]
+print([result.value for result in app.batch(lines, jobs=4, ordered=False)])
+""")
+        self.assertEqual(rc, 0)
+        self.assertTrue(stdout.rstrip().endswith("[5, 10, 25, 45]"))
+
+    def test_threads_keep_help_with_its_line(self):
+        import re
+
+        stdout, _, rc = self._run_cli_script("""
+lines = ["slow 5", "greet --help", "greet a", "slow --help", "greet b"]
+for result in app.batch(lines, jobs=2):
+    print(f"line {result.line}")
+""")
+        self.assertEqual(rc, 0)
+        blocks = re.split(r"^line \d\n", stdout, flags=re.MULTILINE)
+        self.assertEqual(len(blocks), 6)
+        self.assertEqual(blocks[0], "slow 5\n")
+        self.assertIn("<name>", blocks[1])
+        self.assertEqual(blocks[2], "hello a\n")
+        self.assertIn("<n>", blocks[3])
+        self.assertEqual(blocks[4:], ["hello b\n", ""])
+
+    def test_streams_restored_when_iteration_stops(self):
+        stdout, _, rc = self._run_cli_script("""
+import threading
+stdout, stderr = sys.stdout, sys.stderr
+results = app.batch([f"greet {i}" for i in range(20)], jobs=2)
+print(next(results).line)
+time.sleep(0.5)
+print(sys.stdout is stdout, sys.stderr is stderr)
+thread = threading.Thread(target=print, args=("from a thread",))
+thread.start()
+thread.join()
+""")
+        self.assertEqual(rc, 0)
+        self.assertEqual(
+            stdout.splitlines(), ["hello 0", "1", "True True", "from a thread"]
+        )
+
+    def test_batch_from_run(self):
+        script = "app.run()"
+        stdin = "greet a\nboom\nleave 4\ngreet b\n"
+        for args in (["--batch"], ["--batch", "-", "--jobs", "2"]):
+            stdout, stderr, rc = self._run_cli_script(script, *args, stdin=stdin)
+            self.assertEqual(rc, 1)
+            self.assertEqual(stdout.splitlines(), ["hello a", "hello b"])
+            self.assertEqual(
+                stderr.splitlines(),
+                ["line 2: RuntimeError: bad", "line 3: exit status 4"],
+            )
+
+    def test_batch_usage_error(self):
+        _, stderr, rc = self._run_cli_script("app.run()", "--batch", "--jobs", "x")
+        self.assertEqual(rc, 2)
+        self.assertIn("--jobs needs a positive number", stderr)
+        self.assertIn("--batch [FILE]", stderr)
+
+    def test_repl(self):
+        stdout, stderr, rc = self._run_cli_script(
+            "app.repl()", stdin="greet ann\nboom\nquit\ngreet never\n"
+        )
+        self.assertEqual(rc, 0)
+        self.assertIn("hello ann", stdout)
+        self.assertIn("3", stdout.split())
+        self.assertNotIn("never", stdout)
+        self.assertIn("RuntimeError: bad", stderr)
+
+
+@unittest.skipIf(sys.platform == "win32", "needs os.fork() and Unix sockets")
+class TestDaemon(unittest.TestCase):
+    """run(daemon=...) hands later runs to a warm process."""
+
+    COMMANDS = """
+print("imported")
+import sys
+from turboterm.cli import Argument, command
+
+@command()
+def echo(word: str = Argument(help="Word")):
+    print(word, sys.stdin.read().strip())
+
+@command()
+def fail(code: int):
+    sys.exit(code)
+"""
+
+    MAIN = """
+from turboterm.cli import run
+
+run(modules=["warm_cmds"], cache=False, daemon=2)
+"""
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+
+        self._tmp = tempfile.TemporaryDirectory(dir="/tmp")
+        self.root = Path(self._tmp.name)
+        (self.root / "warm_cmds.py").write_text(self.COMMANDS)
+        (self.root / "main.py").write_text(self.MAIN)
+        (self.root / "run").mkdir(mode=0o700)
+
+    def tearDown(self):
+        import time
+
+        # Let the warm process notice it is idle and remove its socket.
+        sockets = self.root / "run"
+        deadline = time.monotonic() + 10
+        while any(sockets.rglob("*.sock")) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self._tmp.cleanup()
+
+    def _run(self, *args, stdin="", env=None):
+        env = {"XDG_RUNTIME_DIR": str(self.root / "run"), **(env or {})}
+        script = self.root / "main.py"
+        return run_script(script, *args, env=env, stdin=stdin, cwd=self.root)
+
+    def test_warm_run(self):
+        stdout, _, rc = self._run("echo", "cold", stdin="in")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.splitlines(), ["imported", "cold in"])
+
+        stdout, _, rc = self._run("echo", "warm", stdin="forwarded")
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.splitlines(), ["warm forwarded"])
+
+    def test_exit_code_and_usage_error(self):
+        self._run("--help")
+        _, _, rc = self._run("fail", "3")
+        self.assertEqual(rc, 3)
+        _, stderr, rc = self._run("fail", "x")
+        self.assertNotEqual(rc, 0)
+        self.assertIn("invalid value", stderr)
+
+    def test_changed_source_runs_cold(self):
+        self._run("--help")
+        with open(self.root / "warm_cmds.py", "a") as f:
+            f.write("\nprint('changed')\n")
+        stdout, _, rc = self._run("echo", "a")
+        self.assertEqual(rc, 0)
+        self.assertIn("changed", stdout)
+        stdout, _, rc = self._run("echo", "b")
+        self.assertEqual(stdout.split(), ["b"])
+
+    def test_completion_starts_no_warm_process(self):
+        env = {
+            "_TURBOTERM_COMPLETE": "bash",
+            "COMP_WORDS": "main.py\nec",
+            "COMP_CWORD": "1",
+        }
+        stdout, _, rc = self._run(env=env)
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.splitlines()[-1], "echo")
+        self.assertFalse(any((self.root / "run").rglob("*.sock")))
+
+    def test_idle_timeout(self):
+        import time
+
+        self._run("--help")
+        sockets = self.root / "run"
+        self.assertTrue(any(sockets.rglob("*.sock")))
+        time.sleep(3)
+        self.assertFalse(any(sockets.rglob("*.sock")))
+
 
 if __name__ == "__main__":
     unittest.main()
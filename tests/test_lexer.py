@@ -289,6 +289,23 @@ class TestLexer(unittest.TestCase):
         result = turboterm.apply_styles("[bold color(196)]text[/bold color(196)]")
         self.assertEqual(result, "\x1b[1m\x1b[38;5;196mtext\x1b[0m")
 
+    # --- Escaping ---
+
+    def test_escaped_tag_is_literal(self):
+        self.assertEqual(turboterm.apply_styles(r"\[b]x\[/b]"), "[b]x[/b]")
+        self.assertEqual(
+            turboterm.apply_styles(r"[b]on[/b] \[red]"), "\x1b[1mon\x1b[0m [red]"
+        )
+
+    def test_backslash_before_non_tag_is_kept(self):
+        self.assertEqual(turboterm.apply_styles(r"a\[0] b\c"), r"a\[0] b\c")
+
+    def test_escape_round_trip(self):
+        for text in ["[b]x[/b]", "arr[0] [INFO]", r"C:\[red]", "[#fff]", "plain"]:
+            self.assertEqual(turboterm.apply_styles(turboterm.escape(text)), text)
+        self.assertEqual(turboterm.escape("[red]hi[/red]"), r"\[red]hi\[/red]")
+        self.assertEqual(turboterm.escape("arr[0]"), "arr[0]")
+
 
 if __name__ == "__main__":
     unittest.main()
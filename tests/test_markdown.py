@@ -0,0 +1,69 @@
+import unittest
+
+from turboterm import render_markdown
+
+B, IT, DIM, CODE, R = "\x1b[1m", "\x1b[3m", "\x1b[2m", "\x1b[36m", "\x1b[0m"
+
+
+class TestMarkdown(unittest.TestCase):
+    def test_emphasis(self):
+        self.assertEqual(
+            render_markdown("a **b** and *c* and _d_"),
+            f"a {B}b{R} and {IT}c{R} and {IT}d{R}",
+        )
+
+    def test_nested_emphasis(self):
+        self.assertEqual(
+            render_markdown("**bold *both* bold**"),
+            f"{B}bold {IT}both{R}{B} bold{R}",
+        )
+
+    def test_code_span(self):
+        self.assertEqual(
+            render_markdown("run `make *all*` now"), f"run {CODE}make *all*{R} now"
+        )
+        self.assertEqual(render_markdown("``a ` b``"), f"{CODE}a ` b{R}")
+
+    def test_literal_text(self):
+        for text in ["snake_case_name", "a * b", "**unclosed", r"\*not\*", "x_1 < y_2"]:
+            expected = text.replace("\\", "")
+            self.assertEqual(render_markdown(text), expected)
+
+    def test_headings(self):
+        self.assertEqual(render_markdown("# Title"), f"{B}\x1b[4mTitle{R}")
+        self.assertEqual(render_markdown("## Usage ##"), f"{B}Usage{R}")
+        self.assertEqual(
+            render_markdown("### *Notes*"), f"{B}{IT}{IT}Notes{R}{B}{IT}{R}"
+        )
+        self.assertEqual(render_markdown("#hashtag"), "#hashtag")
+
+    def test_lists(self):
+        text = "- one\n  * two\n3. three"
+        self.assertEqual(render_markdown(text), "• one\n  • two\n3. three")
+
+    def test_numbered_lists(self):
+        text = "1. *one*\n  2) two\n10.   ten\n1.5 litres\n2024.final"
+        self.assertEqual(
+            render_markdown(text),
+            f"1. {IT}one{R}\n  2) two\n10. ten\n1.5 litres\n2024.final",
+        )
+
+    def test_fenced_code(self):
+        text = "before\n```python\nx = *y*\n```\nafter"
+        self.assertEqual(render_markdown(text), f"before\n  {DIM}x = *y*{R}\nafter")
+
+    def test_quote_rule_and_link(self):
+        self.assertEqual(render_markdown("> *hi*"), f"{DIM}│{R} {IT}hi{R}")
+        self.assertEqual(render_markdown("---", width=5), f"{DIM}─────{R}")
+        self.assertEqual(
+            render_markdown("see [docs](https://x.dev)"),
+            f"see \x1b[4m\x1b[34mdocs{R} {DIM}(https://x.dev){R}",
+        )
+
+    def test_line_breaks_kept(self):
+        text = "para one\ncontinues\n\npara two\n"
+        self.assertEqual(render_markdown(text), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
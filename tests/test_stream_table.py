@@ -0,0 +1,117 @@
+import io
+import os
+import tempfile
+import unittest
+
+import turboterm
+
+
+class TestStreamTable(unittest.TestCase):
+    def test_sampled_widths_match_pytable(self):
+        rows = [["Header 1", "Header 2"], ["Row 1 Col 1", "Row 1 Col 2"]]
+        table = turboterm.PyTable()
+        for row in rows:
+            table.add_row(row)
+
+        buf = io.StringIO()
+        with turboterm.StreamTable(buf) as stream:
+            stream.write_rows(rows)
+        self.assertEqual(buf.getvalue(), table.to_string() + "\n")
+
+    def test_explicit_widths_truncate(self):
+        buf = io.StringIO()
+        stream = turboterm.StreamTable(buf, widths=[4, 3])
+        stream.write_row(["abcdefgh", "xy"])
+        stream.close()
+        expected = """\
+┌──────┬─────┐
+│ abc… ┆ xy  │
+└──────┴─────┘
+"""
+        self.assertEqual(buf.getvalue(), expected)
+
+    def test_wrap_overflow(self):
+        buf = io.StringIO()
+        with turboterm.StreamTable(buf, widths=[5], overflow="wrap") as stream:
+            stream.write_row(["hello world"])
+        expected = """\
+┌───────┐
+│ hello │
+│ world │
+└───────┘
+"""
+        self.assertEqual(buf.getvalue(), expected)
+
+    def test_sample_size_fixes_widths(self):
+        buf = io.StringIO()
+        stream = turboterm.StreamTable(buf, sample=1)
+        self.assertIsNone(stream.widths)
+        stream.write_row(["ab"])
+        self.assertEqual(stream.widths, [2])
+        stream.write_row(["abcd"])
+        stream.close()
+        self.assertIn("│ a… │", buf.getvalue())
+        self.assertEqual(stream.rows_written, 2)
+
+    def test_styled_cells_truncate_with_reset(self):
+        buf = io.StringIO()
+        with turboterm.StreamTable(buf, widths=[3]) as stream:
+            stream.write_row(["[b]bold text[/b]"])
+        self.assertIn("\x1b[1mbo…\x1b[0m", buf.getvalue())
+
+    def test_empty_stream(self):
+        buf = io.StringIO()
+        turboterm.StreamTable(buf).close()
+        self.assertEqual(buf.getvalue(), "┌┐\n└┘\n")
+
+    def test_file_descriptor(self):
+        fd, path = tempfile.mkstemp()
+        try:
+            with turboterm.StreamTable(fd, widths=[2]) as stream:
+                stream.write_row(["ok"])
+            os.close(fd)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "┌────┐\n│ ok │\n└────┘\n")
+        finally:
+            os.remove(path)
+
+    def test_binary_file_objects(self):
+        buf = io.BytesIO()
+        with turboterm.StreamTable(buf, widths=[2]) as stream:
+            stream.write_row(["ok"])
+        self.assertEqual(buf.getvalue().decode(), "┌────┐\n│ ok │\n└────┘\n")
+
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            with open(path, "wb") as f, turboterm.StreamTable(f, sample=1) as stream:
+                stream.write_row(["ok"])
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "┌────┐\n│ ok │\n└────┘\n")
+        finally:
+            os.remove(path)
+
+    def test_row_longer_than_columns_raises(self):
+        stream = turboterm.StreamTable(io.StringIO(), widths=[2])
+        with self.assertRaises(ValueError):
+            stream.write_row(["a", "b"])
+        stream = turboterm.StreamTable(io.StringIO(), sample=1)
+        stream.write_row(["a"])
+        with self.assertRaises(ValueError):
+            stream.write_row(["a", "b"])
+        stream.write_row(["b"])
+        self.assertEqual(stream.rows_written, 2)
+
+    def test_write_after_close_raises(self):
+        stream = turboterm.StreamTable(io.StringIO(), widths=[1])
+        stream.close()
+        with self.assertRaises(RuntimeError):
+            stream.write_row(["x"])
+
+    def test_invalid_overflow(self):
+        with self.assertRaises(ValueError):
+            turboterm.StreamTable(io.StringIO(), overflow="squeeze")
+
+
+if __name__ == "__main__":
+    unittest.main()
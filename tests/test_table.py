@@ -1,3 +1,8 @@
+import csv
+import io
+import json
+import sys
+import threading
 import unittest
 
 import turboterm
@@ -59,6 +64,532 @@ class TestTable(unittest.TestCase):
 └───┴────────┘"""
         self.assertEqual(table.to_string().strip(), expected)
 
+    def test_ragged_rows(self):
+        table = turboterm.PyTable()
+        table.add_row(["a"])
+        table.add_row(["b", "wide"])
+        expected = """\
+┌───┬──────┐
+│ a ┆      │
+├╌╌╌┼╌╌╌╌╌╌┤
+│ b ┆ wide │
+└───┴──────┘"""
+        self.assertEqual(table.to_string(), expected)
+
+    def test_wide_characters(self):
+        table = turboterm.PyTable()
+        table.add_row(["日本", "x"])
+        table.add_row(["a", "y"])
+        expected = """\
+┌──────┬───┐
+│ 日本 ┆ x │
+├╌╌╌╌╌╌┼╌╌╌┤
+│ a    ┆ y │
+└──────┴───┘"""
+        self.assertEqual(table.to_string(), expected)
+
+    def test_to_string_cached_until_mutated(self):
+        table = turboterm.PyTable()
+        table.add_row(["a", "b"])
+        first = table.to_string()
+        self.assertIs(table.to_string(), first)
+
+        table.add_row(["longer cell", "c"])
+        second = table.to_string()
+        self.assertIsNot(second, first)
+        self.assertIn("│ longer cell ┆ c │", second)
+        self.assertIs(table.to_string(), second)
+
+
+class TestTableMutation(unittest.TestCase):
+    def _table(self):
+        table = turboterm.PyTable()
+        table.add_row(["name", "status"])
+        table.add_row(["api", "ok"])
+        table.add_row(["worker", "ok"])
+        return table
+
+    def _lines(self, table):
+        return table.to_string().split("\n")
+
+    def test_set_cell(self):
+        table = self._table()
+        table.to_string()
+        table.set_cell(1, 1, "[red]down[/red]")
+        self.assertEqual(self._lines(table)[3], "│ api    ┆ \x1b[31mdown\x1b[0m   │")
+
+    def test_set_cell_negative_index_and_padding(self):
+        table = self._table()
+        table.set_cell(-1, 2, "x")
+        self.assertEqual(self._lines(table)[5], "│ worker ┆ ok     ┆ x │")
+        self.assertEqual(self._lines(table)[1], "│ name   ┆ status ┆   │")
+
+    def test_shrinking_cell_narrows_column(self):
+        table = self._table()
+        table.to_string()
+        table.set_cell(2, 0, "db")
+        self.assertEqual(self._lines(table)[5], "│ db   ┆ ok     │")
+
+    def test_update_row(self):
+        table = self._table()
+        table.update_row(0, ["service", "state"])
+        self.assertEqual(self._lines(table)[1], "│ service ┆ state │")
+
+    def test_insert_and_remove_row(self):
+        table = self._table()
+        table.insert_row(1, ["cache", "ok"])
+        self.assertEqual(len(table), 4)
+        self.assertEqual(self._lines(table)[3], "│ cache  ┆ ok     │")
+
+        table.remove_row(0)
+        table.remove_row(-1)
+        expected = """\
+┌───────┬────┐
+│ cache ┆ ok │
+├╌╌╌╌╌╌╌┼╌╌╌╌┤
+│ api   ┆ ok │
+└───────┴────┘"""
+        self.assertEqual(table.to_string(), expected)
+
+    def test_remove_widest_row_drops_column(self):
+        table = turboterm.PyTable()
+        table.add_row(["a"])
+        table.add_row(["b", "c"])
+        table.remove_row(1)
+        self.assertEqual(table.to_string(), "┌───┐\n│ a │\n└───┘")
+
+    def test_index_errors(self):
+        table = self._table()
+        with self.assertRaises(IndexError):
+            table.set_cell(3, 0, "x")
+        with self.assertRaises(IndexError):
+            table.remove_row(-4)
+
+    def test_render_updates_reports_changed_lines(self):
+        table = self._table()
+        self.assertEqual(len(table.render_updates()), 7)
+        self.assertEqual(table.render_updates(), [])
+
+        table.set_cell(2, 1, "no")
+        self.assertEqual(table.render_updates(), [(5, "│ worker ┆ no     │")])
+
+        # A wider cell changes the layout, so every line is reported again.
+        table.set_cell(2, 1, "degraded")
+        self.assertEqual(len(table.render_updates()), 7)
+
+
+class TestTableFooter(unittest.TestCase):
+    def _table(self):
+        table = turboterm.PyTable()
+        table.header_rows = 1
+        for row in [
+            ["item", "qty", "price"],
+            ["apple", "3", "1.50"],
+            ["pear", "12", "0.25"],
+            ["fig", "5", "[green]2.00[/green]"],
+        ]:
+            table.add_row(row)
+        return table
+
+    def test_footer_row(self):
+        table = self._table()
+        table.set_footer([None, "sum", "mean"], label="Total")
+        expected = """\
+┌───────┬─────┬───────┐
+│ item  ┆ qty ┆ price │
+├╌╌╌╌╌╌╌┼╌╌╌╌╌┼╌╌╌╌╌╌╌┤
+│ apple ┆ 3   ┆ 1.50  │
+├╌╌╌╌╌╌╌┼╌╌╌╌╌┼╌╌╌╌╌╌╌┤
+│ pear  ┆ 12  ┆ 0.25  │
+├╌╌╌╌╌╌╌┼╌╌╌╌╌┼╌╌╌╌╌╌╌┤
+│ fig   ┆ 5   ┆ \x1b[32m2.00\x1b[0m  │
+├───────┼─────┼───────┤
+│ Total ┆ 20  ┆ 1.25  │
+└───────┴─────┴───────┘"""
+        self.assertEqual(table.to_string(), expected)
+
+    def test_aggregations(self):
+        table = self._table()
+        table.set_footer(["count", "p50", "max:.1f"])
+        footer = table.to_string().splitlines()[-2]
+        self.assertEqual(footer, "│ 3     ┆ 5.00 ┆ 2.0   │")
+        table.set_footer([None, "min", "p95:.3f"])
+        footer = table.to_string().splitlines()[-2]
+        self.assertEqual(footer, "│       ┆ 3   ┆ 1.950 │")
+        table.set_footer(None)
+        self.assertEqual(len(table.to_string().splitlines()), 9)
+
+    def test_footer_follows_updates(self):
+        table = self._table()
+        table.set_footer([None, "sum"], label="Total")
+        table.to_string()
+        table.set_cell(1, 1, "30")
+        self.assertEqual(
+            table.render_updates(),
+            [(3, "│ apple ┆ 30  ┆ 1.50  │"), (9, "│ Total ┆ 47  ┆       │")],
+        )
+
+    def test_render_range_draws_footer_on_last_page(self):
+        table = self._table()
+        table.set_footer([None, "sum"], label="Total")
+        full = table.to_string().splitlines()
+        last = table.render_range(2, 4).splitlines()
+        self.assertEqual(last, [full[0], *full[5:]])
+        first = table.render_range(0, 2).splitlines()
+        self.assertEqual(first, [*full[:4], full[-1]])
+        self.assertEqual(
+            table.render_range(3, 4, col_start=1).splitlines()[-2], "│ 20  ┆       │"
+        )
+
+    def test_non_finite_cells_are_not_numbers(self):
+        table = self._table()
+        for row in [["kiwi", "NaN", "inf"], ["plum", "-inf", "1.00"]]:
+            table.add_row(row)
+        table.set_footer(["count", "sum", "max"])
+        footer = table.to_string().splitlines()[-2]
+        self.assertEqual(footer, "│ 5     ┆ 20   ┆ 2.00  │")
+
+    def test_invalid_aggregation(self):
+        table = self._table()
+        for spec in ("median", "p101", "sum:?"):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                table.set_footer([spec])
+
+
+class TestRenderRange(unittest.TestCase):
+    def _table(self):
+        table = turboterm.PyTable()
+        for row in [["id", "name"], ["1", "alpha"], ["22", "b"], ["333", "gamma"]]:
+            table.add_row(row)
+        return table
+
+    def test_row_window_uses_global_widths(self):
+        table = self._table()
+        full = table.to_string().splitlines()
+        window = table.render_range(1, 3).splitlines()
+        self.assertEqual(window, [full[0], *full[3:6], full[-1]])
+
+    def test_slice_rules(self):
+        table = self._table()
+        full = table.to_string().splitlines()
+        last = table.render_range(-1, 100).splitlines()
+        self.assertEqual(last, [full[0], full[-2], full[-1]])
+        self.assertEqual(table.render_range(2, 2), "┌─────┬───────┐\n└─────┴───────┘")
+
+    def test_column_window(self):
+        table = self._table()
+        expected = """\
+┌───────┐
+│ name  │
+├╌╌╌╌╌╌╌┤
+│ alpha │
+└───────┘"""
+        self.assertEqual(table.render_range(0, 2, col_start=1), expected)
+        self.assertEqual(table.render_range(0, 2, col_start=2), "┌┐\n└┘")
+
+
+class TestTableQueries(unittest.TestCase):
+    def _table(self):
+        table = turboterm.PyTable()
+        table.header_rows = 1
+        for row in [
+            ["name", "latency"],
+            ["api", "1,200 ms"],
+            ["db", "35 ms"],
+            ["cache", "[green]2 ms[/green]"],
+            ["queue", "n/a"],
+            ["auth", "35 ms"],
+        ]:
+            table.add_row(row)
+        return table
+
+    def _names(self, table):
+        lines = table.to_string().splitlines()[1::2]
+        return [line.split("┆")[0].strip("│ ") for line in lines]
+
+    def test_sort_numbers(self):
+        table = self._table()
+        table.sort_by(1, key="number")
+        self.assertEqual(
+            self._names(table), ["name", "cache", "db", "auth", "api", "queue"]
+        )
+        table.sort_by(1, key="number", reverse=True)
+        self.assertEqual(
+            self._names(table), ["name", "api", "db", "auth", "cache", "queue"]
+        )
+
+    def test_sort_text(self):
+        table = self._table()
+        table.sort_by(0)
+        self.assertEqual(
+            self._names(table), ["name", "api", "auth", "cache", "db", "queue"]
+        )
+
+    def test_filter(self):
+        table = self._table()
+        self.assertEqual(table.filter(1, "< 100"), 2)
+        self.assertEqual(self._names(table), ["name", "db", "cache", "auth"])
+        self.assertEqual(table.filter(0, "contains a"), 1)
+        self.assertEqual(self._names(table), ["name", "cache", "auth"])
+        # The widest latency cell is gone, so the column narrowed.
+        self.assertEqual(table.to_string().splitlines()[0], "┌───────┬─────────┐")
+
+    def test_non_finite_cells_are_not_numbers(self):
+        table = self._table()
+        for row in [["nan", "NaN ms"], ["inf", "inf"], ["neg", "-Infinity"]]:
+            table.add_row(row)
+        table.sort_by(1, key="number")
+        self.assertEqual(
+            self._names(table),
+            ["name", "cache", "db", "auth", "api", "queue", "nan", "inf", "neg"],
+        )
+        self.assertEqual(table.filter(1, "< 100"), 5)
+        self.assertEqual(self._names(table), ["name", "cache", "db", "auth"])
+
+    def test_head_and_top_k(self):
+        table = self._table()
+        table.head(2)
+        self.assertEqual(self._names(table), ["name", "api", "db"])
+
+        table = self._table()
+        table.top_k(1, 2)
+        self.assertEqual(self._names(table), ["name", "api", "db"])
+
+        table = self._table()
+        table.top_k(1, 2, largest=False)
+        self.assertEqual(self._names(table), ["name", "cache", "db"])
+
+    def test_header_rows(self):
+        self.assertEqual(turboterm.PyTable().header_rows, 0)
+        table = turboterm.PyTable.from_columns([["b", "a"]], header=["x"])
+        self.assertEqual(table.header_rows, 1)
+        table.sort_by(0)
+        self.assertEqual(self._names(table), ["x", "a", "b"])
+
+    def test_invalid_specs(self):
+        table = self._table()
+        with self.assertRaises(ValueError):
+            table.sort_by(0, key="date")
+        with self.assertRaises(ValueError):
+            table.filter(0, "~ x")
+
+
+class TestParallelRender(unittest.TestCase):
+    ROWS = 50_000
+
+    def _table(self, threads):
+        table = turboterm.PyTable()
+        table.threads = threads
+        for i in range(self.ROWS):
+            table.add_row([str(i), f"[green]user-{i % 97}[/green]", "ok"])
+        return table
+
+    def test_threads_default_to_auto(self):
+        self.assertEqual(turboterm.PyTable().threads, 0)
+
+    def test_parallel_matches_single_thread(self):
+        expected = self._table(1).to_string()
+        for threads in (0, 2, 3, 8):
+            with self.subTest(threads=threads):
+                self.assertEqual(self._table(threads).to_string(), expected)
+
+    def test_mutation_during_render_raises(self):
+        table = self._table(1)
+        errors = []
+        started, done = threading.Event(), threading.Event()
+
+        def mutate():
+            started.set()
+            while not done.is_set():
+                try:
+                    table.set_cell(0, 2, "no")
+                except RuntimeError as e:
+                    errors.append(str(e))
+                    return
+
+        worker = threading.Thread(target=mutate)
+        worker.start()
+        started.wait()
+        try:
+            # Each change makes the next call render again, without the GIL.
+            for _ in range(50):
+                table.to_string()
+                if errors:
+                    break
+        finally:
+            done.set()
+            worker.join()
+        self.assertEqual(errors[:1], ["Already borrowed"])
+        lines = table.to_string().splitlines()
+        self.assertEqual(len(lines), 2 * self.ROWS + 1)
+        self.assertEqual(lines[1], "│ 0     ┆ \x1b[32muser-0\x1b[0m  ┆ no │")
+
+    def test_updates_across_chunks(self):
+        table = self._table(4)
+        table.to_string()
+        row = self.ROWS - 10
+        table.set_cell(row, 2, "no")
+        self.assertEqual(
+            table.render_updates(),
+            [(1 + 2 * row, f"│ {row} ┆ \x1b[32muser-35\x1b[0m ┆ no │")],
+        )
+
+
+class TestRawCells(unittest.TestCase):
+    def test_raw_table(self):
+        table = turboterm.PyTable(markup=False)
+        self.assertFalse(table.markup)
+        table.add_row(["[red]x[/red]", "arr[0]"])
+        self.assertEqual(table.to_string().splitlines()[1], "│ [red]x[/red] ┆ arr[0] │")
+
+    def test_raw_column(self):
+        table = turboterm.PyTable()
+        table.set_column(1, markup=False)
+        table.add_row(["[b]a[/b]", "[b]a[/b]"])
+        table.set_cell(0, 1, "[INFO] [green]up[/green]")
+        self.assertEqual(
+            table.to_string().splitlines()[1],
+            "│ \x1b[1ma\x1b[0m ┆ [INFO] [green]up[/green] │",
+        )
+
+    def test_markup_column_in_raw_table(self):
+        table = turboterm.PyTable(markup=False)
+        table.set_column(0, markup=True)
+        table.add_row(["[b]a[/b]", "[b]a[/b]"])
+        self.assertEqual(
+            table.to_string().splitlines()[1], "│ \x1b[1ma\x1b[0m ┆ [b]a[/b] │"
+        )
+
+    def test_escaped_cell(self):
+        table = turboterm.PyTable()
+        table.add_row([turboterm.escape("[red]literal[/red]")])
+        self.assertIn("[red]literal[/red]", table.to_string())
+
+    def test_from_columns(self):
+        table = turboterm.PyTable.from_columns(
+            [["[b]x[/b]"], [1]], header=["[b]h[/b]", "n"], markup=False
+        )
+        self.assertIn("│ [b]h[/b] ┆ n │", table.to_string())
+        self.assertIn("│ [b]x[/b] ┆ 1 │", table.to_string())
+
+
+def export_table():
+    table = turboterm.PyTable()
+    table.add_row(["Name", "Note"])
+    table.add_row(["[green]a,b[/green]", 'say "hi"'])
+    table.add_row(["x|y", "two\nlines"])
+    table.add_row(["short"])
+    table.header_rows = 1
+    table.set_footer(["count"])
+    return table
+
+
+class TestTableExport(unittest.TestCase):
+    def test_csv(self):
+        text = export_table().to_csv()
+        self.assertEqual(
+            list(csv.reader(io.StringIO(text))),
+            [
+                ["Name", "Note"],
+                ["a,b", 'say "hi"'],
+                ["x|y", "two\nlines"],
+                ["short", ""],
+            ],
+        )
+        self.assertTrue(text.startswith('Name,Note\n"a,b","say ""hi"""\n'))
+
+    def test_tsv(self):
+        text = export_table().to_tsv()
+        rows = list(csv.reader(io.StringIO(text), delimiter="\t"))
+        self.assertEqual(rows[1], ["a,b", 'say "hi"'])
+        self.assertEqual(text.splitlines()[0], "Name\tNote")
+
+    def test_markdown(self):
+        table = export_table()
+        table.set_column(1, align="right")
+        expected = """\
+| Name | Note |
+| --- | --: |
+| a,b | say "hi" |
+| x\\|y | two<br>lines |
+| short |  |
+"""
+        self.assertEqual(table.to_markdown(), expected)
+
+    def test_jsonl(self):
+        lines = export_table().to_jsonl().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [
+                {"Name": "a,b", "Note": 'say "hi"'},
+                {"Name": "x|y", "Note": "two\nlines"},
+                {"Name": "short", "Note": ""},
+            ],
+        )
+
+    def test_jsonl_without_header(self):
+        table = turboterm.PyTable()
+        table.add_row(["1", "[b]2[/b]"])
+        self.assertEqual(table.to_jsonl(), '["1","2"]\n')
+
+    def test_write_to_file_in_chunks(self):
+        class Sink:
+            def __init__(self):
+                self.parts = []
+
+            def write(self, text):
+                self.parts.append(text)
+
+        table = turboterm.PyTable()
+        for i in range(20_000):
+            table.add_row([str(i), f"row {i}"])
+        sink = Sink()
+        self.assertIsNone(table.to_csv(sink))
+        self.assertGreater(len(sink.parts), 1)
+        self.assertEqual("".join(sink.parts), table.to_csv())
+
+    def test_empty_table(self):
+        table = turboterm.PyTable()
+        for export in (table.to_csv, table.to_tsv, table.to_markdown, table.to_jsonl):
+            self.assertEqual(export(), "")
+            buf = io.StringIO()
+            export(buf)
+            self.assertEqual(buf.getvalue(), "")
+
+
+class TestTableMemory(unittest.TestCase):
+    def test_memory_usage_components(self):
+        table = turboterm.PyTable()
+        table.add_row(["name", "status"])
+        usage = table.memory_usage()
+        self.assertEqual(
+            set(usage), {"text", "cells", "rows", "layout", "cache", "total"}
+        )
+        self.assertGreaterEqual(usage["text"], len("namestatus"))
+        self.assertEqual(usage["cache"], 0)
+        self.assertEqual(usage["total"], sys.getsizeof(table))
+
+        table.to_string()
+        self.assertEqual(table.memory_usage()["cache"], len(table.to_string()))
+
+    def test_size_grows_with_cells(self):
+        table = turboterm.PyTable()
+        before = sys.getsizeof(table)
+        for i in range(1000):
+            table.add_row([str(i), "x" * 20])
+        self.assertGreater(sys.getsizeof(table), before + 1000 * 20)
+
+    def test_edits_do_not_leak_text(self):
+        table = turboterm.PyTable()
+        for i in range(100):
+            table.add_row([str(i), "x" * 50])
+        for _ in range(200):
+            for r in range(100):
+                table.set_cell(r, 1, "y" * 50)
+        # Replaced text is reclaimed once it outweighs the live text.
+        self.assertLess(table.memory_usage()["text"], 4 * 100 * 52 + 8192)
+        self.assertIn("│ 99 ┆ " + "y" * 50 + " │", table.to_string())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,81 @@
+import array
+import unittest
+
+import turboterm
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestFromColumns(unittest.TestCase):
+    def test_array_columns(self):
+        table = turboterm.PyTable.from_columns(
+            [array.array("q", [1, 20]), array.array("d", [0.5, 12.25])],
+            header=["[b]id[/b]", "value"],
+        )
+        expected = """\
+┌────┬───────┐
+│ \x1b[1mid\x1b[0m ┆ value │
+├╌╌╌╌┼╌╌╌╌╌╌╌┤
+│ 1  ┆ 0.5   │
+├╌╌╌╌┼╌╌╌╌╌╌╌┤
+│ 20 ┆ 12.25 │
+└────┴───────┘"""
+        self.assertEqual(table.to_string(), expected)
+
+    def test_format_specs(self):
+        table = turboterm.PyTable.from_columns(
+            [
+                array.array("i", [1234567, -42]),
+                array.array("f", [0.125, 2.5]),
+                array.array("d", [0.256, 1.0]),
+            ],
+            formats=[",", ".2f", ".1%"],
+        )
+        lines = table.to_string().split("\n")
+        self.assertEqual(lines[1], "│ 1,234,567 ┆ 0.12 ┆ 25.6%  │")
+        self.assertEqual(lines[3], "│ -42       ┆ 2.50 ┆ 100.0% │")
+
+    def test_float_exponents_match_python(self):
+        values = [1e-7, 1.5e16, -2.5e-05, 1e300, 0.0001, 1e15]
+        table = turboterm.PyTable.from_columns([array.array("d", values)])
+        cells = [line.strip("│ ") for line in table.to_string().splitlines()[1::2]]
+        self.assertEqual(cells, [repr(v) for v in values])
+
+    def test_memoryview_and_text_columns(self):
+        flags = memoryview(array.array("B", [1, 0])).cast("?")
+        table = turboterm.PyTable.from_columns(
+            [flags, ["[green]up[/green]", "down"], [3, None]]
+        )
+        lines = table.to_string().split("\n")
+        self.assertEqual(lines[1], "│ True  ┆ \x1b[32mup\x1b[0m   ┆ 3    │")
+        self.assertEqual(lines[3], "│ False ┆ down ┆ None │")
+
+    def test_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            turboterm.PyTable.from_columns(
+                [array.array("q", [1, 2]), array.array("q", [1])]
+            )
+
+    def test_bad_format_spec(self):
+        with self.assertRaises(ValueError):
+            turboterm.PyTable.from_columns([array.array("q", [1])], formats=["x"])
+
+    def test_str_column_rejected(self):
+        with self.assertRaises(TypeError):
+            turboterm.PyTable.from_columns(["abc"])
+
+    @unittest.skipIf(numpy is None, "numpy not installed")
+    def test_numpy_columns(self):
+        table = turboterm.PyTable.from_columns(
+            [numpy.arange(3), numpy.array([1.5, 2.0, 1e4]), numpy.array([True] * 3)],
+            formats=[None, ",.1f", None],
+        )
+        lines = table.to_string().split("\n")
+        self.assertEqual(lines[5], "│ 2 ┆ 10,000.0 ┆ True │")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import turboterm
+
+
+class TestTableLayout(unittest.TestCase):
+    def test_width_limit_wraps(self):
+        table = turboterm.PyTable(width=20)
+        table.set_column(0, min_width=4)
+        table.add_row(["name", "alpha beta gamma"])
+        expected = """\
+┌──────┬───────────┐
+│ name ┆ alpha     │
+│      ┆ beta      │
+│      ┆ gamma     │
+└──────┴───────────┘"""
+        self.assertEqual(table.to_string(), expected)
+
+    def test_max_width_truncates(self):
+        table = turboterm.PyTable()
+        table.set_column(1, max_width=6, overflow="truncate")
+        table.add_row(["x", "abcdefghij"])
+        expected = """\
+┌───┬────────┐
+│ x ┆ abcde… │
+└───┴────────┘"""
+        self.assertEqual(table.to_string(), expected)
+
+    def test_alignment(self):
+        table = turboterm.PyTable()
+        table.set_column(0, align="right")
+        table.set_column(1, align="center")
+        table.set_column(2, align="decimal")
+        table.add_row(["Name", "Status", "Latency"])
+        table.add_row(["api", "ok", "1.5"])
+        table.add_row(["db", "down", "100"])
+        table.add_row(["cache", "[green]up[/green]", "-3.25"])
+        expected = """\
+┌───────┬────────┬─────────┐
+│  Name ┆ Status ┆ Latency │
+├╌╌╌╌╌╌╌┼╌╌╌╌╌╌╌╌┼╌╌╌╌╌╌╌╌╌┤
+│   api ┆   ok   ┆    1.5  │
+├╌╌╌╌╌╌╌┼╌╌╌╌╌╌╌╌┼╌╌╌╌╌╌╌╌╌┤
+│    db ┆  down  ┆  100    │
+├╌╌╌╌╌╌╌┼╌╌╌╌╌╌╌╌┼╌╌╌╌╌╌╌╌╌┤
+│ cache ┆   \x1b[32mup\x1b[0m   ┆   -3.25 │
+└───────┴────────┴─────────┘"""
+        self.assertEqual(table.to_string(), expected)
+
+    def test_ratio_fills_width(self):
+        table = turboterm.PyTable(width=30)
+        table.set_column(1, ratio=1)
+        table.add_row(["id", "x"])
+        lines = table.to_string().splitlines()
+        self.assertEqual([len(line) for line in lines], [30, 30, 30])
+        self.assertEqual(lines[1], "│ id ┆ x" + " " * 21 + "│")
+
+    def test_changing_width_relayouts(self):
+        table = turboterm.PyTable()
+        table.add_row(["name", "alpha beta gamma"])
+        self.assertEqual(len(table.to_string().splitlines()), 3)
+        table.width = 20
+        self.assertEqual(table.width, 20)
+        self.assertEqual(len(table.to_string().splitlines()), 4)
+        table.width = None
+        self.assertEqual(len(table.to_string().splitlines()), 3)
+
+    def test_terminal_width(self):
+        code = "from turboterm import PyTable; print(PyTable(width='terminal').width)"
+        env = {**os.environ, "COLUMNS": "33"}
+        r = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, env=env
+        )
+        self.assertEqual(r.stdout.strip(), "33")
+
+    def test_invalid_settings(self):
+        self.assertIsNone(turboterm.PyTable().width)
+        with self.assertRaises(ValueError):
+            turboterm.PyTable(width=0)
+        with self.assertRaises(ValueError):
+            turboterm.PyTable(width="wide")
+
+        table = turboterm.PyTable()
+        with self.assertRaises(ValueError):
+            table.set_column(0, min_width=5, max_width=3)
+        with self.assertRaises(ValueError):
+            table.set_column(0, align="justify")
+        with self.assertRaises(ValueError):
+            table.set_column(0, overflow="scroll")
+
+
+def fruit_table(border):
+    table = turboterm.PyTable(border=border)
+    for row in [["Name", "Qty"], ["apple", "3"], ["kiwi", "12"]]:
+        table.add_row(row)
+    table.header_rows = 1
+    return table
+
+
+class TestTableBorders(unittest.TestCase):
+    def test_rounded(self):
+        expected = """\
+╭───────┬─────╮
+│ Name  ┆ Qty │
+├╌╌╌╌╌╌╌┼╌╌╌╌╌┤
+│ apple ┆ 3   │
+├╌╌╌╌╌╌╌┼╌╌╌╌╌┤
+│ kiwi  ┆ 12  │
+╰───────┴─────╯"""
+        self.assertEqual(fruit_table("rounded").to_string(), expected)
+
+    def test_ascii_header_rule(self):
+        expected = """\
++-------+-----+
+| Name  | Qty |
++=======+=====+
+| apple | 3   |
++-------+-----+
+| kiwi  | 12  |
++-------+-----+"""
+        self.assertEqual(fruit_table("ascii").to_string(), expected)
+
+    def test_markdown(self):
+        expected = """\
+| Name  | Qty |
+|-------|-----|
+| apple | 3   |
+| kiwi  | 12  |"""
+        self.assertEqual(fruit_table("markdown").to_string(), expected)
+
+    def test_minimal(self):
+        expected = """\
+ Name  │ Qty
+───────┼─────
+ apple │ 3
+ kiwi  │ 12"""
+        self.assertEqual(fruit_table("minimal").to_string(), expected)
+
+    def test_borderless(self):
+        table = fruit_table("borderless")
+        self.assertEqual(table.to_string(), "Name   Qty\napple  3\nkiwi   12")
+
+    def test_borderless_fits_width(self):
+        table = turboterm.PyTable(width=10, border="borderless")
+        table.add_row(["name", "alpha beta"])
+        lines = table.to_string().splitlines()
+        self.assertTrue(all(len(line) <= 10 for line in lines), lines)
+
+    def test_updates_without_bottom_rule(self):
+        table = fruit_table("markdown")
+        table.to_string()
+        table.update_row(-1, ["kiwi", "7"])
+        self.assertEqual(table.render_updates(), [(3, "| kiwi  | 7   |")])
+        table.update_row(1, ["pear", "4"])
+        self.assertEqual(
+            table.to_string().splitlines()[2:], ["| pear  | 4   |", "| kiwi  | 7   |"]
+        )
+
+    def test_render_range(self):
+        table = fruit_table("markdown")
+        self.assertEqual(table.render_range(1, 3), "| apple | 3   |\n| kiwi  | 12  |")
+        self.assertEqual(
+            table.render_range(0, 2).splitlines(),
+            ["| Name  | Qty |", "|-------|-----|", "| apple | 3   |"],
+        )
+
+    def test_footer(self):
+        table = fruit_table("minimal")
+        table.set_footer([None, "sum"], label="Total")
+        lines = table.to_string().splitlines()
+        self.assertEqual(lines[-2:], ["───────┼─────", " Total │ 15"])
+
+    def test_switching_style(self):
+        table = fruit_table("square")
+        self.assertEqual(table.border, "square")
+        self.assertTrue(table.to_string().startswith("┌"))
+        table.border = "heavy"
+        self.assertEqual(table.border, "heavy")
+        self.assertTrue(table.to_string().startswith("┏"))
+        self.assertEqual(turboterm.PyTable(border="borderless").to_string(), "")
+        with self.assertRaises(ValueError):
+            table.border = "double"
+        with self.assertRaises(ValueError):
+            turboterm.PyTable(border="fancy")
+
+
+if __name__ == "__main__":
+    unittest.main()
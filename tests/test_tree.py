@@ -0,0 +1,116 @@
+import unittest
+
+import turboterm
+
+
+class TestTree(unittest.TestCase):
+    def test_add_nodes(self):
+        tree = turboterm.Tree("root")
+        src = tree.add("src")
+        tree.add("main.rs", parent=src)
+        tree.add("lib.rs", parent=src)
+        tree.add("README.md")
+        expected = """\
+root
+├── src
+│   ├── main.rs
+│   └── lib.rs
+└── README.md"""
+        self.assertEqual(tree.to_string(), expected)
+        self.assertEqual(len(tree), 5)
+
+    def test_extend_nested_data(self):
+        tree = turboterm.Tree("deps")
+        tree.extend(
+            {
+                "requests": ["urllib3", "idna", {"certifi": None}],
+                "rich": {"pygments": [], "markdown-it-py": ["mdurl"]},
+                "version": 2,
+            }
+        )
+        expected = """\
+deps
+├── requests
+│   ├── urllib3
+│   ├── idna
+│   └── certifi
+├── rich
+│   ├── pygments
+│   └── markdown-it-py
+│       └── mdurl
+└── version
+    └── 2"""
+        self.assertEqual(tree.to_string(), expected)
+
+    def test_nested_list_holds_children_of_previous_item(self):
+        tree = turboterm.Tree(".")
+        tree.extend(["src", ["main.rs"], "README.md", None])
+        expected = ".\n├── src\n│   └── main.rs\n└── README.md"
+        self.assertEqual(tree.to_string(), expected)
+
+    def test_extend_keeps_input_order(self):
+        tree = turboterm.Tree(".")
+        tree.extend([["x"], "a", {"k": ["k1"]}, ["k2"], "b"])
+        expected = """\
+.
+├── x
+├── a
+├── k
+│   ├── k1
+│   └── k2
+└── b"""
+        self.assertEqual(tree.to_string(), expected)
+
+    def test_nested_tuple_holds_children_of_previous_item(self):
+        tree = turboterm.Tree(".")
+        tree.extend(("src", ("main.rs", ["mod.rs"]), "README.md"))
+        expected = ".\n├── src\n│   └── main.rs\n│       └── mod.rs\n└── README.md"
+        self.assertEqual(tree.to_string(), expected)
+
+    def test_styled_labels(self):
+        tree = turboterm.Tree("[b]root[/b]")
+        tree.add("[red]x[/red]")
+        self.assertEqual(tree.to_string(), "\x1b[1mroot\x1b[0m\n└── \x1b[31mx\x1b[0m")
+        raw = turboterm.Tree("[b]root[/b]", markup=False)
+        self.assertEqual(raw.to_string(), "[b]root[/b]")
+
+    def test_multiline_label(self):
+        tree = turboterm.Tree("root")
+        tree.add("one\ntwo")
+        tree.add("three")
+        self.assertEqual(tree.to_string(), "root\n├── one\n│   two\n└── three")
+
+    def test_max_depth(self):
+        tree = turboterm.Tree("root")
+        tree.extend({"a": ["a1", "a2"], "b": []})
+        more = "\x1b[2m… 2 more\x1b[0m"
+        expected = f"root\n├── a\n│   └── {more}\n└── b"
+        self.assertEqual(tree.to_string(max_depth=1), expected)
+        self.assertEqual(tree.to_string(max_depth=0), f"root\n└── {more}")
+
+    def test_max_children(self):
+        tree = turboterm.Tree("root")
+        tree.extend([str(i) for i in range(10_000)])
+        text = tree.to_string(max_children=2)
+        self.assertEqual(text, "root\n├── 0\n├── 1\n└── \x1b[2m… 9998 more\x1b[0m")
+
+    def test_deep_tree(self):
+        tree = turboterm.Tree("0")
+        node = 0
+        for i in range(1, 5000):
+            node = tree.add(str(i), parent=node)
+        lines = tree.to_string().splitlines()
+        self.assertEqual(len(lines), 5000)
+        self.assertTrue(lines[-1].endswith("└── 4999"))
+        self.assertEqual(len(tree.to_string(max_depth=3).splitlines()), 5)
+
+    def test_bad_parent(self):
+        tree = turboterm.Tree("root")
+        with self.assertRaises(IndexError):
+            tree.add("x", parent=1)
+        with self.assertRaises(IndexError):
+            tree.extend(["x"], parent=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,7 @@
 from .console import console as console
 from .turboterm import PyTable as PyTable
+from .turboterm import StreamTable as StreamTable
+from .turboterm import Tree as Tree
 from .turboterm import apply_styles as apply_styles
+from .turboterm import escape as escape
+from .turboterm import render_markdown as render_markdown
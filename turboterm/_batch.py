@@ -0,0 +1,243 @@
+"""Batch and REPL modes: many command lines through one `App`.
+
+Lines are split like a shell would (`shlex`), blank lines and `#` comments
+are skipped, and each line is parsed by the app's compiled parser and
+dispatched. With more than one job, lines run on a thread pool; what each
+line prints is collected per line, through stand-ins for `sys.stdout` and
+`sys.stderr`, and written out as a whole when its line is reported.
+"""
+
+import collections
+import contextlib
+import shlex
+import sys
+import threading
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from .cli import App, LineResult
+
+USAGE = """\
+Usage: {prog} --batch [FILE] [--jobs N] [--unordered]
+       {prog} --repl"""
+
+
+def run_line(app: App, number: int, text: str) -> LineResult | None:
+    """Run one command line, or return `None` for a blank or comment line."""
+    try:
+        argv = shlex.split(text, comments=True)
+    except ValueError as e:
+        return LineResult(number, [], 2, error=f"error: {e}")
+    if not argv:
+        return None
+    try:
+        parsed = app.parse_args(argv)
+    except ValueError as e:
+        return LineResult(number, argv, 2, error=str(e).rstrip())
+    if parsed is None:
+        # Help was printed.
+        return LineResult(number, argv, 0)
+    name, kwargs = parsed
+    try:
+        value = app._registry.handler(name)(**kwargs)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return LineResult(number, argv, e.code or 0)
+        return LineResult(number, argv, 1, error=str(e.code))
+    except Exception as e:
+        return LineResult(number, argv, 1, error=f"{type(e).__name__}: {e}")
+    return LineResult(number, argv, 0, value)
+
+
+class _ThreadOutput:
+    """Stands in for `sys.stdout` or `sys.stderr` while lines run on
+    threads. A worker's writes are kept with its line; anything else goes
+    to the real stream."""
+
+    def __init__(self, stream: Any, local: threading.local) -> None:
+        self._stream = stream
+        self._local = local
+
+    def write(self, text: str) -> int:
+        chunks = getattr(self._local, "chunks", None)
+        if chunks is None:
+            return self._stream.write(text)
+        chunks.append((self._stream, text))
+        return len(text)
+
+    def flush(self) -> None:
+        if getattr(self._local, "chunks", None) is None:
+            self._stream.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class _Capture:
+    """Runs lines on worker threads with their output kept per line.
+
+    The stand-ins are installed only while at least one line is running, so
+    the process has its real streams whenever the pool is idle, such as
+    while the caller pauses between results or has stopped iterating.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._streams: tuple = ()
+
+    def _install(self) -> None:
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout = _ThreadOutput(stdout, self._local)
+        sys.stderr = _ThreadOutput(stderr, self._local)
+        self._streams = ((stdout, sys.stdout), (stderr, sys.stderr))
+
+    def _restore(self) -> None:
+        (stdout, stdout_stand_in), (stderr, stderr_stand_in) = self._streams
+        # Leave streams that someone else replaced in the meantime.
+        if sys.stdout is stdout_stand_in:
+            sys.stdout = stdout
+        if sys.stderr is stderr_stand_in:
+            sys.stderr = stderr
+
+    def run(self, app: App, number: int, text: str) -> tuple[LineResult | None, list]:
+        with self._lock:
+            if not self._running:
+                self._install()
+            self._running += 1
+        self._local.chunks = chunks = []
+        try:
+            return run_line(app, number, text), chunks
+        finally:
+            self._local.chunks = None
+            with self._lock:
+                self._running -= 1
+                if not self._running:
+                    self._restore()
+
+
+def _finish(pending: collections.deque, ordered: bool) -> Iterator[LineResult]:
+    """Wait for the next line in input order, or for any line, write out
+    what it printed and yield its result."""
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    if ordered:
+        done = [pending.popleft()]
+    else:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+    for future in done:
+        result, chunks = future.result()
+        for stream, text in chunks:
+            stream.write(text)
+        if result is not None:
+            yield result
+
+
+def run(
+    app: App, lines: Iterable[str], jobs: int, ordered: bool
+) -> Iterator[LineResult]:
+    numbered = enumerate(lines, 1)
+    if jobs <= 1:
+        for number, text in numbered:
+            result = run_line(app, number, text)
+            if result is not None:
+                yield result
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    capture = _Capture()
+    pending: collections.deque = collections.deque()
+    with ThreadPoolExecutor(jobs) as pool:
+        for number, text in numbered:
+            pending.append(pool.submit(capture.run, app, number, text))
+            # Read ahead only so far, so that a slow producer such as a pipe
+            # still sees results as its lines complete.
+            if len(pending) >= 2 * jobs:
+                yield from _finish(pending, ordered)
+        while pending:
+            yield from _finish(pending, ordered)
+
+
+def _report(result: LineResult) -> None:
+    message = result.error or f"exit status {result.status}"
+    print(f"line {result.line}: {message}", file=sys.stderr)
+
+
+def repl(app: App, prompt: str) -> None:
+    # Line editing and history, where available.
+    with contextlib.suppress(ImportError):
+        import readline  # noqa: F401
+
+    number = 0
+    while True:
+        try:
+            text = input(prompt)
+        except EOFError:
+            print()
+            return
+        except KeyboardInterrupt:
+            print()
+            continue
+        if text.strip() in ("exit", "quit"):
+            return
+        number += 1
+        try:
+            result = run_line(app, number, text)
+        except KeyboardInterrupt:
+            print("KeyboardInterrupt", file=sys.stderr)
+            continue
+        if result is None:
+            continue
+        if result.status:
+            print(result.error or f"exit status {result.status}", file=sys.stderr)
+        elif result.value is not None:
+            print(repr(result.value))
+
+
+def main(app: App, args: list[str], prog: str) -> int:
+    """Run `--batch [FILE] [--jobs N] [--unordered]` or `--repl`, and return
+    the exit status: that of the first line that failed, or 0."""
+    if args[0] == "--repl":
+        if len(args) > 1:
+            return _usage(prog, f"unexpected argument '{args[1]}'")
+        repl(app, f"{prog}> ")
+        return 0
+
+    path, jobs, ordered = None, 1, True
+    rest = iter(args[1:])
+    for arg in rest:
+        if arg in ("--jobs", "-j"):
+            value = next(rest, "")
+            if not value.isdigit() or int(value) < 1:
+                return _usage(prog, f"{arg} needs a positive number")
+            jobs = int(value)
+        elif arg == "--unordered":
+            ordered = False
+        elif path is None and (arg == "-" or not arg.startswith("-")):
+            path = arg
+        else:
+            return _usage(prog, f"unexpected argument '{arg}'")
+
+    status = 0
+    with contextlib.ExitStack() as stack:
+        if path is None or path == "-":
+            lines = sys.stdin
+        else:
+            try:
+                lines = stack.enter_context(open(path, encoding="utf-8"))
+            except OSError as e:
+                return _usage(prog, str(e))
+        for result in run(app, lines, jobs, ordered):
+            if result.status:
+                _report(result)
+                status = status or result.status
+    return status
+
+
+def _usage(prog: str, message: str) -> int:
+    print(f"error: {message}\n\n{USAGE.format(prog=prog)}", file=sys.stderr)
+    return 2
@@ -0,0 +1,72 @@
+"""Shell completion scripts and the `_TURBOTERM_COMPLETE` protocol.
+
+A completion script calls the program with `_TURBOTERM_COMPLETE` set to the
+shell name, `COMP_WORDS` set to the command line split into words and
+joined by newlines, and `COMP_CWORD` set to the index of the word being
+completed. `run()` answers with one candidate per line before dispatching
+anything; no output lets the shell fall back to completing file names.
+"""
+
+import os
+import re
+
+SHELLS = ("bash", "zsh", "fish")
+
+_BASH = """\
+_{func}_completion() {{
+    local IFS=$'\\n'
+    COMPREPLY=($(env COMP_WORDS="${{COMP_WORDS[*]}}" COMP_CWORD="$COMP_CWORD" \\
+        _TURBOTERM_COMPLETE=bash "{prog}" 2>/dev/null))
+}}
+complete -o default -F _{func}_completion {prog}
+"""
+
+_ZSH = """\
+#compdef {prog}
+_{func}_completion() {{
+    local -a completions
+    completions=("${{(@f)$(env COMP_WORDS="${{(pj:\\n:)words}}" \\
+        COMP_CWORD=$((CURRENT - 1)) _TURBOTERM_COMPLETE=zsh "{prog}" 2>/dev/null)}}")
+    if [[ -n "${{completions[1]}}" ]]; then
+        compadd -a completions
+    else
+        _files
+    fi
+}}
+compdef _{func}_completion {prog}
+"""
+
+_FISH = """\
+function __{func}_complete
+    set -l words (commandline -opc)
+    set -l cword (count $words)
+    set -a words (commandline -ct)
+    env COMP_WORDS=(string join \\n -- $words | string collect) COMP_CWORD=$cword \\
+        _TURBOTERM_COMPLETE=fish {prog} 2>/dev/null
+end
+complete -c {prog} -a '(__{func}_complete)'
+"""
+
+_SCRIPTS = {"bash": _BASH, "zsh": _ZSH, "fish": _FISH}
+
+
+def script(shell: str, prog: str) -> str:
+    if shell not in _SCRIPTS:
+        raise ValueError(
+            f"unknown shell '{shell}', expected one of: {', '.join(SHELLS)}"
+        )
+    func = re.sub(r"\W", "_", prog)
+    return _SCRIPTS[shell].format(prog=prog, func=func)
+
+
+def request() -> tuple[list[str], str]:
+    """The words before the one being completed, without the program name,
+    and the partial word itself, from the environment."""
+    words = os.environ.get("COMP_WORDS", "").split("\n")
+    try:
+        index = int(os.environ.get("COMP_CWORD", ""))
+    except ValueError:
+        index = len(words) - 1
+    index = max(1, min(index, len(words)))
+    current = words[index] if index < len(words) else ""
+    return words[1:index], current
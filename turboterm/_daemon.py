@@ -0,0 +1,312 @@
+"""A warm process that runs commands for `run(modules=..., daemon=True)`.
+
+The first run imports the command modules in a forked, detached process
+that listens on a per-user Unix socket, and then runs its own command
+cold. Later runs connect to the socket before importing anything and send
+their argv, environment and working directory, with their stdin, stdout
+and stderr file descriptors. The warm process forks a child per request,
+which takes over those descriptors, runs the command and sends back its
+exit code.
+
+The warm process exits after `idle` seconds without requests, and as soon
+as a request finds that one of the source files it loaded has changed;
+that run, and the next, start over cold.
+
+Requests are framed as a 4-byte length and a JSON object; the child
+answers with its pid, so that the client can forward signals to it, and
+then its exit code, both as 4-byte integers.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+import traceback
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+IDLE_TIMEOUT = 300.0
+
+_INT = struct.Struct("!i")
+_FORWARDED_SIGNALS = ("SIGINT", "SIGTERM", "SIGHUP", "SIGQUIT")
+
+
+def supported() -> bool:
+    return hasattr(os, "fork") and hasattr(socket, "send_fds")
+
+
+def socket_path(modules: list[str]) -> Path | None:
+    """The socket for this interpreter, program and module list, in a
+    directory only the current user can access, or `None` if there is no
+    such directory."""
+    base = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    directory = Path(base) / f"turboterm-{os.getuid()}"
+    try:
+        directory.mkdir(mode=0o700, exist_ok=True)
+        st = os.lstat(directory)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    key = "\0".join([sys.executable, os.path.abspath(sys.argv[0]), *modules])
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    path = directory / f"cli-{digest}.sock"
+    # AF_UNIX paths are limited to about 100 bytes.
+    return path if len(os.fsencode(path)) < 100 else None
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes | None:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def forward(path: Path) -> int | None:
+    """Run this process's command line in the warm process, returning its
+    exit code, or `None` if no warm process took the request."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(os.fspath(path))
+            request = {"argv": sys.argv, "env": dict(os.environ), "cwd": os.getcwd()}
+            body = json.dumps(request).encode()
+            data = struct.pack("!I", len(body)) + body
+            sent = socket.send_fds(sock, [data], [0, 1, 2])
+            sock.sendall(data[sent:])
+            reply = _recv_exact(sock, _INT.size)
+        except OSError:
+            return None
+        if reply is None:
+            return None
+        pid = _INT.unpack(reply)[0]
+
+        def relay(signum, frame):
+            with contextlib.suppress(OSError):
+                os.kill(pid, signum)
+
+        for name in _FORWARDED_SIGNALS:
+            signal.signal(getattr(signal, name), relay)
+        try:
+            reply = _recv_exact(sock, _INT.size)
+        except OSError:
+            reply = None
+        # The child died without reporting, e.g. from a signal.
+        return 1 if reply is None else _INT.unpack(reply)[0]
+    finally:
+        sock.close()
+
+
+def _listening(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(os.fspath(path))
+        except OSError:
+            return False
+    return True
+
+
+def start(path: Path, idle: float, load: Callable[[], None], app: Any) -> None:
+    """Fork a detached warm process serving `app` on `path`, which calls
+    `load` to import the commands first. Does nothing if another process
+    already listens on `path`."""
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            listener.bind(os.fspath(path))
+        except OSError:
+            if _listening(path):
+                listener.close()
+                return
+            # A warm process that crashed left its socket behind.
+            os.unlink(path)
+            listener.bind(os.fspath(path))
+        listener.listen(64)
+        # Identifies our socket file, should another process replace it.
+        inode = os.stat(path).st_ino
+    except OSError:
+        listener.close()
+        return
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid:
+        listener.close()
+        os.waitpid(pid, 0)
+        return
+
+    # Detach from the terminal and from the parent, which waits for us.
+    try:
+        os.setsid()
+        if os.fork():
+            os._exit(0)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        os.close(devnull)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        load()
+        _serve(listener, idle, app, _sources(app))
+    except BaseException:
+        pass
+    finally:
+        try:
+            if os.stat(path).st_ino == inode:
+                os.unlink(path)
+        except OSError:
+            pass
+        os._exit(0)
+
+
+def _sources(app: Any) -> dict[str, tuple[int, int]]:
+    """The size and mtime of the main script and of every module that
+    registered a command."""
+    files = {os.path.abspath(sys.argv[0])}
+    for _name, target, *_rest in app._log:
+        module = sys.modules.get(target.partition(":")[0])
+        files.add(getattr(module, "__file__", None))
+    sources = {}
+    for path in files:
+        try:
+            st = os.stat(path)
+        except (OSError, TypeError):
+            continue
+        sources[path] = (st.st_size, st.st_mtime_ns)
+    return sources
+
+
+def _changed(sources: dict[str, tuple[int, int]]) -> bool:
+    for path, signature in sources.items():
+        try:
+            st = os.stat(path)
+        except OSError:
+            return True
+        if (st.st_size, st.st_mtime_ns) != signature:
+            return True
+    return False
+
+
+def _receive(conn: socket.socket) -> tuple[dict, list[int]] | None:
+    data, fds, _flags, _addr = socket.recv_fds(conn, 65536, 3)
+    try:
+        if len(fds) != 3 or len(data) < 4:
+            raise ValueError("incomplete request")
+        size = struct.unpack("!I", data[:4])[0]
+        body = data[4:]
+        if len(body) < size:
+            rest = _recv_exact(conn, size - len(body))
+            if rest is None:
+                raise ValueError("incomplete request")
+            body += rest
+        return json.loads(body), fds
+    except ValueError:
+        for fd in fds:
+            os.close(fd)
+        return None
+
+
+def _serve(
+    listener: socket.socket,
+    idle: float,
+    app: Any,
+    sources: dict[str, tuple[int, int]],
+) -> None:
+    children = set()
+    listener.settimeout(idle)
+    while True:
+        try:
+            conn, _ = listener.accept()
+        except TimeoutError:
+            conn = None
+        while children:
+            try:
+                pid, _status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+                children.clear()
+            if not pid:
+                break
+            children.discard(pid)
+        if conn is None:
+            if not children:
+                return
+            continue
+
+        with conn:
+            conn.settimeout(5)
+            try:
+                received = _receive(conn)
+            except OSError:
+                continue
+            if received is None:
+                continue
+            request, fds = received
+            if _changed(sources):
+                # Closing the connection unanswered sends the client cold,
+                # and it starts a new warm process on the closed socket.
+                listener.close()
+                for fd in fds:
+                    os.close(fd)
+                return
+            pid = os.fork()
+            if not pid:
+                listener.close()
+                _run_request(conn, request, fds, app)
+            children.add(pid)
+            for fd in fds:
+                os.close(fd)
+
+
+def _exit_code(code: Any) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _run_request(conn: socket.socket, request: dict, fds: list[int], app: Any) -> None:
+    """Run one command line in a forked child, which never returns."""
+    code = 1
+    try:
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        # The standard streams now write to the client's descriptors.
+        sys.stdout.reconfigure(line_buffering=os.isatty(1))
+        os.environ.clear()
+        os.environ.update(request["env"])
+        os.chdir(request["cwd"])
+        sys.argv = request["argv"]
+        conn.settimeout(None)
+        conn.sendall(_INT.pack(os.getpid()))
+
+        try:
+            app.run()
+            code = 0
+        except SystemExit as e:
+            code = _exit_code(e.code)
+        except KeyboardInterrupt:
+            code = 130
+        except BaseException:
+            traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            conn.sendall(_INT.pack(code))
+        except BaseException:
+            pass
+        os._exit(0)
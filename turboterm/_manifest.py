@@ -0,0 +1,232 @@
+"""On-disk cache of command metadata for `run(modules=...)`.
+
+A manifest records each command's name, import path, doc and parameters,
+with the size, mtime and hash of the source files they came from. While
+those files are unchanged, `run()` registers the commands lazily from the
+manifest instead of importing their modules, so `--help` and usage errors
+never run user code.
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import sys
+import types
+import typing
+from pathlib import Path
+from typing import Any
+
+VERSION = 3
+
+# Defaults of these types survive a JSON round trip unchanged.
+_JSON_TYPES = (type(None), bool, int, float, str)
+
+
+def _is_json(value: Any) -> bool:
+    if type(value) is list:
+        return all(type(item) in _JSON_TYPES for item in value)
+    return type(value) in _JSON_TYPES
+
+
+def default_path(modules: list[str]) -> Path:
+    """A per-user cache file for this program and module list."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    key = "\0".join([os.path.abspath(sys.argv[0]), *modules])
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return Path(base) / "turboterm" / f"cli-{digest}.json"
+
+
+def _type_path(ann: Any) -> str | list | None:
+    """The import path of a parameter type, `""` for none, a list for
+    `list[T]`, `Literal[...]` and `T | None`, or `None` when resolving it
+    could import user code."""
+    if ann is None:
+        return ""
+    origin = typing.get_origin(ann)
+    args = typing.get_args(ann)
+    if origin is list and len(args) == 1:
+        item = _type_path(args[0])
+        return None if item is None else ["list", item]
+    if origin is typing.Literal:
+        return ["literal", list(args)] if _is_json(list(args)) else None
+    if origin in (typing.Union, types.UnionType):
+        rest = [arg for arg in args if arg is not type(None)]
+        inner = _type_path(rest[0]) if len(rest) == 1 else None
+        return None if inner is None else ["optional", inner]
+    if origin is not None:
+        return None
+    module = getattr(ann, "__module__", None)
+    qualname = getattr(ann, "__qualname__", None)
+    if not module or not qualname or "<" in qualname:
+        return None
+    if module.partition(".")[0] not in sys.stdlib_module_names:
+        return None
+    return f"{module}:{qualname}"
+
+
+def _callable_path(func: Any) -> str | None:
+    """The import path of a value completer, imported only when completing."""
+    if func is None or isinstance(func, str):
+        return func
+    module = getattr(func, "__module__", None)
+    qualname = getattr(func, "__qualname__", None)
+    if not module or not qualname or "<" in qualname or module == "__main__":
+        return None
+    return f"{module}:{qualname}"
+
+
+def _resolve_type(path: str | list) -> Any:
+    if not path:
+        return None
+    if isinstance(path, list):
+        kind, arg = path
+        if kind == "literal":
+            return typing.Literal[tuple(arg)]
+        if kind == "list":
+            return list[_resolve_type(arg)]
+        return _resolve_type(arg) | None
+    module, _, qualname = path.partition(":")
+    obj: Any = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _encode_params(specs: list[tuple]) -> list[list] | None:
+    """Parameter specs as JSON data, or `None` if one cannot be stored."""
+    params = []
+    for spec in specs:
+        name, flags, help, ann, required, default, complete, count, bounds = spec
+        type_path = _type_path(ann)
+        if type_path is None or not _is_json(default):
+            return None
+        complete_path = _callable_path(complete)
+        if complete is not None and complete_path is None:
+            return None
+        bounds = list(bounds) if bounds is not None else None
+        if not _is_json(bounds):
+            return None
+        params.append(
+            [
+                name,
+                flags,
+                help,
+                type_path,
+                required,
+                default,
+                complete_path,
+                count,
+                bounds,
+            ]
+        )
+    return params
+
+
+def decode_params(params: list[list]) -> list[tuple]:
+    specs = []
+    for param in params:
+        name, flags, help, ann, required, default, complete, count, bounds = param
+        bounds = tuple(bounds) if bounds is not None else None
+        specs.append(
+            (
+                name,
+                flags,
+                help,
+                _resolve_type(ann),
+                required,
+                default,
+                complete,
+                count,
+                bounds,
+            )
+        )
+    return specs
+
+
+def _hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _fingerprint(path: str) -> list:
+    st = os.stat(path)
+    return [path, st.st_mtime_ns, st.st_size, _hash(path)]
+
+
+def _is_fresh(manifest: dict, modules: list[str]) -> bool:
+    if (
+        manifest.get("version") != VERSION
+        or manifest.get("python") != list(sys.version_info[:2])
+        or manifest.get("modules") != modules
+    ):
+        return False
+    for path, mtime_ns, size, digest in manifest["sources"]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_size != size:
+            return False
+        # A touched but unchanged file keeps the manifest valid.
+        if st.st_mtime_ns != mtime_ns and _hash(path) != digest:
+            return False
+    return True
+
+
+def load(path: Path, modules: list[str]) -> list[dict] | None:
+    """The cached commands, or `None` if the manifest is missing or stale."""
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        return manifest["commands"] if _is_fresh(manifest, modules) else None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save(path: Path, modules: list[str], entries: list[tuple]) -> None:
+    """Write the commands registered while importing `modules`.
+
+    Commands whose parameters cannot be stored are kept by name and doc
+    only, and running one imports the modules as usual.
+    """
+    commands = []
+    files = set()
+    for module in modules:
+        files.add(getattr(sys.modules.get(module), "__file__", None))
+    for name, target, doc, specs, after_help in entries:
+        params = _encode_params(specs)
+        # Functions defined inside other functions cannot be imported.
+        if "<" in target:
+            params = None
+        module = target.partition(":")[0]
+        files.add(getattr(sys.modules.get(module), "__file__", None))
+        commands.append(
+            {
+                "name": name,
+                "target": target,
+                "doc": doc,
+                "after_help": after_help,
+                "cacheable": params is not None,
+                "params": params or [],
+            }
+        )
+    files.discard(None)
+
+    try:
+        manifest = {
+            "version": VERSION,
+            "python": list(sys.version_info[:2]),
+            "modules": modules,
+            "sources": [_fingerprint(f) for f in sorted(files)],
+            "commands": commands,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        # A read-only cache directory only costs the fast path.
+        return
@@ -1,129 +1,514 @@
 import inspect
-from collections.abc import Callable
-from typing import Any
+import os
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from types import FunctionType
+from typing import Any, NamedTuple
 
-from .turboterm import register_command as _register
-from .turboterm import run_cli as _run_cli
+from .turboterm import CliRegistry as _Registry
 
 _UNSET = object()
 
 
+Completer = Callable[[str], Iterable[str]] | str
+
+
 class _Argument:
     """Internal: holds metadata for a positional CLI argument."""
 
-    def __init__(self, help: str = "", default: Any = _UNSET):
+    def __init__(
+        self,
+        help: str = "",
+        default: Any = _UNSET,
+        complete: Completer | None = None,
+        min: float | None = None,
+        max: float | None = None,
+    ):
         self.help = help
         self.default = default
+        self.complete = complete
+        self.min = min
+        self.max = max
 
 
 class _Option:
     """Internal: holds metadata for a CLI option (--flag)."""
 
-    def __init__(self, names: list[str], help: str = "", default: Any = _UNSET):
+    def __init__(
+        self,
+        names: list[str],
+        help: str = "",
+        default: Any = _UNSET,
+        complete: Completer | None = None,
+        count: bool = False,
+        min: float | None = None,
+        max: float | None = None,
+    ):
         self.names = names
         self.help = help
         self.default = default
+        self.complete = complete
+        self.count = count
+        self.min = min
+        self.max = max
 
 
-def Argument(help: str = "", default: Any = _UNSET) -> Any:
-    """Marks a parameter as a positional CLI argument."""
-    return _Argument(help=help, default=default)
+def Argument(
+    help: str = "",
+    default: Any = _UNSET,
+    complete: Completer | None = None,
+    min: float | None = None,
+    max: float | None = None,
+) -> Any:
+    """Marks a parameter as a positional CLI argument.
 
+    `complete` suggests values in shell completion: a function, or its
+    `"pkg.module:func"` import path, called with the word being completed.
+    `min` and `max` bound an `int` or `float` value.
+    """
+    return _Argument(help=help, default=default, complete=complete, min=min, max=max)
 
-def Option(names: list[str], help: str = "", default: Any = _UNSET) -> Any:
-    """Marks a parameter as a CLI option (--flag)."""
-    return _Option(names=names, help=help, default=default)
 
+def Option(
+    names: list[str],
+    help: str = "",
+    default: Any = _UNSET,
+    complete: Completer | None = None,
+    count: bool = False,
+    min: float | None = None,
+    max: float | None = None,
+) -> Any:
+    """Marks a parameter as a CLI option (--flag).
 
-def command(name: str | None = None, after_help: str | None = None):
-    """Decorator to register a function as a CLI command."""
+    With `count=True` the option takes no value and the parameter receives
+    how many times it was given, as in `-vvv`.
+    """
+    return _Option(
+        names=names,
+        help=help,
+        default=default,
+        complete=complete,
+        count=count,
+        min=min,
+        max=max,
+    )
+
+
+_EMPTY = inspect.Parameter.empty
+_CO_VARIADIC = inspect.CO_VARARGS | inspect.CO_VARKEYWORDS
+
+
+def _param_spec(param_name: str, ann: Any, default: Any) -> tuple:
+    """Build the parameter metadata passed to the Rust registry:
+    `(name, flags, help, type, required, default, complete, count, bounds)`."""
+    type_fn = None if ann is _EMPTY else ann
+
+    if isinstance(default, (_Argument, _Option)):
+        flags = default.names if isinstance(default, _Option) else None
+        count = flags is not None and default.count
+        if count:
+            # A counted option is 0 unless given.
+            required, value = False, 0
+        elif flags is not None and type_fn is bool:
+            # A boolean option is a flag, off unless given.
+            required, value = False, False
+        else:
+            required = default.default is _UNSET
+            value = None if required else default.default
+        bounds = None
+        if default.min is not None or default.max is not None:
+            bounds = (default.min, default.max)
+        return (
+            param_name,
+            flags,
+            default.help,
+            type_fn,
+            required,
+            value,
+            default.complete,
+            count,
+            bounds,
+        )
+
+    if default is _EMPTY:
+        # Bare parameter with no default — required positional
+        return (param_name, None, "", type_fn, True, None, None, False, None)
+
+    # Plain default value (e.g., count: int = 1)
+    return (param_name, None, "", type_fn, False, default, None, False, None)
+
+
+def _parameters(func: Callable) -> list[tuple[str, Any, Any]]:
+    """`(name, annotation, default)` for each parameter of `func`.
+
+    A plain function is read from its code object, defaults and annotations,
+    which is about ten times cheaper than `inspect.signature()`; wrapped and
+    other callables still go through it.
+    """
+    attrs = getattr(func, "__dict__", None)
+    if (
+        type(func) is not FunctionType
+        or func.__code__.co_flags & _CO_VARIADIC
+        or (attrs and ("__wrapped__" in attrs or "__signature__" in attrs))
+    ):
+        return [
+            (name, param.annotation, param.default)
+            for name, param in inspect.signature(func).parameters.items()
+        ]
+
+    code = func.__code__
+    positional = code.co_argcount
+    names = code.co_varnames[: positional + code.co_kwonlyargcount]
+    annotations = func.__annotations__
+    defaults = func.__defaults__ or ()
+    kwdefaults = func.__kwdefaults__ or {}
+    first_default = positional - len(defaults)
+
+    params = []
+    for i, name in enumerate(names):
+        if i < positional:
+            default = defaults[i - first_default] if i >= first_default else _EMPTY
+        else:
+            default = kwdefaults.get(name, _EMPTY)
+        params.append((name, annotations.get(name, _EMPTY), default))
+    return params
+
+
+class LineResult(NamedTuple):
+    """The outcome of one command line run by `App.batch()`.
+
+    `status` is 0 on success, the code of a `SystemExit` raised by the
+    command, 2 for a line that does not parse and 1 for any other exception;
+    `error` then holds the message. `value` is what the command returned.
+    """
+
+    line: int
+    argv: list[str]
+    status: int
+    value: Any = None
+    error: str | None = None
+
+
+class App:
+    """A set of CLI commands with its own parsers.
 
-    def decorator(func: Callable):
-        cmd_name = name if name is not None else func.__name__
+    Each `App` is independent of the others and of the default app that
+    the module-level `command()`, `register_lazy()` and `run()` use. The
+    parsers are compiled on first use and reused until another command is
+    registered; threads may parse and dispatch concurrently.
+
+        app = App()
+
+        @app.command()
+        def deploy(target: str = Argument(help="Where to deploy")): ...
+
+        app.dispatch(["deploy", "production"])
+    """
+
+    def __init__(self) -> None:
+        self._registry = _Registry()
+        self._after_help: dict[str, str] = {}
+        # Every registration as `(name, target, doc, params, after_help)`,
+        # so that `run(modules=...)` can cache them.
+        self._log: list[tuple] = []
+
+    def command(self, name: str | None = None, after_help: str | None = None):
+        """Decorator to register a function as a CLI command."""
+
+        def decorator(func: Callable):
+            cmd_name = name if name is not None else func.__name__
+            if after_help is not None:
+                self._after_help[cmd_name] = after_help
+            params = [
+                _param_spec(param_name, ann, default)
+                for param_name, ann, default in _parameters(func)
+            ]
+
+            doc = (func.__doc__ or "").strip() or None
+            self._registry.register(cmd_name, func, doc, params)
+            target = f"{func.__module__}:{func.__qualname__}"
+            self._log.append((cmd_name, target, doc, params, after_help))
+            return func
+
+        return decorator
+
+    def register_lazy(
+        self,
+        name: str,
+        target: str,
+        doc: str | None = None,
+        params: Iterable[tuple] = (),
+        after_help: str | None = None,
+    ) -> None:
+        """Register a command by import path without importing it.
+
+        `target` is `"pkg.module:func"`; the module is imported only when the
+        command is dispatched, while `--help` and parsing use `doc` and
+        `params`. Each parameter is `(name, type)` for a required positional
+        argument or `(name, type, default)`, written as in the function's
+        signature:
+
+            app.register_lazy(
+                "deploy",
+                "myapp.deploy:deploy",
+                doc="Deploy the project.",
+                params=[
+                    ("target", str, Argument(help="Where to deploy")),
+                    ("port", int, Option(["--port", "-p"], default=443)),
+                ],
+            )
+        """
         if after_help is not None:
-            _COMMAND_AFTER_HELP[cmd_name] = after_help
-        sig = inspect.signature(func)
-        params = []
-
-        for param_name, param in sig.parameters.items():
-            ann = param.annotation
-            type_fn = ann if ann is not inspect.Parameter.empty else None
-            default = param.default
-
-            if isinstance(default, _Argument):
-                p = {
-                    "name": param_name,
-                    "kind": "positional",
-                    "help": default.help,
-                    "type": type_fn,
-                    "required": default.default is _UNSET,
-                }
-                if default.default is not _UNSET:
-                    p["default"] = default.default
-
-            elif isinstance(default, _Option):
-                is_bool = type_fn is bool
-                p = {
-                    "name": param_name,
-                    "kind": "option",
-                    "help": default.help,
-                    "flags": default.names,
-                    "is_bool": is_bool,
-                    "required": not is_bool and default.default is _UNSET,
-                }
-                if is_bool:
-                    p["default"] = False
-                elif default.default is not _UNSET:
-                    p["default"] = default.default
-
-            elif default is inspect.Parameter.empty:
-                # Bare parameter with no default — required positional
-                p = {
-                    "name": param_name,
-                    "kind": "positional",
-                    "help": "",
-                    "type": type_fn,
-                    "required": True,
-                }
-
-            else:
-                # Plain default value (e.g., count: int = 1)
-                p = {
-                    "name": param_name,
-                    "kind": "positional",
-                    "help": "",
-                    "type": type_fn,
-                    "required": False,
-                    "default": default,
-                }
-
-            params.append(p)
-
-        doc = (func.__doc__ or "").strip() or None
-        _register(name=cmd_name, func=func, doc=doc, params=params)
-        return func
-
-    return decorator
-
-
-_COMMAND_AFTER_HELP: dict[str, str] = {}
-
-
-def run():
+            self._after_help[name] = after_help
+        specs = []
+        for param in params:
+            param_name, ann, *default = param
+            default = default[0] if default else _EMPTY
+            specs.append(_param_spec(param_name, ann, default))
+        self._registry.register_lazy(name, target, doc, specs)
+        self._log.append((name, target, doc, specs, after_help))
+
+    def parse_args(self, argv: Iterable[str]) -> tuple[str, dict] | None:
+        """Parse `argv` (without the program name) and return the command
+        name and the keyword arguments it would be called with, without
+        calling it. Returns `None` if `argv` asks for help, which is printed
+        instead; usage errors raise `ValueError`."""
+        return self._registry.parse_args(list(argv))
+
+    def dispatch(self, argv: Iterable[str]) -> Any:
+        """Parse `argv` and call the selected command, returning its result."""
+        return self._registry.dispatch(list(argv))
+
+    def complete(self, argv: Iterable[str], current: str = "") -> list[str]:
+        """Shell completion candidates for `current`, the word being typed
+        after `argv` (without the program name)."""
+        return self._registry.complete(list(argv), current)
+
+    def batch(
+        self, lines: Iterable[str], jobs: int = 1, ordered: bool = True
+    ) -> Iterator[LineResult]:
+        """Run each of `lines`, a command line as typed in a shell, and yield
+        a `LineResult` for it. Blank lines and `#` comments are skipped.
+
+        With `jobs` above 1, lines run on a pool of that many threads, and
+        what each line prints is written out when it finishes: in input
+        order, or as lines finish with `ordered=False`. Results are yielded
+        in the same order. Stopping early leaves at most `2 * jobs` lines
+        that were read ahead to finish in the background.
+        """
+        from . import _batch
+
+        return _batch.run(self, lines, jobs, ordered)
+
+    def repl(self, prompt: str = "> ") -> None:
+        """Read command lines interactively and run each until end of input,
+        `exit` or `quit`. Errors are printed and the loop goes on; a value
+        returned by a command is printed with `repr()`."""
+        from . import _batch
+
+        _batch.repl(self, prompt)
+
+    def run(self) -> None:
+        """Parse `sys.argv` and run the selected command.
+
+        Shell completion requests (see `completion_script()`) are answered
+        instead, and exit without dispatching. `--batch [FILE] [--jobs N]
+        [--unordered]` runs the command lines in `FILE`, or standard input,
+        and `--repl` reads them interactively; see `batch()` and `repl()`.
+        """
+        import sys
+
+        shell = os.environ.get("_TURBOTERM_COMPLETE")
+        if shell:
+            self._complete(shell)
+            sys.exit(0)
+
+        args = sys.argv[1:]
+        if args[:1] == ["--batch"] or args[:1] == ["--repl"]:
+            from . import _batch
+
+            sys.exit(_batch.main(self, args, os.path.basename(sys.argv[0])))
+
+        after_help = None
+        if "--help" in args or "-h" in args:
+            for cmd_name in self._after_help:
+                if cmd_name in args:
+                    after_help = self._after_help[cmd_name]
+                    break
+            if after_help is None and self._after_help:
+                after_help = "\n".join(self._after_help.values())
+
+        self.dispatch(args)
+
+        if after_help:
+            print(after_help)
+
+    def _complete(self, shell: str) -> None:
+        """Answer a completion request from a shell, or print the script for
+        `_TURBOTERM_COMPLETE=source_<shell>`."""
+        from . import _completion
+
+        if shell.startswith("source_"):
+            print(completion_script(shell.removeprefix("source_")), end="")
+            return
+        args, current = _completion.request()
+        try:
+            candidates = self.complete(args, current)
+        except Exception:
+            # A failing value completer must not print into the shell.
+            return
+        if candidates:
+            print("\n".join(candidates))
+
+
+default_app = App()
+
+
+def command(name: str | None = None, after_help: str | None = None):
+    """Decorator to register a function as a command of the default app."""
+    return default_app.command(name, after_help)
+
+
+def register_lazy(
+    name: str,
+    target: str,
+    doc: str | None = None,
+    params: Iterable[tuple] = (),
+    after_help: str | None = None,
+) -> None:
+    """Register a command of the default app by import path without
+    importing it; see `App.register_lazy()`."""
+    default_app.register_lazy(name, target, doc, params, after_help)
+
+
+def _register_cached(commands: list[dict], args: list[str]) -> bool:
+    """Register manifest commands lazily. Returns False, registering nothing,
+    if `args` select a command the manifest could not store."""
+    from . import _manifest
+
+    if len(args) > 1 and args[0] == "help":
+        selected = args[1]
+    else:
+        selected = args[0] if args else None
+    registered = {entry[0] for entry in default_app._log}
+    for cmd in commands:
+        if cmd["name"] == selected and not cmd["cacheable"]:
+            return False
+    for cmd in commands:
+        if cmd["name"] in registered:
+            continue
+        params = _manifest.decode_params(cmd["params"])
+        default_app._registry.register_lazy(
+            cmd["name"], cmd["target"], cmd["doc"], params
+        )
+        if cmd["after_help"] is not None:
+            default_app._after_help[cmd["name"]] = cmd["after_help"]
+    return True
+
+
+def _load_commands(
+    modules: list[str], cache: str | os.PathLike | bool, args: list[str]
+) -> None:
+    import importlib
+
+    from . import _manifest
+
+    path = None
+    if cache is not False:
+        path = _manifest.default_path(modules) if cache is True else Path(cache)
+        commands = _manifest.load(path, modules)
+        if commands is not None:
+            if _register_cached(commands, args):
+                return
+            path = None
+
+    start = len(default_app._log)
+    for module in modules:
+        importlib.import_module(module)
+    if path is not None:
+        _manifest.save(path, modules, default_app._log[start:])
+
+
+def _run_daemon(modules: list[str], daemon: bool | float) -> None:
+    """Have a warm process run this command line and exit with its code,
+    or start one for later runs and return to run this one cold."""
+    import sys
+
+    from . import _daemon
+
+    if not _daemon.supported():
+        return
+    path = _daemon.socket_path(modules)
+    if path is None:
+        return
+    code = _daemon.forward(path)
+    if code is not None:
+        sys.exit(code)
+
+    def load():
+        if modules:
+            _load_commands(modules, False, [])
+
+    idle = _daemon.IDLE_TIMEOUT if daemon is True else float(daemon)
+    _daemon.start(path, idle, load, default_app)
+
+
+def completion_script(shell: str, prog: str | None = None) -> str:
+    """The completion script for `shell` ("bash", "zsh" or "fish") for the
+    program `prog`, by default the running program's name.
+
+    Once sourced, Tab asks `run()` for candidates through the
+    `_TURBOTERM_COMPLETE` protocol. Running the program with
+    `_TURBOTERM_COMPLETE=source_bash` (or `source_zsh`, `source_fish`)
+    prints the script.
+    """
     import sys
 
-    args = sys.argv[1:]
+    from . import _completion
+
+    return _completion.script(shell, prog or os.path.basename(sys.argv[0]))
+
+
+def run(
+    modules: Iterable[str] = (),
+    cache: str | os.PathLike | bool = True,
+    daemon: bool | float = False,
+):
+    """Parse `sys.argv` and run the selected command of the default app.
+
+    `modules` names modules that define commands, for `run()` to import
+    itself. Their command metadata is then cached on disk (in the user cache
+    directory, or at the `cache` path; `cache=False` turns this off), and
+    while their source files are unchanged later runs register the commands
+    from the cache and import only the module of the command being run.
+    `--help` and usage errors import none of them.
+
+    With `daemon=True`, or an idle timeout in seconds, the first run also
+    starts a warm background process with the modules imported, and later
+    runs hand their command line, environment and standard streams to it
+    instead of importing anything. It exits when idle or when the code it
+    loaded changes. This needs `os.fork()` and is ignored on Windows.
+
+    Shell completion requests (see `completion_script()`) are answered
+    first, from the same cache, and exit without dispatching.
+    """
+    import sys
 
-    after_help = None
-    if "--help" in args or "-h" in args:
-        for cmd_name in _COMMAND_AFTER_HELP:
-            if cmd_name in args:
-                after_help = _COMMAND_AFTER_HELP[cmd_name]
-                break
-        if after_help is None and _COMMAND_AFTER_HELP:
-            after_help = "\n".join(_COMMAND_AFTER_HELP.values())
+    modules = list(modules)
+    shell = os.environ.get("_TURBOTERM_COMPLETE")
+    # A Tab press never starts, or waits on, a warm process.
+    if daemon and not shell:
+        _run_daemon(modules, daemon)
+    if modules:
+        if not shell:
+            args = sys.argv[1:]
+            if args[:1] == ["--batch"] or args[:1] == ["--repl"]:
+                # The lines may run any command; import them all.
+                cache = False
+            _load_commands(modules, cache, args)
+        elif not shell.startswith("source_"):
+            from . import _completion
 
-    _run_cli(args)
+            _load_commands(modules, cache, _completion.request()[0])
 
-    if after_help:
-        print(after_help)
+    default_app.run()
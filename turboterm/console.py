@@ -1,4 +1,4 @@
-from .turboterm import PyTable, apply_styles
+from .turboterm import PyTable, Tree, apply_styles, render_markdown
 
 
 class Console:
@@ -7,12 +7,22 @@ class Console:
         print(apply_styles(text))
 
     def table(self, data: list[list[str]]):
-        """Prints a styled table to the console."""
-        table_instance = PyTable()
+        """Prints a styled table to the console, fitted to the terminal width."""
+        table_instance = PyTable(width="terminal")
         for row_data in data:
             table_instance.add_row(row_data)
         print(table_instance.to_string())
 
+    def tree(self, label: str, data):
+        """Prints nested lists and dicts as a tree under a root label."""
+        tree_instance = Tree(label)
+        tree_instance.extend(data)
+        print(tree_instance.to_string())
+
+    def markdown(self, text: str):
+        """Prints Markdown text rendered with terminal styles."""
+        print(render_markdown(text))
+
     @property
     def argument(self):
         from .cli import Argument